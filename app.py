@@ -1,15 +1,87 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, request, jsonify, Response
+from flask.json.provider import DefaultJSONProvider
 import pandas as pd
 import numpy as np
 import os
+import gzip
+import hashlib
 import requests
 import math
+from urllib.parse import quote
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+from dashboard_cache import DashboardCache
+from frame_dtypes import CategoryPools, compact_frame
+from photo_cache import PhotoCache, PLACEHOLDER_SVG, USER_AGENT
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele servimos apenas gzip
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da stdlib
+    orjson = None
+
 load_dotenv()
 
+
+# ── JSON ─────────────────────────────────────────────────────────────────────
+def json_default(val):
+    """Serialize numpy/pandas scalars that the JSON encoders don't know."""
+    if isinstance(val, np.bool_):
+        return bool(val)
+    if isinstance(val, np.integer):
+        return int(val)
+    if isinstance(val, np.floating):
+        f = float(val)
+        return None if math.isnan(f) or math.isinf(f) else f
+    if val is pd.NaT or val is pd.NA:
+        return None
+    if isinstance(val, pd.Timestamp):
+        return val.isoformat()
+    if isinstance(val, np.datetime64):
+        return None if np.isnat(val) else str(val)
+    return DefaultJSONProvider.default(val)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, with numpy/pandas support.
+
+    Falls back to the stdlib encoder (plus :func:`json_default`) when orjson
+    isn't installed or when called with encoder-specific kwargs.
+    """
+    default = staticmethod(json_default)
+
+    def _orjson_options(self) -> int:
+        opts = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opts |= orjson.OPT_SORT_KEYS
+        return opts
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=json_default, option=self._orjson_options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=json_default,
+                            option=self._orjson_options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
 # ── Supabase client ──────────────────────────────────────────────────────────
 _supabase: Client = create_client(
@@ -18,19 +90,32 @@ _supabase: Client = create_client(
 )
 
 
+# ── Dashboard cache ──────────────────────────────────────────────────────────
+dashboard_cache = DashboardCache(
+    dumps=app.json.dumps,
+    cache_dir=os.environ.get('DASHBOARD_CACHE_DIR',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'dashboards')),
+    ttl=int(os.environ.get('DASHBOARD_CACHE_TTL', 3600)),
+    stale_ttl=int(os.environ.get('DASHBOARD_CACHE_STALE_TTL', 86400)),
+    max_disk_entries=int(os.environ.get('DASHBOARD_CACHE_MAX_FILES', 4096)),
+    # Variantes gzip/br guardadas junto de cada painel em cache (compress_body é definida abaixo)
+    compress=lambda body, encoding: compress_body(body, encoding),
+)
+
+# Vocabulário de nome/municipio/funcao/status/partido/orgao compartilhado pelos DataFrames das requisições
+category_pools = CategoryPools()
+
+
 # ── Utilities ────────────────────────────────────────────────────────────────
 def safe_val(val, default='-'):
+    """Replace missing values (None/NaN/NaT/inf) by ``default``.
+
+    numpy/pandas scalars pass through untouched; FastJSONProvider encodes them.
+    """
     if val is None:
         return default
     if isinstance(val, float) and (math.isnan(val) or math.isinf(val)):
         return default
-    if isinstance(val, (pd.Timestamp, np.datetime64)):
-        return str(val)
-    if isinstance(val, np.integer):
-        return int(val)
-    if isinstance(val, np.floating):
-        f = float(val)
-        return default if math.isnan(f) else f
     try:
         if pd.isna(val):
             return default
@@ -56,6 +141,138 @@ def get_camara_info(nome):
     return None
 
 
+def get_wikipedia_foto(nome, size=600):
+    """Search pt.wikipedia for ``nome`` and return its page image URL."""
+    api = "https://pt.wikipedia.org/w/api.php"
+    headers = {'User-Agent': USER_AGENT}
+    partes = nome.split()
+    tentativas = [nome]
+    if len(partes) > 2:
+        tentativas.append(f"{partes[0]} {partes[-1]}")
+    try:
+        for termo in tentativas:
+            resp = requests.get(api, params={"action": "query", "list": "search", "srsearch": termo,
+                                             "format": "json", "utf8": 1},
+                                headers=headers, timeout=5)
+            resultados = resp.json().get('query', {}).get('search', [])
+            if not resultados:
+                continue
+            resp = requests.get(api, params={"action": "query", "titles": resultados[0]['title'],
+                                             "prop": "pageimages", "pithumbsize": size,
+                                             "format": "json"},
+                                headers=headers, timeout=5)
+            for page in resp.json().get('query', {}).get('pages', {}).values():
+                if page.get('thumbnail'):
+                    return page['thumbnail']['source']
+            return None
+    except Exception:
+        pass
+    return None
+
+
+def parlamentar_tipo(nome):
+    """``tipo`` of a parlamentar named exactly ``nome`` in emendas, or None if unknown."""
+    try:
+        result = _supabase.table('emendas').select('tipo').eq('nome', nome).limit(1).execute()
+    except Exception:
+        return None
+    if not result.data:
+        return None
+    return result.data[0].get('tipo') or ''
+
+
+def resolve_foto_url(nome):
+    """Best photo source for a parlamentar: Câmara first (deputados only), then Wikipedia."""
+    tipo = parlamentar_tipo(nome) or ''
+    if 'deputado' in tipo.lower():
+        camara_info = get_camara_info(nome)
+        if camara_info and camara_info.get('foto'):
+            return camara_info['foto']
+    return get_wikipedia_foto(nome)
+
+
+photo_cache = PhotoCache(
+    resolve=resolve_foto_url,
+    # Só busca foto de nomes que existem em emendas
+    known=lambda nome: parlamentar_tipo(nome) is not None,
+    max_entries=int(os.environ.get('PHOTO_CACHE_MAX_ENTRIES', 5000)),
+    cache_dir=os.environ.get('PHOTO_CACHE_DIR',
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'photos')),
+    ttl=int(os.environ.get('PHOTO_CACHE_TTL', 7 * 86400)),
+)
+
+
+# ── Compression ──────────────────────────────────────────────────────────────
+JSON_COMPRESS_MIN_BYTES = int(os.environ.get('JSON_COMPRESS_MIN_BYTES', 1024))
+
+
+def compress_body(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """Compress ``body`` with gzip or br; ``best`` trades CPU for size."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if best else 5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+    return body
+
+
+def compress_variants(body: bytes) -> dict:
+    """Return {encoding: bytes} for every encoding we can serve."""
+    encodings = ['gzip'] + (['br'] if brotli is not None else [])
+    variants = {'identity': body}
+    for enc in encodings:
+        variants[enc] = compress_body(body, enc, best=True)
+    return variants
+
+
+def negotiate_encoding(available) -> str:
+    """Pick the best encoding the client accepts (br > gzip > identity)."""
+    accepted = request.accept_encodings
+    for enc in ('br', 'gzip'):
+        if enc in available and accepted.quality(enc) > 0:
+            return enc
+    return 'identity'
+
+
+# ── Static pages ─────────────────────────────────────────────────────────────
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGE_CACHE_MAX_AGE = int(os.environ.get('PAGE_CACHE_MAX_AGE', 86400))
+
+# {filename: {"etag": str, "variants": {encoding: bytes}}}
+_pages = {}
+
+
+def load_page(filename: str) -> dict:
+    """Compile and render an HTML page once, storing precompressed variants."""
+    with open(os.path.join(BASE_DIR, filename), 'r', encoding='utf-8') as f:
+        template = app.jinja_env.from_string(f.read())
+    body = template.render().encode('utf-8')
+    page = {
+        "etag": hashlib.sha256(body).hexdigest()[:32],
+        "variants": compress_variants(body),
+    }
+    _pages[filename] = page
+    return page
+
+
+def serve_page(filename: str) -> Response:
+    """Serve a preloaded page honoring Accept-Encoding and If-None-Match."""
+    page = _pages.get(filename) or load_page(filename)
+    encoding = negotiate_encoding(page['variants'])
+
+    response = Response(page['variants'][encoding], mimetype='text/html')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    # Each encoding gets its own ETag so caches never mix representations
+    response.set_etag(f"{page['etag']}-{encoding}")
+    response.headers['Cache-Control'] = f'public, max-age={PAGE_CACHE_MAX_AGE}'
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
+
+
+for _filename in ('home.html', 'index.html', 'parlamentar.html'):
+    load_page(_filename)
+
+
 # ── CORS ─────────────────────────────────────────────────────────────────────
 @app.after_request
 def add_cors_headers(response):
@@ -64,27 +281,58 @@ def add_cors_headers(response):
     return response
 
 
+@app.after_request
+def compress_json_response(response):
+    """Compress large JSON bodies according to Accept-Encoding."""
+    if (response.mimetype != 'application/json'
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code >= 300):
+        return response
+    body = response.get_data()
+    if len(body) < JSON_COMPRESS_MIN_BYTES:
+        return response
+    available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    encoding = negotiate_encoding(available)
+    response.vary.add('Accept-Encoding')
+    if encoding == 'identity':
+        return response
+    response.set_data(compress_body(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
 # ── Routes ───────────────────────────────────────────────────────────────────
-@app.route('/api/anos')
-def listar_anos():
-    """Return distinct years available in the database."""
-    # Fetch all anos in batches to avoid Supabase default 1000-row limit
-    all_anos = set()
+def iter_all_rows(columns):
+    """Yield every row of ``emendas`` with the given columns.
+
+    Fetches in batches to avoid the Supabase default 1000-row limit.
+    """
     offset = 0
     batch_size = 1000
     while True:
         result = (_supabase.table('emendas')
-                  .select('ano')
+                  .select(columns)
                   .range(offset, offset + batch_size - 1)
                   .execute())
         if not result.data:
             break
-        all_anos.update(row['ano'] for row in result.data)
+        yield from result.data
         if len(result.data) < batch_size:
             break
         offset += batch_size
-    anos = sorted(all_anos, reverse=True)
-    return jsonify({"anos": anos})
+
+
+def build_anos_payload():
+    """Build the /api/anos payload: distinct years, newest first."""
+    all_anos = {row['ano'] for row in iter_all_rows('ano')}
+    return {"anos": sorted(all_anos, reverse=True)}
+
+
+@app.route('/api/anos')
+def listar_anos():
+    """Return distinct years available in the database."""
+    return jsonify(build_anos_payload())
 
 @app.route('/api/search_nomes')
 def search_nomes():
@@ -124,29 +372,28 @@ def search_municipios():
     return jsonify(sorted_names)
 
 
-@app.route('/api/cidade/<path:query>')
-def get_cidade_data(query):
-    query_lower = query.lower().strip()
-    ano = request.args.get('ano')
+def build_cidade_payload(query_lower, ano=None):
+    """Build the /api/cidade dashboard. Returns (payload, status)."""
 
     q = _supabase.table('emendas').select('*').ilike('municipio', f'%{query_lower}%').limit(5000)
     result = q.execute()
     rows = result.data
 
     if not rows:
-        return jsonify({"error": "Nenhuma cidade encontrada"}), 404
+        return {"error": "Nenhuma cidade encontrada"}, 404
 
     if ano:
         rows = [r for r in rows if str(r.get('ano', '')) == str(ano)]
         if not rows:
-            return jsonify({"error": f"Cidade sem dados para o ano {ano}"}), 404
+            return {"error": f"Cidade sem dados para o ano {ano}"}, 404
 
     df = pd.DataFrame(rows)
     df['valor_num'] = pd.to_numeric(df['valor'], errors='coerce').fillna(0.0)
     df['pago_flag'] = df['pago'].astype(bool)
+    compact_frame(df, category_pools)
 
     if df.empty:
-      return jsonify({"error": "Nenhuma cidade encontrada"}), 404
+        return {"error": "Nenhuma cidade encontrada"}, 404
 
     first = df.iloc[0]
     cidade_real = str(safe_val(first.get('municipio'), 'N/A'))
@@ -158,7 +405,7 @@ def get_cidade_data(query):
 
     setor_prioritario = {}
     if 'funcao' in df.columns:
-        func_grp = df.groupby('funcao')['valor_num'].sum().reset_index()
+        func_grp = df.groupby('funcao', observed=True)['valor_num'].sum().reset_index()
         if not func_grp.empty:
             top_func = func_grp.sort_values('valor_num', ascending=False).iloc[0]
             val = float(safe_val(top_func['valor_num'], 0))
@@ -170,7 +417,7 @@ def get_cidade_data(query):
 
     maior_benfeitor = {}
     if 'nome' in df.columns:
-        parl_grp = df.groupby('nome')['valor_num'].sum().reset_index()
+        parl_grp = df.groupby('nome', observed=True)['valor_num'].sum().reset_index()
         if not parl_grp.empty:
             top_parl = parl_grp.sort_values('valor_num', ascending=False).iloc[0]
             maior_benfeitor = {
@@ -181,7 +428,7 @@ def get_cidade_data(query):
     partidos = []
     if 'partido' in df.columns:
         valid_part = df[df['partido'].notna() & (df['partido'] != '')]
-        part_grp = valid_part.groupby('partido')['valor_num'].sum().reset_index()
+        part_grp = valid_part.groupby('partido', observed=True)['valor_num'].sum().reset_index()
         partidos = [str(p) for p in part_grp.sort_values('valor_num', ascending=False)['partido'].head(5).tolist()]
 
     historico = []
@@ -198,7 +445,7 @@ def get_cidade_data(query):
             "valor_raw": float(safe_val(row.get('valor_num', 0), 0)),
         })
 
-    return jsonify({
+    return {
         "success": True,
         "cidade": cidade_real,
         "uf": uf_real,
@@ -211,36 +458,39 @@ def get_cidade_data(query):
         "setor_prioritario": setor_prioritario,
         "partidos": partidos,
         "historico": historico,
-    })
+    }, 200
 
 
-@app.route('/api/parlamentar/<path:query>')
-def get_parlamentar_data(query):
-    query_lower = query.lower().strip()
-    ano = request.args.get('ano')
+def build_parlamentar_payload(query_lower, ano=None):
+    """Build the /api/parlamentar dashboard. Returns (payload, status)."""
 
     q = _supabase.table('emendas').select('*').ilike('nome', f'%{query_lower}%').limit(5000)
     result = q.execute()
     rows = result.data
 
     if not rows:
-        return jsonify({"error": "Nenhum parlamentar encontrado"}), 404
+        return {"error": "Nenhum parlamentar encontrado"}, 404
 
     if ano:
         rows = [r for r in rows if str(r.get('ano', '')) == str(ano)]
         if not rows:
-            return jsonify({"error": f"Parlamentar sem dados para o ano {ano}"}), 404
+            return {"error": f"Parlamentar sem dados para o ano {ano}"}, 404
 
     df = pd.DataFrame(rows)
     df['valor_num'] = pd.to_numeric(df['valor'], errors='coerce').fillna(0.0)
     df['pago_flag'] = df['pago'].astype(bool)
+    compact_frame(df, category_pools)
 
     first = df.iloc[0]
     nome_real = safe_val(first.get('nome'), 'N/A')
     partido_real = safe_val(first.get('partido'), '-')
     tipo_real = safe_val(first.get('tipo'), 'deputado')
 
-    foto_url = ""
+    foto_url = f"/api/foto/{quote(str(nome_real))}"
+    # With the cached photo's version in the URL the browser may keep it for good
+    foto_version = photo_cache.version(str(nome_real))
+    if foto_version:
+        foto_url += f"?v={foto_version}"
     uf_real = ""
     tipo_exibicao = "Deputado Estadual"
 
@@ -249,7 +499,6 @@ def get_parlamentar_data(query):
     elif 'deputado' in tipo_real.lower():
         camara_info = get_camara_info(nome_real)
         if camara_info:
-            foto_url = camara_info.get('foto', '')
             if camara_info.get('partido'):
                 partido_real = camara_info['partido']
             uf_real = camara_info.get('uf', '')
@@ -262,7 +511,7 @@ def get_parlamentar_data(query):
     # Top municipalities
     top_mun = {}
     if 'municipio' in df.columns:
-        mun_grp = df.groupby('municipio')['valor_num'].sum().reset_index()
+        mun_grp = df.groupby('municipio', observed=True)['valor_num'].sum().reset_index()
         for _, row in mun_grp.sort_values('valor_num', ascending=False).iterrows():
             top_mun[str(safe_val(row['municipio'], 'N/A'))] = float(safe_val(row['valor_num'], 0))
 
@@ -270,7 +519,7 @@ def get_parlamentar_data(query):
     setores_prioritarios = []
     top_func = {}
     if 'funcao' in df.columns:
-        func_grp = df.groupby('funcao')['valor_num'].sum().reset_index()
+        func_grp = df.groupby('funcao', observed=True)['valor_num'].sum().reset_index()
         func_sorted = func_grp.sort_values('valor_num', ascending=False)
         if len(func_sorted) > 0:
             top_val = float(safe_val(func_sorted.iloc[0]['valor_num'], 0))
@@ -298,7 +547,7 @@ def get_parlamentar_data(query):
             "valor_raw": float(safe_val(row.get('valor_num', 0), 0)),
         })
 
-    return jsonify({
+    return {
         "success": True,
         "parlamentar": {
             "nome": nome_real,
@@ -316,25 +565,80 @@ def get_parlamentar_data(query):
         "top_municipios": top_mun,
         "todas_funcoes": top_func,
         "historico": historico,
-    })
+    }, 200
+
+
+dashboard_cache.register('cidade', build_cidade_payload)
+dashboard_cache.register('parlamentar', build_parlamentar_payload)
+
+if os.environ.get('CACHE_WARMER') == '1':
+    dashboard_cache.start_warmer(
+        interval=int(os.environ.get('CACHE_WARMER_INTERVAL', 300)),
+        top_n=int(os.environ.get('CACHE_WARMER_TOP_N', 20)),
+    )
+
+
+def dashboard_response(kind: str, query: str) -> Response:
+    """Cached dashboard, served in its precompressed variant when the client accepts one."""
+    encoding = negotiate_encoding(('br', 'gzip') if brotli is not None else ('gzip',))
+    body, status, encoding = dashboard_cache.get_encoded(kind, query.lower().strip(), request.args.get('ano'),
+                                                         encoding, min_bytes=JSON_COMPRESS_MIN_BYTES)
+    response = Response(body, status=status, mimetype='application/json')
+    # compress_json_response skips bodies that already carry a Content-Encoding
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+@app.route('/api/cidade/<path:query>')
+def get_cidade_data(query):
+    return dashboard_response('cidade', query)
+
+
+@app.route('/api/parlamentar/<path:query>')
+def get_parlamentar_data(query):
+    return dashboard_response('parlamentar', query)
+
+
+@app.route('/api/foto/<path:entity>')
+def get_foto(entity):
+    """Serve a cached thumbnail for a parlamentar, or a placeholder SVG."""
+    size = request.args.get('size', 192, type=int)
+    fmt = request.args.get('format') or ('webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpg')
+    entity = entity.strip()
+    foto = photo_cache.get(entity, size=size, fmt=fmt)
+
+    if foto is None:
+        response = Response(PLACEHOLDER_SVG, mimetype='image/svg+xml')
+        response.set_etag(hashlib.sha256(PLACEHOLDER_SVG).hexdigest()[:32])
+        # The photo may show up later, so the placeholder is only cached briefly
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+    else:
+        data, etag, mimetype = foto
+        response = Response(data, mimetype=mimetype)
+        response.set_etag(etag)
+        if request.args.get('v') and request.args.get('v') == photo_cache.version(entity):
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response.headers['Cache-Control'] = f'public, max-age={PAGE_CACHE_MAX_AGE}'
+        response.vary.add('Accept')
+    return response.make_conditional(request)
 
 
 @app.route('/')
 def home():
-    with open('home.html', 'r', encoding='utf-8') as f:
-        return render_template_string(f.read())
+    return serve_page('home.html')
 
 
 @app.route('/municipios')
 def municipios():
-    with open('index.html', 'r', encoding='utf-8') as f:
-        return render_template_string(f.read())
+    return serve_page('index.html')
 
 
 @app.route('/parlamentar')
 def parlamentar():
-    with open('parlamentar.html', 'r', encoding='utf-8') as f:
-        return render_template_string(f.read())
+    return serve_page('parlamentar.html')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,339 @@
+"""
+Dashboard response cache with stale-while-revalidate and a top-N warmer.
+
+Entries are encoded JSON bodies keyed by (kind, query, ano). They are kept in
+memory and, when the cache directory is writable, on disk so every server
+process and the ``scripts/warm_cache.py`` CLI share them. Access counts are
+recorded per key and decide which entries the warmer keeps fresh.
+
+Queries are normalized (strip + lower) before they become keys, and only
+queries that produced a result are stored or counted, so misses cost no disk.
+The disk keeps at most ``max_disk_entries`` bodies (oldest written first out)
+and the counts file its ``max_counts`` most accessed keys; processes merge
+their counts into it under an exclusive file lock.
+
+With a ``compress(body, encoding)`` function, ``get_encoded`` also serves the
+gzip/br variants of cached bodies. Each variant is compressed once per stored
+body and kept next to its in-memory entry, so a hot dashboard isn't compressed
+again on every request; a refresh stores a new body and its variants are
+rebuilt on demand.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from collections import Counter, OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # fcntl só existe em Unix; no Windows o merge das contagens fica sem lock
+    fcntl = None
+
+COUNTS_NAME = 'access_counts.json'
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive lock held on ``path`` (created if needed) across processes."""
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def normalize_query(query) -> str:
+    return str(query).strip().lower()
+
+
+def _key_str(key) -> str:
+    return json.dumps([str(part) for part in key], ensure_ascii=False)
+
+
+def _str_key(s: str) -> tuple:
+    kind, query, ano = json.loads(s)
+    return kind, query, ano
+
+
+class DashboardCache:
+    """Cache of dashboard JSON bodies built by registered builder functions.
+
+    A builder receives ``(query, ano)`` and returns ``(payload, status)``;
+    only status 200 payloads are cached.
+    """
+
+    def __init__(self, dumps, cache_dir=None, ttl=3600, stale_ttl=86400, max_entries=512,
+                 flush_interval=60, max_disk_entries=4096, max_counts=10000, compress=None):
+        self.dumps = dumps
+        self.compress = compress
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_counts = max_counts
+        self.flush_interval = flush_interval
+        self.stats = Counter()
+        self._builders = {}
+        self._mem = OrderedDict()  # key -> (stored_at, body)
+        self._variants = {}        # key -> (stored_at, {encoding: compressed body})
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._pending_counts = Counter()
+        self._last_flush = time.time()
+        self._warmer = None
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+            except OSError:
+                self.cache_dir = None
+
+    def register(self, kind: str, builder):
+        self._builders[kind] = builder
+
+    # ── storage ──────────────────────────────────────────────────────────────
+    def _path(self, key) -> str:
+        digest = hashlib.sha256(_key_str(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read(self, key):
+        """Return the newest (stored_at, body) from memory or disk, or None."""
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                self._mem.move_to_end(key)
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                mtime = os.path.getmtime(path)
+                # Another process (e.g. the warm_cache CLI) wrote a newer body
+                if entry is None or mtime > entry[0]:
+                    with open(path, 'rb') as f:
+                        entry = (mtime, f.read())
+                    self._remember(key, entry)
+            except OSError:
+                pass
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._mem[key] = entry
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                evicted, _ = self._mem.popitem(last=False)
+                self._variants.pop(evicted, None)
+
+    def _write(self, key, body: bytes):
+        stored_at = time.time()
+        if self.cache_dir:
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp, 'wb') as f:
+                    f.write(body)
+                os.replace(tmp, path)
+                stored_at = os.path.getmtime(path)
+            except OSError:
+                pass
+            self._prune_disk()
+        self._remember(key, (stored_at, body))
+        return stored_at
+
+    def _prune_disk(self):
+        """Drop the oldest bodies once the directory holds more than ``max_disk_entries``."""
+        try:
+            entries = [e for e in os.scandir(self.cache_dir)
+                       if e.name.endswith('.json') and e.name != COUNTS_NAME]
+        except OSError:
+            return
+        excess = len(entries) - self.max_disk_entries
+        if excess <= 0:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:excess]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    # ── lookup ───────────────────────────────────────────────────────────────
+    def get(self, kind: str, query: str, ano=None):
+        """Return ``(body, status)``, serving stale bodies while refreshing."""
+        body, status, _ = self._get((kind, normalize_query(query), str(ano or '').strip()))
+        return body, status
+
+    def get_encoded(self, kind: str, query: str, ano=None, encoding: str = 'identity', min_bytes: int = 0):
+        """Like ``get``, with cached 200 bodies of ``min_bytes`` or more compressed as ``encoding``.
+
+        Returns ``(body, status, encoding)``; the encoding is 'identity' when
+        the body was left as is (errors, small bodies, no ``compress``).
+        """
+        key = (kind, normalize_query(query), str(ano or '').strip())
+        body, status, stored_at = self._get(key)
+        if status != 200 or encoding == 'identity' or self.compress is None or len(body) < min_bytes:
+            return body, status, 'identity'
+        return self._variant(key, stored_at, body, encoding), status, encoding
+
+    def _get(self, key):
+        """``(body, status, stored_at)``; stored_at is None for bodies that weren't cached."""
+        entry = self._read(key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age < self.ttl:
+                self.stats['hits'] += 1
+                self._count(key)
+                return entry[1], 200, entry[0]
+            if age < self.ttl + self.stale_ttl:
+                self.stats['stale'] += 1
+                self._count(key)
+                self._refresh_async(key)
+                return entry[1], 200, entry[0]
+
+        self.stats['misses'] += 1
+        body, status, stored_at = self._refresh(key)
+        if status == 200:
+            self._count(key)
+        return body, status, stored_at
+
+    def _variant(self, key, stored_at, body: bytes, encoding: str) -> bytes:
+        """``body`` compressed as ``encoding``, compressed once per stored body."""
+        with self._lock:
+            variants = self._variants.get(key)
+            if variants is not None and variants[0] == stored_at and encoding in variants[1]:
+                self.stats['variant_hits'] += 1
+                return variants[1][encoding]
+        compressed = self.compress(body, encoding)
+        with self._lock:
+            # Only kept while it belongs to the body currently in memory
+            entry = self._mem.get(key)
+            if entry is not None and entry[0] == stored_at:
+                variants = self._variants.get(key)
+                if variants is None or variants[0] != stored_at:
+                    variants = self._variants[key] = (stored_at, {})
+                variants[1][encoding] = compressed
+        return compressed
+
+    def refresh(self, key):
+        """Rebuild ``key`` synchronously and store it when successful."""
+        body, status, _ = self._refresh(key)
+        return body, status
+
+    def _refresh(self, key):
+        kind, query, ano = key
+        payload, status = self._builders[kind](query, ano or None)
+        body = self.dumps(payload).encode('utf-8')
+        stored_at = self._write(key, body) if status == 200 else None
+        self.stats['refreshes'] += 1
+        return body, status, stored_at
+
+    def _refresh_async(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(key)
+            except Exception as e:
+                # Keep serving the stale body; the next request retries
+                self.stats['refresh_errors'] += 1
+                print(f"[cache] Erro ao atualizar {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    # ── access counts ────────────────────────────────────────────────────────
+    def _count(self, key):
+        with self._lock:
+            self._pending_counts[_key_str(key)] += 1
+        if time.time() - self._last_flush > self.flush_interval:
+            self.flush_counts()
+
+    def _counts_path(self) -> str:
+        return os.path.join(self.cache_dir, COUNTS_NAME)
+
+    def _load_counts(self) -> Counter:
+        if not self.cache_dir:
+            return Counter()
+        try:
+            with open(self._counts_path(), 'r', encoding='utf-8') as f:
+                return Counter(json.load(f))
+        except (OSError, ValueError):
+            return Counter()
+
+    def flush_counts(self):
+        """Merge in-memory access counts into the shared counts file."""
+        self._last_flush = time.time()
+        with self._lock:
+            pending, self._pending_counts = self._pending_counts, Counter()
+        if not self.cache_dir:
+            with self._lock:
+                self._pending_counts.update(pending)
+            return
+        tmp = f"{self._counts_path()}.{os.getpid()}.tmp"
+        try:
+            # Read-modify-write under the lock, or concurrent workers drop each other's counts
+            with _file_lock(self._counts_path() + '.lock'):
+                counts = self._load_counts()
+                counts.update(pending)
+                counts = dict(counts.most_common(self.max_counts))
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(counts, f)
+                os.replace(tmp, self._counts_path())
+        except OSError:
+            with self._lock:
+                self._pending_counts.update(pending)
+
+    def top(self, n: int) -> list:
+        """Return the ``n`` most accessed keys for each (kind, ano) pair."""
+        counts = self._load_counts()
+        with self._lock:
+            counts.update(self._pending_counts)
+        groups = {}
+        for key_s, count in counts.most_common():
+            key = _str_key(key_s)
+            group = groups.setdefault((key[0], key[2]), [])
+            if len(group) < n:
+                group.append(key)
+        return [key for group in groups.values() for key in group]
+
+    # ── warmer ───────────────────────────────────────────────────────────────
+    def warm(self, top_n: int = 20, force: bool = False, ahead: float = None) -> int:
+        """Rebuild popular entries that are missing or expire within ``ahead`` seconds."""
+        ahead = self.ttl * 0.2 if ahead is None else ahead
+        refreshed = 0
+        for key in self.top(top_n):
+            if key[0] not in self._builders:
+                continue
+            entry = self._read(key)
+            if not force and entry is not None and time.time() - entry[0] < self.ttl - ahead:
+                continue
+            try:
+                self.refresh(key)
+                refreshed += 1
+            except Exception as e:
+                self.stats['refresh_errors'] += 1
+                print(f"[cache] Erro ao aquecer {key}: {e}")
+        return refreshed
+
+    def start_warmer(self, interval: float = 300, top_n: int = 20):
+        """Run flush_counts + warm every ``interval`` seconds in a daemon thread."""
+        if self._warmer is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.flush_counts()
+                self.warm(top_n)
+
+        self._warmer = threading.Thread(target=loop, daemon=True)
+        self._warmer.start()
@@ -0,0 +1,179 @@
+"""
+Compact dtypes for the emendas DataFrames served by the apps.
+
+``nome``, ``municipio``, ``funcao``, ``status``, ``partido`` and ``orgao`` repeat
+a few hundred distinct strings over thousands of rows. ``compact_frame`` turns
+them into categoricals (one small integer code per row plus the distinct
+values), so groupbys run on the codes and each row stops holding its own
+Python string.
+
+A ``CategoryPools`` keeps one vocabulary per column shared by every frame
+compacted with it (the portal's years, the root app's per-request frames):
+categories are the sorted union of every value seen so far, so a value is
+stored once across years and groupby keeps the lexicographic order it had on
+object columns. The pool only grows; a frame keeps the dtype it was compacted
+with, which is always a sorted subset of the current one.
+
+``valor_num`` stays float64 (float32 loses centavos above ~R$ 100 mil) but is
+made numeric when it arrived as object; ``pago_flag`` becomes a plain bool.
+
+Groupbys on these columns must pass ``observed=True``, otherwise every
+category of the pool shows up with a zero sum.
+
+Usage (before/after memory report):
+    python frame_dtypes.py xlsx/*.xlsx
+"""
+import os
+import sys
+import threading
+
+import pandas as pd
+
+CATEGORY_COLUMNS = ('nome', 'municipio', 'funcao', 'status', 'partido', 'orgao')
+
+
+def _distinct(series: pd.Series):
+    """Distinct non-null values of ``series``; None when they aren't all strings."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.cat.categories
+    else:
+        values = series.dropna().unique()
+    if not all(isinstance(v, str) for v in values):
+        return None
+    return values
+
+
+class CategoryPools:
+    """Sorted vocabulary per column, shared by every frame compacted with it."""
+
+    def __init__(self):
+        self._dtypes = {}  # column -> CategoricalDtype
+        self._lock = threading.Lock()
+
+    def dtype(self, column: str, series: pd.Series):
+        """CategoricalDtype covering the values of ``series``; None if it can't be categorical."""
+        values = _distinct(series)
+        if values is None:
+            return None
+        with self._lock:
+            current = self._dtypes.get(column)
+            if current is not None:
+                known = current.categories
+                new = pd.Index(values).difference(known)
+                if new.empty:
+                    return current
+                categories = sorted(list(known) + list(new))
+            else:
+                categories = sorted(values)
+            dtype = pd.CategoricalDtype(categories)
+            self._dtypes[column] = dtype
+            return dtype
+
+    def sizes(self) -> dict:
+        with self._lock:
+            return {column: len(dtype.categories) for column, dtype in self._dtypes.items()}
+
+    def nbytes(self) -> int:
+        """Memory of the current vocabularies (stored once, whatever the number of frames)."""
+        with self._lock:
+            return sum(int(dtype.categories.memory_usage(deep=True)) for dtype in self._dtypes.values())
+
+
+def compact_frame(df: pd.DataFrame, pools: CategoryPools = None,
+                  columns=CATEGORY_COLUMNS) -> pd.DataFrame:
+    """Convert the repeated string columns of ``df`` to categoricals (in place) and return it."""
+    for column in columns:
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if pools is not None:
+            dtype = pools.dtype(column, series)
+        else:
+            values = _distinct(series)
+            dtype = pd.CategoricalDtype(sorted(values)) if values is not None else None
+        if dtype is None or series.dtype == dtype:
+            continue
+        df[column] = series.astype(dtype)
+
+    if 'valor_num' in df.columns and df['valor_num'].dtype == object:
+        df['valor_num'] = pd.to_numeric(df['valor_num'], errors='coerce').fillna(0.0)
+    if 'pago_flag' in df.columns and df['pago_flag'].dtype != bool:
+        df['pago_flag'] = df['pago_flag'].notna() & df['pago_flag'].astype(bool)
+    return df
+
+
+# ── Relatório de memória ─────────────────────────────────────────────────────
+
+def column_nbytes(df: pd.DataFrame) -> pd.Series:
+    """Deep memory per column, counting categoricals by their codes (the pool is shared)."""
+    usage = df.memory_usage(index=False, deep=True)
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            usage[column] = df[column].cat.codes.memory_usage(index=False)
+    return usage
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=False).get('Index', 0) + column_nbytes(df).sum())
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> dict:
+    """Memory per column of the same frame before and after ``compact_frame``.
+
+    Categorical columns count their codes only; the shared vocabularies are
+    reported once by ``CategoryPools.nbytes``.
+    """
+    usage_before = column_nbytes(before)
+    usage_after = column_nbytes(after)
+    columns = {column: {'dtype_before': str(before[column].dtype), 'dtype_after': str(after[column].dtype),
+                        'before_bytes': int(usage_before[column]), 'after_bytes': int(usage_after[column])}
+               for column in before.columns if column in after.columns}
+    return {'rows': len(before), 'columns': columns,
+            'before_bytes': int(usage_before.sum()), 'after_bytes': int(usage_after.sum())}
+
+
+def format_memory_report(report: dict) -> str:
+    rows = max(report['rows'], 1)
+    lines = [f"{'column':<12} {'before':>10} {'after':>10} {'B/row':>13}  dtype"]
+    for column, c in report['columns'].items():
+        if c['before_bytes'] == c['after_bytes'] and c['dtype_before'] == c['dtype_after']:
+            continue
+        lines.append(f"{column:<12} {c['before_bytes'] / 1024:>8.0f}KB {c['after_bytes'] / 1024:>8.0f}KB "
+                     f"{c['before_bytes'] / rows:>5.0f} → {c['after_bytes'] / rows:<5.0f}  "
+                     f"{c['dtype_before']} → {c['dtype_after']}")
+    before, after = report['before_bytes'], report['after_bytes']
+    lines.append(f"{'total':<12} {before / 1024:>8.0f}KB {after / 1024:>8.0f}KB "
+                 f"{before / rows:>5.0f} → {after / rows:<5.0f}  ({before / max(after, 1):.1f}x menor)")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from scripts.xlsx_stream import read_xlsx
+    from scripts.column_mapping import rename_columns
+    from scripts.db_utils import parse_moeda_series
+
+    pools = CategoryPools()
+    total_before = total_after = 0
+    for path in sys.argv[1:]:
+        df = read_xlsx(path) if path.endswith('.xlsx') else pd.read_csv(path)
+        df = rename_columns(df, 'portal_xlsx')
+        if 'nome' in df.columns:
+            df['nome'] = df['nome'].astype(str).str.strip()
+        if 'valor' in df.columns:
+            df['valor_num'] = parse_moeda_series(df['valor'])
+        if 'status' in df.columns:
+            df['pago_flag'] = df['status'].astype(str).str.lower().str.contains('pago')
+        report = memory_report(df, compact_frame(df.copy(), pools))
+        total_before += report['before_bytes']
+        total_after += report['after_bytes']
+        print(f"\n{os.path.basename(path)} ({report['rows']} linhas)")
+        print(format_memory_report(report))
+    total_after += pools.nbytes()
+    print(f"\nCategorias compartilhadas ({pools.nbytes() / 1024:.0f}KB): {pools.sizes()}")
+    print(f"Todos os arquivos: {total_before / (1 << 20):.1f} MiB → {total_after / (1 << 20):.1f} MiB "
+          f"(com as categorias)")
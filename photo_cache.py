@@ -0,0 +1,215 @@
+"""
+On-disk cache of parlamentar photos, resized to a few thumbnail sizes.
+
+The best source URL for an entity is resolved once (see ``resolve`` passed by
+app.py), downloaded, and stored as WebP/JPEG thumbnails under
+``<cache_dir>/<sha256(entity)>/`` together with a ``meta.json`` holding the
+source URL, fetch time, a content hash per file and a ``version`` over all of
+them. Entities without a photo are remembered too, so the placeholder is served
+without new lookups until ``miss_ttl`` expires.
+
+``known(entity)`` gates everything else: names it rejects get the placeholder
+without any outbound request or disk write, so arbitrary URLs can't be used to
+fill the cache. The cache keeps at most ``max_entries`` entities (oldest
+fetched are dropped first), and fetches are serialized through a fixed set of
+striped locks.
+"""
+import io
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+import requests
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow é opcional; sem ele servimos a imagem original
+    Image = None
+
+USER_AGENT = 'LupaCidada/1.0 (https://github.com/relitosouza/LeitorEmendas)'
+
+PLACEHOLDER_SVG = (
+    b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 96 96">'
+    b'<rect width="96" height="96" fill="#e5e7eb"/>'
+    b'<circle cx="48" cy="36" r="18" fill="#9ca3af"/>'
+    b'<path d="M14 92c4-20 18-30 34-30s30 10 34 30z" fill="#9ca3af"/>'
+    b'</svg>'
+)
+
+LOCK_STRIPES = 64
+
+_MIMETYPES = {'webp': 'image/webp', 'jpg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif'}
+
+
+class PhotoCache:
+    """Resolve, download and serve resized photos for a parlamentar name."""
+
+    def __init__(self, resolve, cache_dir, ttl=7 * 86400, miss_ttl=86400,
+                 sizes=(96, 192, 384), timeout=10, known=None, max_entries=5000):
+        self.resolve = resolve
+        self.known = known
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.sizes = tuple(sorted(sizes))
+        self.timeout = timeout
+        self.formats = ['jpg']
+        if Image is not None and features.check('webp'):
+            self.formats.insert(0, 'webp')
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _digest(entity: str) -> str:
+        return hashlib.sha256(entity.lower().encode('utf-8')).hexdigest()
+
+    def _dir(self, entity: str) -> str:
+        return os.path.join(self.cache_dir, self._digest(entity))
+
+    def _lock(self, entity: str) -> threading.Lock:
+        return self._locks[int(self._digest(entity)[:8], 16) % LOCK_STRIPES]
+
+    def _read_meta(self, entity: str):
+        try:
+            with open(os.path.join(self._dir(entity), 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_fresh(self, meta) -> bool:
+        ttl = self.ttl if meta.get('files') else self.miss_ttl
+        return time.time() - meta.get('fetched_at', 0) < ttl
+
+    # ── fetching ─────────────────────────────────────────────────────────────
+    def _download(self, url: str) -> bytes:
+        resp = requests.get(url, headers={'User-Agent': USER_AGENT}, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.content
+
+    def _thumbnails(self, data: bytes) -> dict:
+        """Return {filename: bytes} for every size/format pair."""
+        if Image is None:
+            return {'orig': data}
+        img = ImageOps.exif_transpose(Image.open(io.BytesIO(data))).convert('RGB')
+        files = {}
+        for size in self.sizes:
+            thumb = img.copy()
+            thumb.thumbnail((size, size), Image.LANCZOS)
+            for fmt in self.formats:
+                buf = io.BytesIO()
+                if fmt == 'webp':
+                    thumb.save(buf, 'WEBP', quality=80, method=4)
+                else:
+                    thumb.save(buf, 'JPEG', quality=82, optimize=True, progressive=True)
+                files[f"{size}.{fmt}"] = buf.getvalue()
+        return files
+
+    def _store(self, entity: str, source, files: dict) -> dict:
+        """Write files + meta.json to a temp dir and swap it into place."""
+        final_dir = self._dir(entity)
+        suffix = f"{os.getpid()}.{threading.get_ident()}"
+        tmp_dir = f"{final_dir}.{suffix}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        meta = {'entity': entity, 'source': source, 'fetched_at': time.time(), 'files': {}}
+        for name, data in files.items():
+            with open(os.path.join(tmp_dir, name), 'wb') as f:
+                f.write(data)
+            meta['files'][name] = hashlib.sha256(data).hexdigest()[:32]
+        meta['version'] = hashlib.sha256(json.dumps(meta['files'], sort_keys=True).encode()).hexdigest()[:16]
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        # Move the old version aside before swapping in the new one: rmtree on the
+        # live directory would pull files from under a concurrent get()
+        old_dir = f"{final_dir}.{suffix}.old"
+        try:
+            os.replace(final_dir, old_dir)
+        except FileNotFoundError:
+            old_dir = None
+        os.replace(tmp_dir, final_dir)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+        self._prune()
+        return meta
+
+    def _prune(self):
+        """Drop the oldest entities once the cache holds more than ``max_entries``."""
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.is_dir() and '.' not in e.name]
+        except OSError:
+            return
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:excess]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    def ensure(self, entity: str) -> dict:
+        """Return fresh metadata for ``entity``, fetching the photo if needed."""
+        meta = self._read_meta(entity)
+        if meta is not None and self._is_fresh(meta):
+            return meta
+        if meta is None and self.known is not None and not self.known(entity):
+            return {'entity': entity, 'source': None, 'files': {}}
+        with self._lock(entity):
+            meta = self._read_meta(entity)
+            if meta is not None and self._is_fresh(meta):
+                return meta
+            try:
+                url = self.resolve(entity)
+                files = self._thumbnails(self._download(url)) if url else {}
+                return self._store(entity, url, files)
+            except Exception as e:
+                print(f"[foto] Erro ao obter foto de '{entity}': {e}")
+                # Keep serving what we had; otherwise fall back to the placeholder
+                if meta is not None:
+                    return meta
+                return {'entity': entity, 'source': None, 'files': {}}
+
+    # ── serving ──────────────────────────────────────────────────────────────
+    def version(self, entity: str):
+        """Version of the cached photo of ``entity`` (no fetching), or None."""
+        meta = self._read_meta(entity)
+        if meta is None or not meta.get('files') or not self._is_fresh(meta):
+            return None
+        return meta.get('version')
+
+    def get(self, entity: str, size: int = 192, fmt: str = 'webp'):
+        """Return ``(data, etag, mimetype)`` or None when there is no photo."""
+        meta = self.ensure(entity)
+        files = meta.get('files') or {}
+        if not files:
+            return None
+        if 'orig' in files:
+            name = 'orig'
+        else:
+            if fmt not in self.formats:
+                fmt = self.formats[-1]
+            chosen = next((s for s in self.sizes if s >= size), self.sizes[-1])
+            name = f"{chosen}.{fmt}"
+        try:
+            with open(os.path.join(self._dir(entity), name), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            # Swapped or pruned while we read it: a miss, the next request refetches
+            return None
+        mimetype = _sniff_mimetype(data) if name == 'orig' else _MIMETYPES[name.rsplit('.', 1)[-1]]
+        # ETag from the bytes actually read, in case a refresh swapped them in meanwhile
+        return data, hashlib.sha256(data).hexdigest()[:32], mimetype
+
+
+def _sniff_mimetype(data: bytes) -> str:
+    if data.startswith(b'\x89PNG'):
+        return 'image/png'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[:3] == b'GIF':
+        return 'image/gif'
+    return 'image/jpeg'
@@ -2,19 +2,50 @@ from flask import Flask, request, jsonify, render_template_string
 import pandas as pd
 import numpy as np
 import os
-import io
+import sys
 import math
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from scripts.xlsx_stream import read_xlsx, iter_xlsx_frames, xlsx_row_count
+from scripts.column_mapping import rename_columns
+from year_store import YearStore
+from frame_store import load_frame, save_frame, frame_path
+from scripts.parse_cache import file_hash
+from frame_dtypes import CategoryPools, compact_frame
+from upload_jobs import UploadJobs
+from shared_store import SharedManifest, file_lock
 
 app = Flask(__name__)
 
 # Pasta para persistir arquivos carregados
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 os.makedirs(DATA_DIR, exist_ok=True)
-
-# Dicionário global: {ano: DataFrame}
-global_dfs = {}
-# Ano atualmente selecionado
+# Uploads em processamento (subpasta: não aparecem como anos)
+UPLOAD_DIR = os.path.join(DATA_DIR, 'uploads')
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Uploads: bloco de cópia para o disco, linhas por bloco processado e workers em segundo plano
+UPLOAD_BUFFER_BYTES = 1 << 20
+UPLOAD_CHUNK_ROWS = 5000
+UPLOAD_WORKERS = int(os.environ.get('PORTAL_UPLOAD_WORKERS', '2'))
+
+# Versão do processamento: incremente ao mudar process_dataframe para descartar os .arrow salvos
+PROCESSING_VERSION = 2
+
+# Categorias de nome/municipio/funcao/status/partido/orgao compartilhadas entre os anos
+category_pools = CategoryPools()
+# Orçamento de memória para os anos carregados (MiB); os menos usados são descarregados
+MEMORY_BUDGET_MB = float(os.environ.get('PORTAL_MEMORY_BUDGET_MB', '512'))
+# Ano atualmente selecionado (sincronizado entre os workers pelo manifesto)
 current_year = None
+# Anos publicados e ano ativo, compartilhados pelos workers (gunicorn -w N) via data/manifest.json
+shared = SharedManifest(DATA_DIR)
+# Geração de cada ano já vista por este worker
+seen_generations = {}
+# Frames servidos direto do mapa de memória (compartilhado entre workers); no Windows um
+# arquivo mapeado não pode ser substituído por um novo upload, então lá os dados são copiados
+ZERO_COPY = os.name != 'nt'
 
 # Função para limpar valores não serializáveis em JSON (NaN, NaT, Timestamp, etc.)
 def safe_val(val, default='-'):
@@ -56,81 +87,10 @@ def parse_moeda(val):
     except:
         return 0.0
 
-def process_dataframe(df):
-    """Processa um DataFrame bruto: normaliza colunas, parseia valores, etc."""
-    # Colunas do portal da transparência que devem ser ignoradas
-    # (reconhecidas para não interferir no mapeamento das demais)
-    colunas_ignoradas = set()
-    columns_list = list(df.columns)
-    for col in columns_list:
-        lower_col = str(col).lower().strip()
-        if 'órgão processador' in lower_col or 'orgao processador' in lower_col:
-            colunas_ignoradas.add(col)
-        elif 'primeira fase' in lower_col or 'substituída' in lower_col or 'substituida' in lower_col:
-            colunas_ignoradas.add(col)
-        elif 'natureza' in lower_col:
-            colunas_ignoradas.add(col)
-        elif 'valor remanejado' in lower_col:
-            colunas_ignoradas.add(col)
-
-    col_mapper = {}
-    mapped_values = set()
-
-    # PASSADA 1: mapeamentos específicos (termos exatos/compostos)
-    for col in columns_list:
-        if col in colunas_ignoradas:
-            continue
-        lower_col = str(col).lower().strip()
-        if 'nome' not in mapped_values and ('parlamentar' in lower_col or 'deputad' in lower_col or 'autor' in lower_col):
-            col_mapper[col] = 'nome'
-            mapped_values.add('nome')
-        elif 'valor' not in mapped_values and ('valor decisão' in lower_col or 'valor decisao' in lower_col):
-            col_mapper[col] = 'valor'
-            mapped_values.add('valor')
-        elif 'municipio' not in mapped_values and ('município' in lower_col or 'municipio' in lower_col):
-            col_mapper[col] = 'municipio'
-            mapped_values.add('municipio')
-        elif 'funcao' not in mapped_values and ('função de governo' in lower_col or 'função' in lower_col or 'funcao' in lower_col):
-            col_mapper[col] = 'funcao'
-            mapped_values.add('funcao')
-        elif 'data' not in mapped_values and 'data pagamento' in lower_col:
-            col_mapper[col] = 'data'
-            mapped_values.add('data')
-        elif 'orgao' not in mapped_values and ('beneficiário' in lower_col or 'beneficiario' in lower_col):
-            col_mapper[col] = 'orgao'
-            mapped_values.add('orgao')
-        elif 'status' not in mapped_values and ('estágio' in lower_col or 'estagio' in lower_col):
-            col_mapper[col] = 'status'
-            mapped_values.add('status')
-        elif 'partido' not in mapped_values and 'partido' in lower_col:
-            col_mapper[col] = 'partido'
-            mapped_values.add('partido')
-        elif 'codigo' not in mapped_values and ('código' in lower_col or 'codigo' in lower_col):
-            col_mapper[col] = 'codigo'
-            mapped_values.add('codigo')
-        elif 'objeto' not in mapped_values and 'objeto' in lower_col:
-            col_mapper[col] = 'objeto'
-            mapped_values.add('objeto')
-
-    # PASSADA 2: mapeamentos genéricos (só colunas não ignoradas e não mapeadas)
-    for col in columns_list:
-        if col in col_mapper or col in colunas_ignoradas:
-            continue
-        lower_col = str(col).lower().strip()
-        if 'nome' not in mapped_values and 'nome' in lower_col and 'município' not in lower_col and 'municipio' not in lower_col:
-            col_mapper[col] = 'nome'
-            mapped_values.add('nome')
-        elif 'valor' not in mapped_values and 'valor' in lower_col:
-            col_mapper[col] = 'valor'
-            mapped_values.add('valor')
-        elif 'orgao' not in mapped_values and ('órgão' in lower_col or 'orgao' in lower_col):
-            col_mapper[col] = 'orgao'
-            mapped_values.add('orgao')
-        elif 'data' not in mapped_values and 'data' in lower_col:
-            col_mapper[col] = 'data'
-            mapped_values.add('data')
-
-    df = df.rename(columns=col_mapper)
+def process_chunk(df):
+    """Normaliza colunas e parseia valores de um DataFrame bruto (ou de um bloco dele)."""
+    # Mapeamento de colunas compartilhado com os scripts de ingestão
+    df = rename_columns(df, 'portal_xlsx')
 
     if 'nome' in df.columns:
         df['nome'] = df['nome'].astype(str).str.strip()
@@ -140,44 +100,89 @@ def process_dataframe(df):
         df['pago_flag'] = df['status'].astype(str).str.lower().str.contains('pago')
     else:
         df['pago_flag'] = False
-
     return df
 
 
-def load_saved_files():
-    """Carrega todos os arquivos salvos na pasta data/ ao iniciar o servidor."""
-    global global_dfs, current_year
-    for filename in os.listdir(DATA_DIR):
-        filepath = os.path.join(DATA_DIR, filename)
-        if not os.path.isfile(filepath):
-            continue
+def process_dataframe(df):
+    """Processa um DataFrame bruto: normaliza colunas, parseia valores, etc."""
+    # Colunas repetitivas como categóricas (códigos inteiros + vocabulário compartilhado)
+    return compact_frame(process_chunk(df), category_pools)
+
+
+def read_original(filepath):
+    """DataFrame processado a partir do arquivo original (csv/xlsx/xls)."""
+    if filepath.endswith('.csv'):
         try:
-            if filename.endswith('.csv'):
-                try:
-                    df = pd.read_csv(filepath, encoding='utf-8')
-                except UnicodeDecodeError:
-                    df = pd.read_csv(filepath, encoding='latin-1')
-            elif filename.endswith('.xlsx') or filename.endswith('.xls'):
-                df = pd.read_excel(filepath)
-            else:
-                continue
-
-            df = process_dataframe(df)
-            # Extrair ano do nome do arquivo (ex: "2024.csv" -> "2024")
-            ano = os.path.splitext(filename)[0]
-            global_dfs[ano] = df
-            print(f"[Startup] Carregado: {filename} ({len(df)} registros)")
-        except Exception as e:
-            print(f"[Startup] Erro ao carregar {filename}: {e}")
-
-    if global_dfs and current_year is None:
-        current_year = sorted(global_dfs.keys(), reverse=True)[0]
-        print(f"[Startup] Ano ativo: {current_year}")
+            df = pd.read_csv(filepath, encoding='utf-8')
+        except UnicodeDecodeError:
+            df = pd.read_csv(filepath, encoding='latin-1')
+    elif filepath.endswith('.xlsx'):
+        df = read_xlsx(filepath)
+    else:
+        df = pd.read_excel(filepath)
+    return process_dataframe(df)
+
+
+def load_year_file(filepath):
+    """DataFrame processado de um arquivo salvo: o .arrow mapeado em memória se estiver atualizado, senão o original."""
+    ano = os.path.splitext(os.path.basename(filepath))[0]
+    # O manifesto traz o hash do original publicado; vale enquanto tamanho e mtime forem os mesmos
+    digest = shared.year_digest(ano, filepath, PROCESSING_VERSION) or file_hash(filepath)
+    df = load_frame(filepath, PROCESSING_VERSION, digest=digest, zero_copy=ZERO_COPY)
+    if df is None:
+        # Um worker por vez processa o original; os outros esperam e mapeiam o frame gravado
+        with file_lock(frame_path(filepath) + '.lock'):
+            digest = file_hash(filepath)
+            df = load_frame(filepath, PROCESSING_VERSION, digest=digest, zero_copy=ZERO_COPY)
+            if df is None:
+                df = read_original(filepath)
+                if save_frame(df, filepath, PROCESSING_VERSION, digest=digest):
+                    mapped = load_frame(filepath, PROCESSING_VERSION, digest=digest, zero_copy=ZERO_COPY)
+                    df = mapped if mapped is not None else df
+    return compact_frame(df, category_pools)
+
+
+# Anos disponíveis em data/ (ex: "2024.csv" -> "2024"), carregados no primeiro acesso
+year_store = YearStore(DATA_DIR, load_year_file, int(MEMORY_BUDGET_MB * (1 << 20)))
+
+
+def sync_shared_state():
+    """Aplica o manifesto quando outro worker publicou um ano ou trocou o ano ativo."""
+    global current_year
+    manifest = shared.poll()
+    if manifest is None:
+        return
+    for ano, entry in manifest.get('years', {}).items():
+        generation = entry.get('generation')
+        if seen_generations.get(ano) != generation:
+            # Republicado: a próxima requisição mapeia o frame novo
+            year_store.discard(ano)
+        seen_generations[ano] = generation
+    if manifest.get('current'):
+        current_year = manifest['current']
+
+
+def load_saved_files():
+    """Escolhe o ano ativo (o do manifesto ou o mais recente em disco) e já carrega só esse ano."""
+    global current_year
+    sync_shared_state()
+    anos = year_store.available()
+    if anos and current_year is None:
+        current_year = anos[0]
+    if current_year is not None:
+        print(f"[Startup] {len(anos)} ano(s) em disco; ano ativo: {current_year}")
+        year_store.get(current_year)
 
 
 # Carregar dados salvos na inicialização
 load_saved_files()
 
+@app.before_request
+def before_request_sync():
+    # Um os.stat do manifesto por requisição; relido só quando muda
+    sync_shared_state()
+
+
 # CORS manual simplório (não restrito)
 @app.after_request
 def add_cors_headers(response):
@@ -185,10 +190,109 @@ def add_cors_headers(response):
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
     return response
 
+# ── Uploads em segundo plano ─────────────────────────────────────────────────
+
+def _iter_csv_frames(path, encoding):
+    """(bloco, fração do arquivo lida) de um CSV."""
+    size = max(os.path.getsize(path), 1)
+    with open(path, 'rb') as f:
+        for chunk in pd.read_csv(f, encoding=encoding, chunksize=UPLOAD_CHUNK_ROWS):
+            yield chunk, f.tell() / size
+
+
+def _iter_upload_frames(path):
+    """(bloco, fração lida) do arquivo enviado; a fração é None quando não dá para estimar."""
+    if path.endswith('.csv'):
+        try:
+            yield from _iter_csv_frames(path, 'utf-8')
+        except UnicodeDecodeError:
+            # Recomeça do zero; o chamador descarta os blocos já lidos
+            yield None, 0.0
+            yield from _iter_csv_frames(path, 'latin-1')
+    elif path.endswith('.xlsx'):
+        total = xlsx_row_count(path)
+        lidas = 0
+        for chunk in iter_xlsx_frames(path, chunk_rows=UPLOAD_CHUNK_ROWS):
+            lidas += len(chunk)
+            yield chunk, (lidas / total if total else None)
+    else:
+        # .xls (formato antigo) não tem leitura em blocos
+        yield pd.read_excel(path), 1.0
+
+
+def read_upload(job):
+    """DataFrame processado do upload, lido e normalizado bloco a bloco (progresso 0 → 0.8)."""
+    frames = []
+    for chunk, fraction in _iter_upload_frames(job.path):
+        if chunk is None:
+            frames = []
+            continue
+        frames.append(process_chunk(chunk))
+        job.update(rows=sum(len(f) for f in frames),
+                   progress=0.8 * min(fraction, 1.0) if fraction is not None else job.progress)
+    if not frames:
+        return process_dataframe(pd.DataFrame())
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return compact_frame(df, category_pools)
+
+
+def detect_ano(df, filename):
+    """Ano pela coluna ANO (valor mais frequente) ou pelo nome do arquivo."""
+    if 'ANO' in [c.upper() for c in df.columns]:
+        ano_col = [c for c in df.columns if c.upper() == 'ANO'][0]
+        return str(int(df[ano_col].mode().iloc[0]))
+    return os.path.splitext(filename)[0]
+
+
+def process_upload(job):
+    """Processa um upload já salvo em UPLOAD_DIR e publica o ano quando ele estiver pronto."""
+    global current_year
+    try:
+        df = read_upload(job)
+        ano = job.ano or detect_ano(df, job.filename)
+        job.update(stage='salvando', progress=0.9, ano=ano)
+        digest = file_hash(job.path)
+
+        # Arquivo original em data/ para persistência, e o DataFrame processado ao lado.
+        # Um upload do ano por vez (também entre workers, e com quem re-processa o original):
+        # frame, original, memória e manifesto publicados juntos
+        save_path = os.path.join(DATA_DIR, f"{ano}{os.path.splitext(job.filename)[1]}")
+        with file_lock(frame_path(save_path) + '.lock'):
+            saved = save_frame(df, save_path, PROCESSING_VERSION, digest=digest)
+            # O original só entra em data/ (vira um ano visível) depois do processamento ter dado certo
+            os.replace(job.path, save_path)
+            if saved:
+                # Serve o frame mapeado, o mesmo que os outros workers vão usar
+                mapped = load_frame(save_path, PROCESSING_VERSION, digest=digest, zero_copy=ZERO_COPY)
+                if mapped is not None:
+                    df = compact_frame(mapped, category_pools)
+
+            # Troca atômica: quem já pegou o ano antigo termina com ele, as próximas requisições veem o novo
+            year_store.put(ano, df)
+            current_year = ano
+            # E avisa os outros workers
+            manifest = shared.publish_year(ano, save_path, digest, PROCESSING_VERSION)
+            seen_generations[ano] = manifest['years'][ano]['generation']
+    finally:
+        if os.path.exists(job.path):
+            os.remove(job.path)
+
+    print(f"[Upload] {job.filename}: ano {ano} publicado ({len(df)} registros)")
+    return {
+        "success": True,
+        "message": f"Arquivo processado e salvo para o ano {ano}",
+        "count": len(df),
+        "ano": ano,
+        "anos_disponiveis": year_store.available(),
+    }
+
+
+# Status em arquivo: o polling pode cair em qualquer worker
+upload_jobs = UploadJobs(process_upload, workers=UPLOAD_WORKERS, status_dir=UPLOAD_DIR)
+
+
 @app.route('/api/upload', methods=['POST'])
 def upload_csv():
-    global global_dfs, current_year
-
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
 
@@ -200,133 +304,125 @@ def upload_csv():
     ano = request.form.get('ano', '').strip()
 
     if file and (file.filename.endswith('.csv') or file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
-        file_stream = file.read()
+        # Copia o upload para o disco em blocos, sem montar o arquivo inteiro em memória
+        upload_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}{os.path.splitext(file.filename)[1]}")
+        file.save(upload_path, buffer_size=UPLOAD_BUFFER_BYTES)
+
+        job = upload_jobs.submit(file.filename, upload_path, ano)
+        return jsonify({
+            "success": True,
+            "message": "Arquivo recebido; processando em segundo plano",
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/upload/{job.id}",
+        }), 202
 
-        try:
-            # Lendo CSV ou Excel com pandas
-            if file.filename.endswith('.csv'):
-                try:
-                    df = pd.read_csv(io.BytesIO(file_stream), encoding='utf-8')
-                except UnicodeDecodeError:
-                    df = pd.read_csv(io.BytesIO(file_stream), encoding='latin-1')
-            else:
-                df = pd.read_excel(io.BytesIO(file_stream))
-
-            df = process_dataframe(df)
-
-            # Detectar ano se não informado
-            if not ano:
-                if 'ANO' in [c.upper() for c in df.columns]:
-                    ano_col = [c for c in df.columns if c.upper() == 'ANO'][0]
-                    ano = str(int(df[ano_col].mode().iloc[0]))
-                else:
-                    ano = os.path.splitext(file.filename)[0]
-
-            # Salvar arquivo original em disco para persistência
-            ext = os.path.splitext(file.filename)[1]
-            save_path = os.path.join(DATA_DIR, f"{ano}{ext}")
-            with open(save_path, 'wb') as f:
-                f.write(file_stream)
-
-            global_dfs[ano] = df
-            current_year = ano
+    return jsonify({"error": "Apenas arquivos .csv, .xls ou .xlsx são válidos"}), 400
 
-            return jsonify({
-                "success": True,
-                "message": f"Arquivo processado e salvo para o ano {ano}",
-                "count": len(df),
-                "ano": ano,
-                "anos_disponiveis": sorted(global_dfs.keys(), reverse=True)
-            })
-        except Exception as e:
-            return jsonify({"error": f"Erro processando arquivo: {str(e)}"}), 500
 
-    return jsonify({"error": "Apenas arquivos .csv, .xls ou .xlsx são válidos"}), 400
+@app.route('/api/upload/<job_id>')
+def upload_status(job_id):
+    """Andamento de um upload: status (queued/running/done/error), etapa, progresso e linhas lidas."""
+    status = upload_jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Upload não encontrado"}), 404
+    return jsonify(status)
+
 
 @app.route('/api/anos')
 def listar_anos():
     """Retorna a lista de anos disponíveis e o ano atual."""
     return jsonify({
-        "anos": sorted(global_dfs.keys(), reverse=True),
+        "anos": year_store.available(),
         "current": current_year
     })
 
 
+@app.route('/api/metrics')
+def metricas():
+    """Cargas, acertos e descartes dos anos em memória."""
+    metrics = year_store.metrics()
+    metrics['manifest_generation'] = shared.current().get('generation', 0)
+    return jsonify(metrics)
+
+
 @app.route('/api/ano/<ano>', methods=['POST'])
 def selecionar_ano(ano):
     """Seleciona o ano ativo."""
     global current_year
-    if ano not in global_dfs:
+    data = year_store.get(ano)
+    if data is None:
         return jsonify({"error": f"Ano {ano} não encontrado"}), 404
     current_year = ano
-    return jsonify({"success": True, "ano": ano, "count": len(global_dfs[ano])})
+    shared.select_year(ano)
+    return jsonify({"success": True, "ano": ano, "count": len(data.df)})
 
 
 @app.route('/api/parlamentar/<path:query>')
 def get_parlamentar_data(query):
     global current_year
 
-    if not global_dfs or current_year is None:
+    if current_year is None:
         return jsonify({"error": "Nenhum arquivo carregado no servidor ainda"}), 400
 
-    # Pegar ano do query param ou usar o atual
+    # Pegar ano do query param ou usar o atual (carregado sob demanda)
     ano = request.args.get('ano', current_year)
-    if ano not in global_dfs:
+    data = year_store.get(ano)
+    if data is None:
         return jsonify({"error": f"Dados do ano {ano} não disponíveis"}), 400
 
-    global_df = global_dfs[ano]
-    query_lower = query.lower().strip()
+    global_df = data.df
 
-    if 'nome' not in global_df.columns:
+    if data.index is None:
          return jsonify({"error": "Coluna de parlamentar não detectada no CSV"}), 400
 
-    # Filtro Pandas para strings (regex=False para busca literal segura)
-    mask = global_df['nome'].astype(str).str.strip().str.lower().str.contains(query_lower, na=False, regex=False)
-    filtered_df = global_df[mask]
-
-    if len(filtered_df) == 0:
+    # Busca pelo índice do ano (substring do nome normalizado); respostas repetidas vêm do cache
+    payload = data.index.lookup(query, lambda match: build_parlamentar_payload(global_df, match))
+    if payload is None:
         return jsonify({"error": "Nenhum parlamentar encontrado"}), 404
-        
+    return jsonify(payload)
+
+
+def build_parlamentar_payload(global_df, match):
+    """Monta a resposta de /api/parlamentar a partir das linhas e agregados do índice."""
+    filtered_df = global_df.take(match.positions)
+
     # Informações Básicas
     first_record = filtered_df.iloc[0]
     nome_real = safe_val(first_record['nome'], 'N/A') if 'nome' in filtered_df.columns else "N/A"
     partido_real = safe_val(first_record['partido'], '-') if 'partido' in filtered_df.columns else "-"
-    
-    # Cálculos PANDAS (Rápidos e Eficientes)
-    total_val = float(filtered_df['valor_num'].sum()) if 'valor_num' in filtered_df.columns else 0.0
-    total_pagos = float(filtered_df[filtered_df['pago_flag']]['valor_num'].sum()) if 'pago_flag' in filtered_df.columns and 'valor_num' in filtered_df.columns else 0.0
-    
+
+    # Totais pré-calculados por parlamentar
+    total_val = match.total
+    total_pagos = match.total_pago
+
     pct_pago = (total_pagos / total_val * 100) if total_val > 0 else 0
-    
-    # Agrupamentos (Top Ranking por Valor Numérico)
+
+    # Agrupamentos (Top Ranking por Valor Numérico), já ordenados pelo índice
     # Munícipios
     top_mun = {}
-    if 'municipio' in filtered_df.columns and 'valor_num' in filtered_df.columns:
-        mun_grp = filtered_df.groupby('municipio')['valor_num'].sum().reset_index()
-        mun_sorted = mun_grp.sort_values(by='valor_num', ascending=False)
-        for _, row in mun_sorted.iterrows():
-            top_mun[str(safe_val(row['municipio'], 'N/A'))] = float(safe_val(row['valor_num'], 0))
+    if match.municipios is not None:
+        for municipio, valor in match.municipios.items():
+            top_mun[str(safe_val(municipio, 'N/A'))] = float(safe_val(valor, 0))
 
     # Setor Prioritário (Função)
     top_func = {}
     setor_prioritario_nome = "-"
     setor_prioritario_val = 0.0
 
-    if 'funcao' in filtered_df.columns and 'valor_num' in filtered_df.columns:
-        func_grp = filtered_df.groupby('funcao')['valor_num'].sum().reset_index()
-        func_sorted = func_grp.sort_values(by='valor_num', ascending=False)
-
-        if len(func_sorted) > 0:
-            setor_prioritario_nome = safe_val(func_sorted.iloc[0]['funcao'], '-')
-            setor_prioritario_val = float(safe_val(func_sorted.iloc[0]['valor_num'], 0))
+    if match.funcoes is not None:
+        if match.funcoes:
+            funcao, valor = next(iter(match.funcoes.items()))
+            setor_prioritario_nome = safe_val(funcao, '-')
+            setor_prioritario_val = float(safe_val(valor, 0))
 
-        for _, row in func_sorted.iterrows():
-            top_func[str(safe_val(row['funcao'], 'N/A'))] = float(safe_val(row['valor_num'], 0))
+        for funcao, valor in match.funcoes.items():
+            top_func[str(safe_val(funcao, 'N/A'))] = float(safe_val(valor, 0))
 
-    # Tabela Histórico Sortida
+    # Tabela Histórico Sortida (só as linhas encontradas)
     historico = []
-    hist_sorted = filtered_df.sort_values(by='valor_num', ascending=False)
-    for _, row in hist_sorted.iterrows():
+    hist_sorted = filtered_df.sort_values(by='valor_num', ascending=False, kind='stable')
+    for row in hist_sorted.to_dict('records'):
         historico.append({
             "data": str(safe_val(row.get('data', '-'))),
             "codigo": str(safe_val(row.get('codigo', ''), '')),
@@ -337,8 +433,8 @@ def get_parlamentar_data(query):
             "is_pago": bool(row.get('pago_flag', False)),
             "valor_raw": float(safe_val(row.get('valor_num', 0), 0))
         })
-    
-    return jsonify({
+
+    return {
         "success": True,
         "parlamentar": {
             "nome": nome_real,
@@ -356,7 +452,7 @@ def get_parlamentar_data(query):
         "top_municipios": top_mun,
         "todas_funcoes": top_func,
         "historico": historico
-    })
+    }
 
 
 @app.route('/')
@@ -0,0 +1,89 @@
+"""
+DataFrames processados do portal guardados em formato colunar.
+
+Each uploaded year is also written as an uncompressed Feather v2 (Arrow IPC)
+file next to its original (``2024.xlsx`` → ``2024.arrow``), so startup memory-maps
+it instead of re-reading and re-processing the CSV/XLSX. The file's schema
+metadata records the processing version and the SHA-256 of the original; a
+frame whose version or source hash doesn't match is ignored and the original
+is parsed again (and the frame rewritten).
+
+With ``zero_copy=True`` the DataFrame keeps pointing into the memory map
+wherever pyarrow allows it (numeric columns, categorical codes and, as
+Arrow-backed ``pd.ArrowDtype`` arrays, string columns), so worker processes
+mapping the same file share those pages instead of each holding a copy.
+
+pyarrow is optional: without it every year is parsed from its original, as
+before.
+"""
+import os
+import uuid
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow é opcional; sem ele os originais são sempre re-processados
+    pa = feather = None
+
+from scripts.parse_cache import file_hash
+
+FRAME_EXT = '.arrow'
+
+
+def frame_path(source_path: str) -> str:
+    return os.path.splitext(source_path)[0] + FRAME_EXT
+
+
+def save_frame(df, source_path: str, version: int, digest: str = None) -> bool:
+    """Write ``df`` next to ``source_path``. Returns False when it can't be stored."""
+    if feather is None:
+        return False
+    path = frame_path(source_path)
+    # Nome único: dois uploads do mesmo ano no mesmo processo não dividem o temporário
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata.update({
+            b'portal_version': str(version).encode(),
+            b'source_sha256': (digest or file_hash(source_path)).encode(),
+        })
+        feather.write_feather(table.replace_schema_metadata(metadata), tmp, compression='uncompressed')
+    except Exception as e:
+        # e.g. colunas object com tipos misturados
+        print(f"[frames] Não foi possível guardar '{os.path.basename(source_path)}' em Arrow: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    os.replace(tmp, path)
+    return True
+
+
+def _arrow_strings(arrow_type):
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def load_frame(source_path: str, version: int, digest: str = None, zero_copy: bool = False):
+    """Memory-map the frame of ``source_path``; None if missing, stale or unreadable."""
+    path = frame_path(source_path)
+    if feather is None or not os.path.exists(path):
+        return None
+    try:
+        table = feather.read_table(path, memory_map=True)
+        metadata = table.schema.metadata or {}
+        if metadata.get(b'portal_version') != str(version).encode():
+            return None
+        if metadata.get(b'source_sha256') != (digest or file_hash(source_path)).encode():
+            return None
+        # integer_object_nulls: colunas object com inteiros e None voltam iguais
+        if zero_copy:
+            # split_blocks evita consolidar colunas (o que copiaria tudo para fora do mapa)
+            return table.to_pandas(integer_object_nulls=True, split_blocks=True, types_mapper=_arrow_strings)
+        return table.to_pandas(integer_object_nulls=True)
+    except Exception as e:
+        print(f"[frames] Ignorando frame corrompido {path}: {e}")
+        return None
@@ -0,0 +1,143 @@
+"""
+Índice de busca por ano do portal dinâmico.
+
+Built once per year (on upload and at startup) from the processed DataFrame:
+
+- every distinct ``nome`` is normalized once (strip + lower) and mapped to the
+  positions of its rows;
+- a trigram index over the distinct names narrows substring queries to the
+  names that contain every trigram of the query, which are then confirmed
+  with a plain ``in``;
+- totals and per-município / per-função sums are precomputed per name, so a
+  query only combines the aggregates of the names it matched and touches the
+  matching rows just to build the histórico.
+
+Responses are kept in a small LRU keyed by the normalized query, so repeated
+lookups of the same parlamentar don't recompute anything. A new upload builds a
+new index, which drops the old responses with it.
+"""
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_query(text) -> str:
+    return str(text).strip().lower()
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _sums_by_name(codes: np.ndarray, keys: pd.Series, valores: pd.Series, n_names: int) -> list:
+    """[{key: sum of valores}] per name code; NaN keys are skipped like groupby does."""
+    sums = [dict() for _ in range(n_names)]
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        # Categóricas (frame_dtypes): agrupa pelos códigos inteiros; -1 é NaN
+        categories = keys.cat.categories
+        key_codes = keys.cat.codes.to_numpy()
+        grouped = valores.groupby([codes, key_codes], sort=False).sum()
+        for (code, key), total in grouped.items():
+            if key >= 0:
+                sums[code][categories[key]] = float(total)
+        return sums
+    grouped = valores.groupby([codes, keys.to_numpy()], sort=False).sum()
+    for (code, key), total in grouped.items():
+        sums[code][key] = float(total)
+    return sums
+
+
+class Match:
+    """Rows and aggregates of the names a query matched."""
+
+    def __init__(self, positions, total, total_pago, municipios, funcoes):
+        self.positions = positions    # row positions, in the DataFrame's order
+        self.total = total
+        self.total_pago = total_pago
+        self.municipios = municipios  # {municipio: valor}, highest first
+        self.funcoes = funcoes        # {funcao: valor}, highest first
+
+
+class YearIndex:
+    def __init__(self, df: pd.DataFrame, cache_size: int = 256):
+        self.cache_size = cache_size
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+
+        normalized = df['nome'].astype(str).map(normalize_query)
+        codes, names = pd.factorize(normalized, sort=False)
+        self.names = list(names)
+        # Row positions per name, kept in the DataFrame's order
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(self.names) + 1))
+        self.positions = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.names))]
+
+        self.trigrams = defaultdict(set)
+        for code, name in enumerate(self.names):
+            for gram in _trigrams(name):
+                self.trigrams[gram].add(code)
+
+        n = len(self.names)
+        if 'valor_num' in df.columns:
+            valores = df['valor_num'].astype(float).fillna(0.0)
+            self.totals = np.bincount(codes, weights=valores.to_numpy(), minlength=n)
+            pago = valores.where(df['pago_flag'].astype(bool), 0.0) if 'pago_flag' in df.columns \
+                else valores * 0.0
+            self.totals_pago = np.bincount(codes, weights=pago.to_numpy(), minlength=n)
+            self.municipios = _sums_by_name(codes, df['municipio'], valores, n) \
+                if 'municipio' in df.columns else None
+            self.funcoes = _sums_by_name(codes, df['funcao'], valores, n) if 'funcao' in df.columns else None
+        else:
+            self.totals = self.totals_pago = np.zeros(n)
+            self.municipios = self.funcoes = None
+
+    def match_names(self, query: str) -> list:
+        """Codes of the names containing ``query`` (already normalized)."""
+        grams = _trigrams(query)
+        if grams:
+            postings = sorted((self.trigrams.get(g, ()) for g in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            # Queries shorter than 3 characters: the distinct names are few
+            candidates = range(len(self.names))
+        return sorted(code for code in candidates if query in self.names[code])
+
+    def search(self, query: str):
+        """Match for ``query`` (substring of the normalized nome), or None."""
+        codes = self.match_names(normalize_query(query))
+        if not codes:
+            return None
+        if len(codes) == 1:
+            positions = self.positions[codes[0]]
+        else:
+            positions = np.sort(np.concatenate([self.positions[c] for c in codes]))
+
+        def combine(per_name):
+            if per_name is None:
+                return None
+            combined = {}
+            for code in codes:
+                for key, total in per_name[code].items():
+                    combined[key] = combined.get(key, 0.0) + total
+            # Highest first; ties in key order, like groupby + sort_values
+            return dict(sorted(combined.items(), key=lambda item: (-item[1], str(item[0]))))
+
+        return Match(positions, float(self.totals[codes].sum()), float(self.totals_pago[codes].sum()),
+                     combine(self.municipios), combine(self.funcoes))
+
+    def lookup(self, query: str, build):
+        """``build(match)`` for ``query``, memoized per normalized query (None if nothing matched)."""
+        key = normalize_query(query)
+        with self._lock:
+            if key in self._responses:
+                self._responses.move_to_end(key)
+                return self._responses[key]
+        match = self.search(key)
+        response = build(match) if match is not None else None
+        with self._lock:
+            self._responses[key] = response
+            while len(self._responses) > self.cache_size:
+                self._responses.popitem(last=False)
+        return response
@@ -0,0 +1,148 @@
+"""
+Estado do portal compartilhado entre os workers (gunicorn -w N).
+
+Each year is published as files in the data directory (the original plus its
+``.arrow`` frame, which workers memory-map), and ``manifest.json`` records what
+is published::
+
+    {"generation": 12, "current": "2025",
+     "years": {"2025": {"source": "2025.xlsx", "sha256": "...", "version": 2,
+                        "size": 183204, "mtime_ns": 1739..., "generation": 12}}}
+
+``size``/``mtime_ns`` are the original's stat when it was published: while they
+still match, workers trust ``sha256`` instead of hashing the file again
+(``year_digest``); an original replaced on disk outside an upload fails the
+check and is re-hashed, so its stale frame isn't served.
+
+Publishing (an upload, a year selection) is a read-modify-write of the
+manifest under an exclusive lock, replaced atomically; every write bumps
+``generation``. Workers call ``SharedManifest.poll()`` before each request: an
+``os.stat`` of the manifest, and a re-read only when it changed, so uploads and
+year switches reach every worker on its next request. Years whose generation
+changed are dropped from the worker's memory and re-mapped from the new frame.
+
+``file_lock`` also serializes the first parse of a year that has no frame
+yet, so it happens once per machine instead of once per worker.
+
+The locks use fcntl; where it doesn't exist (Windows, single-process dev
+server) they are no-ops.
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # fcntl só existe em Unix; no Windows o portal roda com um processo só
+    fcntl = None
+
+MANIFEST_NAME = 'manifest.json'
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock held on ``path`` (created if needed) across processes."""
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SharedManifest:
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, MANIFEST_NAME)
+        self.lock_path = self.path + '.lock'
+        self._signature = None
+        self._manifest = {}
+        self._lock = threading.Lock()
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _read_file(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            print(f"[Manifest] Ignorando {self.path} inválido: {e}")
+            return {}
+
+    def poll(self):
+        """The manifest if it changed since the last poll, else None."""
+        signature = self._stat_signature()
+        with self._lock:
+            if signature == self._signature:
+                return None
+            # Relê só quando o arquivo mudou (o replace atômico troca o inode)
+            self._signature = signature
+            self._manifest = self._read_file()
+            return self._manifest
+
+    def current(self) -> dict:
+        self.poll()
+        with self._lock:
+            return self._manifest
+
+    def update(self, change) -> dict:
+        """Apply ``change(manifest)`` under the lock, bump the generation and publish it."""
+        with file_lock(self.lock_path):
+            manifest = self._read_file()
+            manifest.setdefault('years', {})
+            manifest['generation'] = manifest.get('generation', 0) + 1
+            change(manifest)
+            manifest['updated_at'] = time.time()
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+        return manifest
+
+    def publish_year(self, ano: str, source_path: str, digest: str, version: int, current: bool = True) -> dict:
+        """Record the files of ``ano`` (already written) and optionally make it the current year."""
+        entry = {'source': os.path.basename(source_path), 'sha256': digest, 'version': version}
+        try:
+            st = os.stat(source_path)
+            entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+
+        def change(manifest):
+            manifest['years'][ano] = dict(entry, generation=manifest['generation'])
+            if current:
+                manifest['current'] = ano
+        return self.update(change)
+
+    def select_year(self, ano: str) -> dict:
+        def change(manifest):
+            manifest['current'] = ano
+        return self.update(change)
+
+    def year(self, ano: str):
+        """Manifest entry of ``ano`` (source, sha256, version, generation) or None."""
+        return self.current().get('years', {}).get(ano)
+
+    def year_digest(self, ano: str, source_path: str, version: int):
+        """Published sha256 of ``source_path`` if it is still the file that was published, else None."""
+        entry = self.year(ano)
+        if not entry or entry.get('source') != os.path.basename(source_path) or entry.get('version') != version:
+            return None
+        try:
+            st = os.stat(source_path)
+        except FileNotFoundError:
+            return None
+        if entry.get('size') != st.st_size or entry.get('mtime_ns') != st.st_mtime_ns:
+            return None
+        return entry.get('sha256')
@@ -0,0 +1,138 @@
+"""
+Uploads do portal processados em segundo plano.
+
+``/api/upload`` only streams the file to disk and queues a job; a small thread
+pool runs ``process(job)``, which reads the file in chunks and reports its
+progress through ``job.update(...)``. Clients poll ``/api/upload/<job_id>``
+(``UploadJob.to_dict``) until the status is ``done`` or ``error``.
+
+Threads rather than processes: the result is a DataFrame that has to end up
+in this process' year store, and the parsing spends most of its time in
+openpyxl/pandas code that is I/O bound or releases the GIL.
+
+Finished jobs are kept (newest ``keep``) so late polls still get their result.
+With a ``status_dir`` every update is also written to ``<job_id>.json`` there,
+so under several worker processes the poll can land on any of them.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED, RUNNING, DONE, ERROR = 'queued', 'running', 'done', 'error'
+JOB_ID = re.compile(r'[0-9a-f]{32}')
+
+
+class UploadJob:
+    def __init__(self, filename: str, path: str, ano: str = '', status_dir: str = None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.path = path            # upload already on disk
+        self.ano = ano              # informed by the client, may be empty
+        self.status = QUEUED
+        self.stage = 'na fila'
+        self.progress = 0.0
+        self.rows = 0
+        self.error = None
+        self.result = None
+        self.created = time.time()
+        self.started = self.finished = None
+        self.status_path = os.path.join(status_dir, f"{self.id}.json") if status_dir else None
+        self._lock = threading.Lock()
+
+    def update(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            if self.status_path:
+                self._write_status()
+
+    def _write_status(self):
+        tmp = f"{self.status_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._snapshot(), f, ensure_ascii=False)
+        os.replace(tmp, self.status_path)
+
+    def _snapshot(self) -> dict:
+        data = {
+            'job_id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': round(self.progress, 3),
+            'rows': self.rows,
+        }
+        if self.started:
+            data['elapsed'] = round((self.finished or time.time()) - self.started, 2)
+        if self.error:
+            data['error'] = self.error
+        if self.result:
+            data.update(self.result)
+        return data
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return self._snapshot()
+
+
+class UploadJobs:
+    def __init__(self, process, workers: int = 2, keep: int = 100, status_dir: str = None):
+        """``process(job)`` does the work and returns the dict merged into the final status."""
+        self.process = process
+        self.keep = keep
+        self.status_dir = status_dir
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload')
+
+    def submit(self, filename: str, path: str, ano: str = '') -> UploadJob:
+        job = UploadJob(filename, path, ano, status_dir=self.status_dir)
+        job.update()  # grava o status inicial
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str):
+        """Status dict of ``job_id``, from this process or from the status file of another one."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if not self.status_dir or not JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(os.path.join(self.status_dir, f"{job_id}.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _run(self, job: UploadJob):
+        job.update(status=RUNNING, stage='lendo', started=time.time())
+        try:
+            result = self.process(job)
+        except Exception as e:
+            print(f"[Upload] Erro processando {job.filename}: {e}")
+            job.update(status=ERROR, stage='erro', error=f"Erro processando arquivo: {e}",
+                       finished=time.time())
+            return
+        job.update(status=DONE, stage='concluído', progress=1.0, result=result, finished=time.time())
+
+    def _prune(self):
+        # Descarta os jobs terminados mais antigos; os em andamento ficam sempre
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in (DONE, ERROR)]
+        for job_id in finished[:max(len(self._jobs) - self.keep, 0)]:
+            job = self._jobs.pop(job_id)
+            if job.status_path and os.path.exists(job.status_path):
+                os.remove(job.status_path)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
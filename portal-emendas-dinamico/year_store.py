@@ -0,0 +1,137 @@
+"""
+Anos do portal carregados sob demanda, com orçamento de memória.
+
+Every original in the data directory (``2024.xlsx``, ``2023.csv``...) is a year
+that can be served, but its DataFrame is only loaded (and its search index
+built) on first access. Loaded years are kept in LRU order together with their
+approximate footprint (``frame_dtypes.frame_nbytes``: deep memory usage, with
+categorical columns counted by their codes since their vocabulary is shared
+across years); once the total
+goes over the budget, the least recently used years are evicted, always
+keeping the one just used. ``stats`` counts loads, hits, evictions and load
+errors.
+"""
+import os
+import threading
+from collections import Counter, OrderedDict
+
+from frame_dtypes import frame_nbytes
+from search_index import YearIndex
+
+SOURCE_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+
+class YearData:
+    """DataFrame of a year, its search index and approximate size in bytes."""
+
+    def __init__(self, df):
+        self.df = df
+        self.index = YearIndex(df) if 'nome' in df.columns else None
+        self.nbytes = frame_nbytes(df)
+
+
+class YearStore:
+    def __init__(self, data_dir: str, loader, budget_bytes: int):
+        """``loader(path)`` returns the processed DataFrame of an original file."""
+        self.data_dir = data_dir
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+        self.stats = Counter()
+        self._years = OrderedDict()  # ano -> YearData, least recently used first
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def sources(self) -> dict:
+        """{ano: path of its original}; the newest file wins when a year has several."""
+        found = {}
+        for filename in os.listdir(self.data_dir):
+            ano, ext = os.path.splitext(filename)
+            path = os.path.join(self.data_dir, filename)
+            if ext not in SOURCE_EXTENSIONS or not os.path.isfile(path):
+                continue
+            if ano not in found or os.path.getmtime(path) > os.path.getmtime(found[ano]):
+                found[ano] = path
+        return found
+
+    def available(self) -> list:
+        """Every year on disk or in memory, newest first."""
+        with self._lock:
+            loaded = set(self._years)
+        return sorted(set(self.sources()) | loaded, reverse=True)
+
+    def __contains__(self, ano) -> bool:
+        with self._lock:
+            if ano in self._years:
+                return True
+        return ano in self.sources()
+
+    def get(self, ano):
+        """YearData of ``ano``, loading it if needed; None if it doesn't exist or fails to load."""
+        with self._lock:
+            data = self._years.get(ano)
+            if data is not None:
+                self._years.move_to_end(ano)
+                self.stats['hits'] += 1
+                return data
+        # Unknown years (any ?ano= value) stop here, before getting a load lock
+        path = self.sources().get(ano)
+        if path is None:
+            return None
+        with self._lock:
+            load_lock = self._load_locks.setdefault(ano, threading.Lock())
+        # One load per year at a time; concurrent requests wait for it
+        with load_lock:
+            with self._lock:
+                data = self._years.get(ano)
+                if data is not None:
+                    self._years.move_to_end(ano)
+                    self.stats['hits'] += 1
+                    return data
+            try:
+                data = YearData(self.loader(path))
+            except Exception as e:
+                print(f"[Anos] Erro ao carregar {os.path.basename(path)}: {e}")
+                self.stats['load_errors'] += 1
+                return None
+            self.stats['loads'] += 1
+            self._install(ano, data)
+            print(f"[Anos] Carregado: {os.path.basename(path)} ({len(data.df)} registros, "
+                  f"{data.nbytes / (1 << 20):.1f} MiB)")
+            return data
+
+    def put(self, ano, df) -> YearData:
+        """Publish a freshly processed year (e.g. an upload), replacing any loaded version."""
+        data = YearData(df)
+        self._install(ano, data)
+        return data
+
+    def discard(self, ano) -> bool:
+        """Drop ``ano`` from memory (e.g. republished by another worker); the next get reloads it."""
+        with self._lock:
+            return self._years.pop(ano, None) is not None
+
+    def _install(self, ano, data: YearData):
+        with self._lock:
+            self._years[ano] = data
+            self._years.move_to_end(ano)
+            total = sum(d.nbytes for d in self._years.values())
+            while total > self.budget_bytes and len(self._years) > 1:
+                evicted, old = self._years.popitem(last=False)
+                total -= old.nbytes
+                self.stats['evictions'] += 1
+                print(f"[Anos] Descarregado {evicted} ({old.nbytes / (1 << 20):.1f} MiB) "
+                      f"para caber em {self.budget_bytes / (1 << 20):.0f} MiB")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            resident = {ano: d.nbytes for ano, d in self._years.items()}
+            stats = dict(self.stats)
+        return {
+            'loads': stats.get('loads', 0),
+            'hits': stats.get('hits', 0),
+            'evictions': stats.get('evictions', 0),
+            'load_errors': stats.get('load_errors', 0),
+            'resident_years': list(resident),
+            'resident_bytes': sum(resident.values()),
+            'budget_bytes': self.budget_bytes,
+        }
@@ -0,0 +1,176 @@
+"""
+Benchmark the ingest parsing and normalization stages on synthetic sources.
+
+Each case runs on data from scripts/synthetic_data.py and reports the best
+time over ``--repeat`` runs, throughput and peak traced memory (tracemalloc,
+measured in a separate run so tracing doesn't skew the timings). Results are
+compared with a stored baseline; cases slower than ``--tolerance`` are flagged.
+The baseline is machine-specific: regenerate it with --save-baseline when the
+hardware changes.
+
+Usage:
+    python scripts/bench_ingest.py
+    python scripts/bench_ingest.py --rows 50000 --pdf-rows 2000 --only xlsx_read build_rows
+    python scripts/bench_ingest.py --save-baseline
+    python scripts/bench_ingest.py --check   # exit 1 on regressions
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from scripts import synthetic_data
+from scripts.db_utils import parse_moeda, parse_moeda_series
+from scripts.xlsx_stream import read_xlsx
+from scripts import ingest_deputados, ingest_vereadores
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_ingest_baseline.json')
+
+
+def build_cases(workdir: str, rows: int, pdf_rows: int) -> list:
+    """(name, n_rows, fn) for every benchmarked stage; inputs are generated up front."""
+    xlsx_path = synthetic_data.make_portal_xlsx(os.path.join(workdir, '2024.xlsx'), rows)
+    pdf_path = synthetic_data.make_alesp_pdf(os.path.join(workdir, '2021.pdf'), pdf_rows)
+    payloads = {endpoint: synthetic_data.make_pmsp_xml(endpoint, rows)
+                for endpoint in synthetic_data.PMSP_ENDPOINTS}
+    emendas_xml = payloads['EmendasVereadores']
+    xml_chunks = [emendas_xml[i:i + 64 * 1024] for i in range(0, len(emendas_xml), 64 * 1024)]
+
+    raw_df = read_xlsx(xlsx_path)
+    processed = ingest_deputados.process_dataframe(raw_df.copy())
+    valores_text = [row[5] for row in synthetic_data.alesp_rows(rows)]
+    valores_series = pd.Series(valores_text, dtype=object)
+    raw = ingest_vereadores._parse_xml_rows(emendas_xml)
+    emendas_rows = ingest_vereadores._parse_xml_rows(payloads['Emendas'])
+    vereadores = ingest_vereadores.vereadores_map(ingest_vereadores._parse_xml_rows(payloads['Vereadores']))
+    valores = ingest_vereadores.valores_map(emendas_rows)
+
+    return [
+        ('xlsx_read', rows, lambda: read_xlsx(xlsx_path)),
+        ('process_dataframe', rows, lambda: ingest_deputados.process_dataframe(raw_df.copy())),
+        ('parse_moeda', rows, lambda: [parse_moeda(v) for v in valores_text]),
+        ('parse_moeda_series', rows, lambda: parse_moeda_series(valores_series)),
+        ('build_rows', rows, lambda: ingest_deputados.build_rows(processed, 2024)),
+        ('extract_pdf_dataframe', pdf_rows,
+         lambda: ingest_deputados.extract_pdf_dataframe(pdf_path, workers=1)),
+        ('xml_parse', rows, lambda: ingest_vereadores._parse_xml_rows(emendas_xml)),
+        ('xml_stream', rows, lambda: sum(1 for _ in ingest_vereadores.iter_xml_rows(xml_chunks))),
+        ('valores_map', len(emendas_rows), lambda: ingest_vereadores.valores_map(emendas_rows)),
+        ('vereador_build_rows', rows,
+         lambda: ingest_vereadores.build_rows([dict(item) for item in raw], 2024, vereadores, valores)),
+    ]
+
+
+def _best_time(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_traced(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / (1 << 20)
+    finally:
+        tracemalloc.stop()
+
+
+def run(rows: int, pdf_rows: int, repeat: int, only: list = None) -> dict:
+    """Time every case and return {case: {rows, seconds, rows_per_s, peak_mib}}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"Generating synthetic sources ({rows} rows, {pdf_rows} PDF rows)...")
+        for name, n, fn in build_cases(workdir, rows, pdf_rows):
+            if only and name not in only:
+                continue
+            # The PDF extractor prints its progress; keep the table readable
+            with open(os.devnull, 'w') as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    seconds = _best_time(fn, repeat)
+                    peak = _peak_traced(fn)
+                finally:
+                    sys.stdout = stdout
+            results[name] = {'rows': n, 'seconds': round(seconds, 5),
+                             'rows_per_s': round(n / seconds) if seconds > 0 else None,
+                             'peak_mib': round(peak, 2)}
+    return results
+
+
+def load_baseline(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(path: str, results: dict):
+    baseline = {'machine': platform.platform(), 'python': platform.python_version(),
+                'saved_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'cases': results}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Print the results next to the baseline and return the names of regressed cases."""
+    cases = baseline.get('cases', {})
+    regressions = []
+    print(f"{'case':<22} {'rows':>7} {'ms':>10} {'rows/s':>11} {'peak MiB':>9} {'baseline ms':>12} {'change':>8}")
+    for name, r in results.items():
+        base = cases.get(name)
+        # Only comparable when measured on the same number of rows
+        if base and base['rows'] == r['rows'] and base['seconds'] > 0:
+            change = r['seconds'] / base['seconds'] - 1
+            flag = '  SLOWER' if change > tolerance else ''
+            if flag:
+                regressions.append(name)
+            versus = f"{base['seconds'] * 1000:>12.1f} {change:>+8.0%}{flag}"
+        else:
+            versus = f"{'-':>12} {'-':>8}"
+        print(f"{name:<22} {r['rows']:>7} {r['seconds'] * 1000:>10.1f} {r['rows_per_s'] or 0:>11,} "
+              f"{r['peak_mib']:>9.1f} {versus}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark ingest parsing and normalization stages')
+    parser.add_argument('--rows', type=int, default=20000, help='Rows of the XLSX/XML sources')
+    parser.add_argument('--pdf-rows', type=int, default=1000, help='Rows of the PDF source')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions (best time is kept)')
+    parser.add_argument('--only', nargs='+', default=None, help='Run only these cases')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Slowdown over the baseline reported as a regression (0.25 = 25%%)')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 when a case regressed')
+    parser.add_argument('--json', default=None, help='Also write the results to this file')
+    args = parser.parse_args()
+
+    results = run(args.rows, args.pdf_rows, args.repeat, only=args.only)
+    regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}: "
+              + ', '.join(regressions))
+        if args.check:
+            sys.exit(1)
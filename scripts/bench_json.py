@@ -0,0 +1,98 @@
+"""
+Benchmark JSON encoding and compression of dashboard responses.
+
+Compares Flask's default stdlib provider with FastJSONProvider (orjson) on
+synthetic /api/parlamentar payloads, reporting encode time and bytes on the
+wire for identity, gzip and brotli.
+
+Usage:
+    python scripts/bench_json.py
+    python scripts/bench_json.py --sizes 100 1000 10000 --repeat 20
+"""
+import sys
+import os
+import argparse
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+import app as flask_app
+
+MUNICIPIOS = ['São Paulo', 'Campinas', 'Santos', 'Sorocaba', 'Ribeirão Preto',
+              'São José dos Campos', 'Piracicaba', 'Bauru', 'Marília', 'Franca']
+FUNCOES = ['10 - Saúde', '12 - Educação', '15 - Urbanismo', '08 - Assistência Social',
+           '27 - Desporto e Lazer', '26 - Transporte']
+STATUS = ['Pago', 'Empenhado', 'Liquidado', 'Autorizado']
+
+
+def build_payload(n: int, seed: int = 42) -> dict:
+    """Build a /api/parlamentar-shaped payload with ``n`` historico entries."""
+    rnd = random.Random(seed)
+    historico = []
+    for i in range(n):
+        status = rnd.choice(STATUS)
+        historico.append({
+            "data": f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "codigo": f"2024.{i:06d}",
+            "municipio": rnd.choice(MUNICIPIOS),
+            "objeto": "Aquisição de equipamentos e material permanente para unidade "
+                      f"de atendimento nº {rnd.randint(1, 500)}",
+            "destino": f"Prefeitura Municipal de {rnd.choice(MUNICIPIOS)}",
+            "status": status,
+            "natureza": "Impositiva",
+            "is_pago": status == 'Pago',
+            "valor_raw": np.float64(round(rnd.uniform(10_000, 2_000_000), 2)),
+        })
+    total = float(sum(h['valor_raw'] for h in historico))
+    return {
+        "success": True,
+        "parlamentar": {"nome": "Fulano de Tal", "partido": "XYZ", "tipo": "Deputado Estadual",
+                        "foto": "", "uf": "SP"},
+        "indicadores": {"total_indicado": total, "count": np.int64(n), "execucao_pago": 42.0,
+                        "setor_prioritario": []},
+        "top_municipios": {m: np.float64(rnd.uniform(0, total)) for m in MUNICIPIOS},
+        "todas_funcoes": {f: np.float64(rnd.uniform(0, total)) for f in FUNCOES},
+        "historico": historico,
+    }
+
+
+def _timeit(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, repeat: int):
+    stdlib = DefaultJSONProvider(flask_app.app)
+    stdlib.default = flask_app.json_default
+    fast = flask_app.FastJSONProvider(flask_app.app)
+    encodings = ['gzip'] + (['br'] if flask_app.brotli is not None else [])
+
+    print(f"{'entries':>8} {'encoder':>8} {'encode ms':>10} {'identity':>10} "
+          + ' '.join(f"{e:>10} {e + ' ms':>8}" for e in encodings))
+    for n in sizes:
+        payload = build_payload(n)
+        for label, provider in (('stdlib', stdlib), ('fast', fast)):
+            encode_s = _timeit(lambda: provider.dumps(payload), repeat)
+            body = provider.dumps(payload).encode('utf-8')
+            cols = []
+            for enc in encodings:
+                comp_s = _timeit(lambda: flask_app.compress_body(body, enc), repeat)
+                cols.append(f"{len(flask_app.compress_body(body, enc)):>10} {comp_s * 1000:>8.2f}")
+            print(f"{n:>8} {label:>8} {encode_s * 1000:>10.2f} {len(body):>10} " + ' '.join(cols))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark JSON encoding and compression')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000],
+                        help='Number of historico entries per payload')
+    parser.add_argument('--repeat', type=int, default=10, help='Repetitions (best time is kept)')
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
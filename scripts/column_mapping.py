@@ -0,0 +1,148 @@
+"""
+Column mapping shared by every emendas source.
+
+Each source is described by a declarative profile in ``PROFILES``:
+
+- ``match``: ``'contains'`` (keyword is a substring of the normalized header)
+  or ``'exact'`` (keyword equals it);
+- ``case``: ``'lower'``, ``'upper'`` or ``'exact'`` normalization of headers;
+- ``ignore``: keywords of columns that must never be mapped;
+- ``passes``: lists of ``(target, keywords[, excluded keywords])`` rules. In
+  each pass, every column still unmapped takes the first rule whose target is
+  still free and whose keywords match. Specific rules go in the first pass,
+  generic fallbacks in the second.
+
+Resolved mappings are cached by (profile, header row), so repeated loads of
+the same layout (every chunk of a streamed file, every XML row) cost a dict
+lookup.
+"""
+from functools import lru_cache
+
+import pandas as pd
+
+PROFILES = {
+    # Planilhas do Portal da Transparência SP (XLSX/CSV)
+    'portal_xlsx': {
+        'match': 'contains',
+        'case': 'lower',
+        'ignore': ['órgão processador', 'orgao processador', 'primeira fase',
+                   'substituída', 'substituida', 'valor remanejado'],
+        'passes': [
+            [
+                ('nome', ['parlamentar', 'deputad', 'autor']),
+                ('valor', ['valor decisão', 'valor decisao']),
+                ('municipio', ['município', 'municipio']),
+                ('funcao', ['função de governo', 'função', 'funcao']),
+                ('data', ['data pagamento']),
+                ('orgao', ['beneficiário', 'beneficiario']),
+                ('status', ['estágio', 'estagio']),
+                ('partido', ['partido']),
+                ('codigo', ['código', 'codigo']),
+                ('objeto', ['objeto']),
+                ('natureza', ['natureza']),
+            ],
+            [
+                ('nome', ['nome'], ['município', 'municipio']),
+                ('valor', ['valor']),
+                ('orgao', ['órgão', 'orgao']),
+                ('data', ['data']),
+            ],
+        ],
+    },
+    # Tabelas dos PDFs da ALESP (até 2022); cabeçalhos já em maiúsculas
+    'alesp_pdf': {
+        'match': 'contains',
+        'case': 'upper',
+        'ignore': [],
+        'passes': [
+            [
+                ('nome', ['PARLAMENTAR']),
+                ('orgao', ['BENEFICIÁRIO', 'BENEFICIARIO']),
+                ('municipio', ['MUNICÍPIO', 'MUNICIPIO']),
+                ('objeto', ['OBJETO']),
+                ('valor', ['VALOR']),
+                ('status', ['STATUS']),
+            ],
+        ],
+    },
+    # API XML da Câmara Municipal de SP — endpoint Vereadores
+    'pmsp_vereadores': {
+        'match': 'exact',
+        'case': 'exact',
+        'ignore': [],
+        'passes': [
+            [
+                ('id', ['Numero']),
+                ('nome', ['Nome']),
+                ('apelido', ['Apelido']),
+                ('partido', ['Partido']),
+            ],
+        ],
+    },
+    # API XML da Câmara Municipal de SP — endpoint Emendas (dotações)
+    'pmsp_emendas': {
+        'match': 'exact',
+        'case': 'exact',
+        'ignore': [],
+        'passes': [
+            [
+                ('codigo', ['NUM_EMENDA']),
+                ('valor', ['VAL_DOTA_EMD']),
+                ('funcao', ['COD_FCAO_GOVR']),
+            ],
+        ],
+    },
+}
+
+
+def _normalize(label, case: str) -> str:
+    text = str(label).strip()
+    if case == 'lower':
+        return text.lower()
+    if case == 'upper':
+        return text.upper()
+    return text
+
+
+@lru_cache(maxsize=256)
+def _resolve(profile_name: str, header: tuple) -> tuple:
+    profile = PROFILES[profile_name]
+    exact = profile['match'] == 'exact'
+    normalized = [_normalize(col, profile['case']) for col in header]
+
+    def matches(text, keywords):
+        return text in keywords if exact else any(k in text for k in keywords)
+
+    ignored = {i for i, text in enumerate(normalized) if matches(text, profile['ignore'])}
+    mapping, taken = {}, set()
+    for rules in profile['passes']:
+        for i, text in enumerate(normalized):
+            if i in ignored or i in mapping:
+                continue
+            for target, keywords, *excluded in rules:
+                if target in taken or not matches(text, keywords):
+                    continue
+                if excluded and any(k in text for k in excluded[0]):
+                    continue
+                mapping[i] = target
+                taken.add(target)
+                break
+    return tuple((header[i], target) for i, target in sorted(mapping.items()))
+
+
+def resolve_columns(columns, profile: str = 'portal_xlsx') -> dict:
+    """Return {original column: normalized name} for a header row."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown column profile: {profile}")
+    return dict(_resolve(profile, tuple(columns)))
+
+
+def rename_columns(df: pd.DataFrame, profile: str = 'portal_xlsx') -> pd.DataFrame:
+    """DataFrame with its columns renamed by ``profile``."""
+    return df.rename(columns=resolve_columns(df.columns, profile))
+
+
+def map_record(record: dict, profile: str) -> dict:
+    """Dict (e.g. one XML row) with its keys renamed by ``profile``; unmapped keys are kept."""
+    mapping = resolve_columns(record.keys(), profile)
+    return {mapping.get(key, key): value for key, value in record.items()}
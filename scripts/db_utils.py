@@ -1,9 +1,24 @@
 import os
+import json
 import math
+import time
+import random
+import hashlib
+import threading
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
+try:
+    import psycopg
+except ImportError:  # psycopg é opcional; só é usado pela carga via COPY (--copy)
+    psycopg = None
+
 load_dotenv()
 
 
@@ -21,6 +36,14 @@ def parse_moeda(val) -> float:
         return 0.0 if math.isnan(val) else val
     if isinstance(val, (int,)):
         return float(val)
+    try:
+        return float(_moeda_text(val))
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _moeda_text(val) -> str:
+    """Currency text with 'R$' and thousands separators removed and '.' as decimal point."""
     val_str = str(val).replace('R$', '').strip()
     if ',' in val_str and '.' in val_str:
         if val_str.rfind(',') > val_str.rfind('.'):
@@ -29,10 +52,7 @@ def parse_moeda(val) -> float:
             val_str = val_str.replace(',', '')
     elif ',' in val_str:
         val_str = val_str.replace(',', '.')
-    try:
-        return float(val_str)
-    except (ValueError, TypeError):
-        return 0.0
+    return val_str
 
 
 def _safe(val, default=None):
@@ -78,6 +98,108 @@ def normalize_deputado_row(row: dict, ano: int) -> dict:
     }
 
 
+# ── Vectorized normalization ──────────────────────────────────────────────────
+# Column-at-a-time equivalents of parse_moeda / normalize_deputado_row. They must
+# produce exactly the same values, so anything without a cheap bulk form goes
+# through the scalar function once per distinct value.
+
+def parse_moeda_series(values: pd.Series) -> pd.Series:
+    """parse_moeda over a whole column."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float).fillna(0.0)
+    # Values repeat a lot and pandas' object-dtype string methods are no faster
+    # than the scalar parser, so each distinct value is parsed once
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    parsed = np.fromiter((parse_moeda(v) for v in uniques), dtype=float, count=len(uniques))
+    return pd.Series(np.append(parsed, 0.0)[codes], index=values.index)
+
+
+def count_invalid_moeda(values: pd.Series) -> int:
+    """Number of non-blank values parse_moeda can't read (and turns into 0.0)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return 0
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+
+    def invalid(v):
+        if isinstance(v, (int, float)):
+            return False
+        text = _moeda_text(v)
+        try:
+            float(text)
+        except ValueError:
+            return text != ''
+        return False
+
+    bad = np.fromiter((invalid(v) for v in uniques), dtype=bool, count=len(uniques))
+    return int(bad[codes[codes >= 0]].sum())
+
+
+def _safe_column(df: pd.DataFrame, col: str) -> list:
+    """_safe over a whole column; a missing column is all None."""
+    if col not in df.columns:
+        return [None] * len(df)
+    series = df[col]
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _parse_date(val):
+    try:
+        return str(pd.to_datetime(val).date())
+    except Exception:
+        return None
+
+
+def _date_column(df: pd.DataFrame, col: str) -> list:
+    """ISO date strings for ``col``; '-', empty and unparseable values become None."""
+    if col not in df.columns:
+        return [None] * len(df)
+    series = df[col]
+    if pd.api.types.is_datetime64_any_dtype(series) and series.dt.tz is None:
+        return series.dt.strftime('%Y-%m-%d').where(series.notna(), None).tolist()
+    # Dates repeat a lot, so each distinct value is parsed once
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    parsed = [_parse_date(v) if v and not (isinstance(v, str) and v == '-') else None
+              for v in uniques]
+    parsed.append(None)  # code -1 (NaN/None/NaT)
+    return [parsed[c] for c in codes]
+
+
+def normalize_deputado_frame(df: pd.DataFrame, ano: int) -> list:
+    """Column-wise normalize_deputado_row: rows with an empty nome are dropped."""
+    if 'nome' not in df.columns:
+        return []
+    df = df[df['nome'].astype(str).str.strip() != '']
+    n = len(df)
+    if 'valor_num' in df.columns:
+        valor = df['valor_num']
+        if pd.api.types.is_numeric_dtype(valor):
+            valor = valor.astype(float).tolist()
+        else:
+            valor = [float(v or 0.0) for v in valor.tolist()]
+    else:
+        valor = [0.0] * n
+    pago = df['pago_flag'].astype(bool).tolist() if 'pago_flag' in df.columns else [False] * n
+
+    columns = {
+        'tipo': ['deputado'] * n,
+        'nome': df['nome'].astype(str).str.strip().tolist(),
+        'partido': _safe_column(df, 'partido'),
+        'ano': [ano] * n,
+        'municipio': _safe_column(df, 'municipio'),
+        'funcao': _safe_column(df, 'funcao'),
+        'beneficiario': _safe_column(df, 'orgao'),
+        'objeto': _safe_column(df, 'objeto'),
+        'codigo': _safe_column(df, 'codigo'),
+        'status': _safe_column(df, 'status'),
+        'natureza': _safe_column(df, 'natureza'),
+        'data_pago': _date_column(df, 'data'),
+        'valor': valor,
+        'pago': pago,
+    }
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
 # Classificação funcional da despesa pública (Portaria MOG nº 42/1999)
 FUNCOES_GOVERNO = {
     '01': '01 - Legislativa',
@@ -145,3 +267,442 @@ def normalize_vereador_row(row: dict, ano: int) -> dict:
         'valor': valor,
         'pago': valor > 0,
     }
+
+
+# ── Bulk writer ──────────────────────────────────────────────────────────────
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              '.cache', 'ingest')
+
+
+class BulkWriter:
+    """Write rows to a Supabase table in parallel, size-bounded batches.
+
+    Batches are cut by encoded payload size (``max_batch_bytes``) rather than
+    row count, up to ``max_workers`` are in flight at once, and each one is
+    retried with exponential backoff. When ``checkpoint_path`` is given, the
+    hash of every written batch is appended to it and batches already listed
+    there are skipped, so an interrupted load resumes where it stopped; the
+    file is removed once everything is written. ``run_id`` (e.g. the
+    rows_digest of the load) is recorded as the file's first line; a
+    checkpoint left by a different run is discarded instead of resumed.
+
+    With ``method='upsert'`` and ``ignore_duplicates=True`` rows whose
+    ``on_conflict`` key is already stored are skipped, so a batch that
+    committed on the server but failed (or crashed) before being checkpointed
+    can be sent again.
+    """
+
+    def __init__(self, client, table: str = 'emendas', method: str = 'insert', on_conflict: str = None,
+                 max_workers: int = 4, max_batch_bytes: int = 512 * 1024, max_batch_rows: int = 1000,
+                 retries: int = 5, backoff: float = 0.5, checkpoint_path: str = None, run_id: str = None,
+                 ignore_duplicates: bool = False, log=print):
+        self.client = client
+        self.table = table
+        self.method = method
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        self.max_workers = max_workers
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_rows = max_batch_rows
+        self.retries = retries
+        self.backoff = backoff
+        self.checkpoint_path = checkpoint_path
+        self.run_id = run_id
+        self.log = log
+        self._lock = threading.Lock()
+
+    def batches(self, rows):
+        """Yield (batch_hash, batch) pairs cut by payload bytes."""
+        batch, size = [], 2
+        for row in rows:
+            encoded = json.dumps(row, default=str, ensure_ascii=False)
+            row_size = len(encoded.encode('utf-8')) + 1
+            if batch and (size + row_size > self.max_batch_bytes or len(batch) >= self.max_batch_rows):
+                yield self._hash(batch), batch
+                batch, size = [], 2
+            batch.append(row)
+            size += row_size
+        if batch:
+            yield self._hash(batch), batch
+
+    @staticmethod
+    def _hash(batch: list) -> str:
+        payload = json.dumps(batch, default=str, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load_checkpoint(self) -> set:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        if self.run_id is not None and checkpoint_run(self.checkpoint_path) != self.run_id:
+            self.log(f"  Discarding checkpoint of another run: {self.checkpoint_path}")
+            os.remove(self.checkpoint_path)
+            return set()
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip() and not line.startswith(RUN_PREFIX)}
+
+    def _mark_done(self, batch_hash: str):
+        if not self.checkpoint_path:
+            return
+        with self._lock:
+            with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+                f.write(batch_hash + '\n')
+
+    def _send(self, batch: list):
+        query = self.client.table(self.table)
+        if self.method == 'upsert':
+            query = query.upsert(batch, on_conflict=self.on_conflict, ignore_duplicates=self.ignore_duplicates)
+        else:
+            query = query.insert(batch)
+        query.execute()
+
+    def _send_with_retry(self, batch_hash: str, batch: list) -> int:
+        for attempt in range(self.retries + 1):
+            try:
+                self._send(batch)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt) * (1 + random.random() / 2)
+                self.log(f"  Batch {batch_hash[:8]} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+        self._mark_done(batch_hash)
+        return len(batch)
+
+    def write(self, rows) -> dict:
+        """Write every row and return {'rows', 'batches', 'skipped', 'seconds', 'rows_per_sec'}."""
+        if self.checkpoint_path:
+            os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        done = self._load_checkpoint()
+        if self.checkpoint_path and self.run_id is not None and not os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'w', encoding='utf-8') as f:
+                f.write(f"{RUN_PREFIX}{self.run_id}\n")
+        start = time.perf_counter()
+        written = batches = skipped = 0
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = set()
+            for batch_hash, batch in self.batches(rows):
+                if batch_hash in done:
+                    skipped += len(batch)
+                    continue
+                # Keep at most 2x max_workers batches buffered
+                while len(pending) >= self.max_workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        if future.exception() is not None:
+                            error = error or future.exception()
+                        else:
+                            written += future.result()
+                            batches += 1
+                if error is not None:
+                    break
+                pending.add(pool.submit(self._send_with_retry, batch_hash, batch))
+            for future in pending:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                else:
+                    written += future.result()
+                    batches += 1
+
+        seconds = time.perf_counter() - start
+        stats = {'rows': written, 'batches': batches, 'skipped': skipped, 'seconds': seconds,
+                 'rows_per_sec': written / seconds if seconds > 0 else 0.0}
+        if error is not None:
+            self.log(f"  Stopped after {written} rows; rerun to resume from the checkpoint.")
+            raise error
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.log(f"  Wrote {written} rows to {self.table} in {batches} batches "
+                 f"({stats['rows_per_sec']:.0f} rows/s, {skipped} already written)")
+        return stats
+
+
+def checkpoint_path_for(table: str, tipo: str, ano: int) -> str:
+    return os.path.join(CHECKPOINT_DIR, f"{table}-{tipo}-{ano}.checkpoint")
+
+
+RUN_PREFIX = 'run:'
+
+
+def checkpoint_run(path: str):
+    """run_id recorded in a checkpoint file, or None (missing file, or written without one)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            first = f.readline().strip()
+    except FileNotFoundError:
+        return None
+    return first[len(RUN_PREFIX):] if first.startswith(RUN_PREFIX) else None
+
+
+# ── Incremental sync ─────────────────────────────────────────────────────────
+def row_hash(row: dict) -> str:
+    """Content hash of an emendas row (fingerprint columns excluded)."""
+    content = {k: v for k, v in row.items() if k not in ('row_key', 'row_hash', 'id')}
+    payload = json.dumps(content, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def count_codigos(rows: list) -> Counter:
+    """Occurrences of each (tipo, ano, codigo) among rows that have a codigo."""
+    return Counter((r['tipo'], r['ano'], r.get('codigo')) for r in rows if r.get('codigo'))
+
+
+def add_fingerprints(rows: list, codigos: Counter = None, seen: Counter = None) -> list:
+    """Set ``row_key`` (natural key) and ``row_hash`` (content) on every row.
+
+    The natural key is (tipo, ano, codigo) when the codigo is unique within
+    the load. Rows without a codigo, or sharing one, are keyed by their
+    content hash plus an occurrence counter, so they can only be inserted or
+    deleted, never updated. A load fingerprinted in chunks passes the
+    ``codigos`` of the whole load (see count_codigos) and one shared ``seen``.
+    """
+    codigos = count_codigos(rows) if codigos is None else codigos
+    seen = Counter() if seen is None else seen
+    for r in rows:
+        h = row_hash(r)
+        codigo = r.get('codigo')
+        if codigo and codigos[(r['tipo'], r['ano'], codigo)] == 1:
+            parts = [r['tipo'], r['ano'], codigo]
+        else:
+            parts = [r['tipo'], r['ano'], codigo or '', h]
+            seen[tuple(map(str, parts))] += 1
+            parts.append(seen[tuple(map(str, parts))])
+        r['row_key'] = hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()[:32]
+        r['row_hash'] = h
+    return rows
+
+
+def fetch_fingerprints(client, tipo: str, ano: int) -> list:
+    """Fetch id/row_key/row_hash of every stored row for (tipo, ano).
+
+    Pages by id (keyset), so no row is skipped or returned twice: offset
+    pages without an order may overlap, since Postgres doesn't keep the row
+    order between queries.
+    """
+    existing = []
+    last_id = None
+    batch_size = 1000
+    while True:
+        query = (client.table('emendas')
+                 .select('id,row_key,row_hash')
+                 .eq('tipo', tipo).eq('ano', ano))
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        result = query.order('id').limit(batch_size).execute()
+        existing.extend(result.data or [])
+        if not result.data or len(result.data) < batch_size:
+            break
+        last_id = result.data[-1]['id']
+    return existing
+
+
+def diff_rows(existing: list, rows: list) -> tuple:
+    """Return (inserts, updates, delete_ids) to turn ``existing`` into ``rows``.
+
+    Stored rows without a row_key (loaded before fingerprints existed) are
+    always deleted.
+    """
+    stored = {e['row_key']: e for e in existing if e.get('row_key')}
+    new_keys = set()
+    inserts, updates = [], []
+    for r in rows:
+        new_keys.add(r['row_key'])
+        old = stored.get(r['row_key'])
+        if old is None:
+            inserts.append(r)
+        elif old.get('row_hash') != r['row_hash']:
+            updates.append(r)
+    delete_ids = [e['id'] for e in existing
+                  if not e.get('row_key') or e['row_key'] not in new_keys]
+    return inserts, updates, delete_ids
+
+
+def _batches(items: list, batch_size: int):
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
+
+
+def _sort_key(row: dict) -> str:
+    return row.get('row_key') or row_hash(row)
+
+
+def rows_digest(rows: list) -> str:
+    """Digest of the whole row set, independent of the order the rows came in."""
+    digest = hashlib.sha256()
+    for key, h in sorted((_sort_key(r), r.get('row_hash') or row_hash(r)) for r in rows):
+        digest.update(f"{key}:{h}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def swap_year(client, tipo: str, ano: int, rows, run_id: str = None, **writer_options) -> int:
+    """Load rows into emendas_staging and swap them in with one transaction.
+
+    Rows are written in row_key order, so batches (and their checkpoint
+    hashes) are the same on every run. An interrupted staging load resumes
+    from its checkpoint only when the checkpoint belongs to this exact row set
+    (rows_digest); otherwise the checkpoint is dropped and the staging rows of
+    the year are cleared before loading. Staging batches are upserted with
+    duplicates ignored: a batch that reached the table but not the checkpoint
+    is resent without tripping the row_key unique index. See
+    scripts/sql/incremental_ingest.sql for the swap_emendas_year function.
+
+    Streaming callers pass ``run_id`` (an id of the source the rows come
+    from) instead: ``rows`` may then be a generator, written as it comes in
+    its own order, which has to be the same on every run for that id.
+    """
+    if run_id is None:
+        rows = sorted(rows, key=_sort_key)
+        digest = rows_digest(rows)
+    else:
+        digest = run_id
+    checkpoint = checkpoint_path_for('emendas_staging', tipo, ano)
+    if checkpoint_run(checkpoint) != digest:
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        client.table('emendas_staging').delete().eq('tipo', tipo).eq('ano', ano).execute()
+    BulkWriter(client, 'emendas_staging', method='upsert', on_conflict='row_key', ignore_duplicates=True,
+               checkpoint_path=checkpoint, run_id=digest, **writer_options).write(rows)
+    result = client.rpc('swap_emendas_year', {'p_tipo': tipo, 'p_ano': ano}).execute()
+    return result.data
+
+
+def sync_rows(client, tipo: str, ano: int, rows: list, swap_threshold: float = 0.5,
+              full_reload: bool = False, **writer_options) -> dict:
+    """Bring the stored (tipo, ano) rows in line with ``rows``.
+
+    Small changes are applied as inserts/upserts/deletes; when the diff
+    touches more than ``swap_threshold`` of the year (or on ``full_reload``)
+    the year is rebuilt in the staging table and swapped in atomically.
+    ``writer_options`` are passed to :class:`BulkWriter`.
+    """
+    add_fingerprints(rows)
+    existing = fetch_fingerprints(client, tipo, ano)
+    inserts, updates, delete_ids = diff_rows(existing, rows)
+    changes = len(inserts) + len(updates) + len(delete_ids)
+    stats = {'inserted': len(inserts), 'updated': len(updates), 'deleted': len(delete_ids),
+             'unchanged': len(rows) - len(inserts) - len(updates), 'mode': 'incremental'}
+
+    if changes == 0:
+        stats['mode'] = 'noop'
+        return stats
+
+    if full_reload or changes > swap_threshold * max(len(existing), len(rows)):
+        swap_year(client, tipo, ano, rows, **writer_options)
+        stats['mode'] = 'swap'
+        return stats
+
+    # Incremental writes are naturally resumable: a rerun diffs again
+    if inserts:
+        BulkWriter(client, 'emendas', **writer_options).write(inserts)
+    if updates:
+        BulkWriter(client, 'emendas', method='upsert', on_conflict='row_key', **writer_options).write(updates)
+    for batch in _batches(delete_ids, 500):
+        client.table('emendas').delete().in_('id', batch).execute()
+    return stats
+
+
+# ── COPY bulk load ───────────────────────────────────────────────────────────
+# Column order and Postgres types of the rows built by normalize_*_row + add_fingerprints
+EMENDAS_COLUMNS = ('tipo', 'nome', 'partido', 'ano', 'municipio', 'funcao', 'beneficiario',
+                   'objeto', 'codigo', 'status', 'natureza', 'data_pago', 'valor', 'pago',
+                   'row_key', 'row_hash')
+_COPY_TYPES = ('text', 'text', 'text', 'int4', 'text', 'text', 'text',
+               'text', 'text', 'text', 'text', 'date', 'numeric', 'bool',
+               'text', 'text')
+
+
+def copy_values(row: dict) -> tuple:
+    """Return the row as a tuple of Python values typed for a binary COPY."""
+    values = []
+    for col, pg_type in zip(EMENDAS_COLUMNS, _COPY_TYPES):
+        val = row.get(col)
+        if val is None:
+            values.append(None)
+        elif pg_type == 'date':
+            values.append(val if isinstance(val, date) else date.fromisoformat(str(val)))
+        elif pg_type == 'numeric':
+            values.append(Decimal(str(val)))
+        elif pg_type == 'int4':
+            values.append(int(val))
+        elif pg_type == 'bool':
+            values.append(bool(val))
+        else:
+            values.append(str(val))
+    return tuple(values)
+
+
+def _csv_field(val) -> str:
+    # Unquoted empty = NULL, quoted "" = empty string (Postgres CSV rules)
+    if val is None:
+        return ''
+    if isinstance(val, bool):
+        return 't' if val else 'f'
+    if isinstance(val, (int, float, Decimal)):
+        return str(val)
+    return '"' + str(val).replace('"', '""') + '"'
+
+
+def iter_csv_chunks(rows, chunk_rows: int = 5000):
+    """Yield (bytes, n_rows) chunks of Postgres CSV for a COPY FROM STDIN."""
+    lines = []
+    for row in rows:
+        lines.append(','.join(_csv_field(row.get(col)) for col in EMENDAS_COLUMNS))
+        if len(lines) >= chunk_rows:
+            yield ('\n'.join(lines) + '\n').encode('utf-8'), len(lines)
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8'), len(lines)
+
+
+def copy_load(tipo: str, ano: int, rows, dsn: str = None, fmt: str = 'binary',
+              table: str = 'emendas') -> int:
+    """Replace the (tipo, ano) rows straight in Postgres with COPY FROM STDIN.
+
+    ``rows`` may be any iterable (e.g. a generator) of fingerprinted row
+    dicts; they are streamed, never materialized. The delete and the COPY run
+    in one transaction, so readers switch from the old year to the new one
+    atomically. Connects to ``dsn`` or $DATABASE_URL (Supabase: Settings →
+    Database → Connection string).
+    """
+    if psycopg is None:
+        raise RuntimeError("A carga via COPY precisa do psycopg: pip install 'psycopg[binary]'")
+    dsn = dsn or os.environ['DATABASE_URL']
+    cols = ', '.join(EMENDAS_COLUMNS)
+    count = 0
+    start = time.perf_counter()
+    with psycopg.connect(dsn) as conn:  # commits on success, rolls back on error
+        with conn.cursor() as cur:
+            cur.execute(f"delete from {table} where tipo = %s and ano = %s", (tipo, ano))
+            if fmt == 'binary':
+                with cur.copy(f"copy {table} ({cols}) from stdin (format binary)") as copy:
+                    copy.set_types(_COPY_TYPES)
+                    for row in rows:
+                        copy.write_row(copy_values(row))
+                        count += 1
+            elif fmt == 'csv':
+                with cur.copy(f"copy {table} ({cols}) from stdin (format csv)") as copy:
+                    for chunk, n in iter_csv_chunks(rows):
+                        copy.write(chunk)
+                        count += n
+            else:
+                raise ValueError(f"Unsupported COPY format: {fmt}")
+    seconds = time.perf_counter() - start
+    print(f"  Copied {count} rows into {table} in {seconds:.1f}s "
+          f"({count / seconds if seconds > 0 else 0:.0f} rows/s)")
+    return count
+
+
+def write_rows(tipo: str, ano: int, rows: list, copy_format: str = None, full_reload: bool = False,
+               write_workers: int = 4, client=None) -> dict:
+    """Store the (tipo, ano) rows with COPY (``copy_format``) or sync_rows.
+
+    Returns sync_rows' stats; a COPY load reports ``mode='copy'`` and every
+    row as inserted.
+    """
+    if copy_format:
+        count = copy_load(tipo, ano, add_fingerprints(rows), fmt=copy_format)
+        return {'mode': 'copy', 'inserted': count, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    client = client or get_supabase_client()
+    return sync_rows(client, tipo, ano, rows, full_reload=full_reload, max_workers=write_workers)
@@ -0,0 +1,153 @@
+"""
+Export the read API as static, content-hashed JSON files for CDN hosting.
+
+Walks every parlamentar, municipality and year in the emendas table and writes
+the exact bodies of /api/parlamentar, /api/cidade and /api/anos, plus the
+autocomplete indexes, under ``<out>/static-api/``. ``manifest.json`` maps each
+request to its hashed file; ``static/api-client.js`` reads it and only falls
+back to Flask for requests that aren't in the export. The HTML pages are copied
+too, with a ``window.LUPA_STATIC_API`` flag that tells the client to use the
+manifest (pages served by Flask don't fetch it), so ``<out>`` can be published
+as-is.
+
+Dashboards are exported for each exact nome/município (the names the
+autocomplete offers), and each file is the API's response to that exact query.
+Partial queries aggregate every name containing them, so the client sends those
+to Flask instead of guessing a match.
+
+Usage:
+    python scripts/export_static.py
+    python scripts/export_static.py --out dist --workers 8
+"""
+import sys
+import os
+import time
+import json
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+PAGES = {'home.html': 'index.html',
+         'index.html': 'municipios/index.html',
+         'parlamentar.html': 'parlamentar/index.html'}
+
+CLIENT_TAG = '<script src="/static/api-client.js"></script>'
+STATIC_FLAG = '<script>window.LUPA_STATIC_API = true;</script>'
+
+
+def manifest_key(query: str, ano=None) -> str:
+    """Key used by static/api-client.js: lowercased query + '|' + ano."""
+    return f"{query.lower().strip()}|{ano or ''}"
+
+
+def mark_static_page(html: str) -> str:
+    """Flag an exported page so static/api-client.js reads the manifest."""
+    return html.replace(CLIENT_TAG, f"{STATIC_FLAG}\n{CLIENT_TAG}", 1)
+
+
+def write_hashed(api_dir: str, subdir: str, body: bytes) -> str:
+    """Write ``body`` as ``<subdir>/<hash>.json`` and return its relative path."""
+    digest = hashlib.sha256(body).hexdigest()[:20]
+    rel_path = f"{subdir}/{digest}.json" if subdir else f"{digest}.json"
+    path = os.path.join(api_dir, rel_path)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(body)
+        os.replace(tmp, path)
+    return rel_path
+
+
+def _export_task(api_dir: str, kind: str, query: str, ano):
+    """Worker: build one dashboard and write it. Returns (kind, key, rel_path)."""
+    import app as flask_app
+    builder = (flask_app.build_parlamentar_payload if kind == 'parlamentar'
+               else flask_app.build_cidade_payload)
+    payload, status = builder(query.lower().strip(), str(ano) if ano else None)
+    if status != 200:
+        return kind, manifest_key(query, ano), None
+    body = flask_app.app.json.dumps(payload).encode('utf-8')
+    return kind, manifest_key(query, ano), write_hashed(api_dir, kind, body)
+
+
+def collect_entities(flask_app):
+    """Return ({nome: {anos}}, {municipio: {anos}}) from every emendas row."""
+    nomes, municipios = {}, {}
+    for row in flask_app.iter_all_rows('nome,municipio,ano'):
+        if row.get('nome'):
+            nomes.setdefault(row['nome'].strip(), set()).add(row['ano'])
+        if row.get('municipio'):
+            municipios.setdefault(row['municipio'].strip(), set()).add(row['ano'])
+    return nomes, municipios
+
+
+def export(out_dir: str, workers: int = None):
+    import app as flask_app
+
+    start = time.perf_counter()
+    api_dir = os.path.join(out_dir, 'static-api')
+    os.makedirs(api_dir, exist_ok=True)
+
+    nomes, municipios = collect_entities(flask_app)
+    print(f"Found {len(nomes)} parlamentares and {len(municipios)} municípios")
+
+    dumps = flask_app.app.json.dumps
+    manifest = {
+        'generated_at': int(time.time()),
+        'anos': write_hashed(api_dir, '', dumps(flask_app.build_anos_payload()).encode('utf-8')),
+        'nomes': write_hashed(api_dir, '', dumps(sorted(nomes)).encode('utf-8')),
+        'municipios': write_hashed(api_dir, '', dumps(sorted(municipios)).encode('utf-8')),
+        'parlamentar': {},
+        'cidade': {},
+    }
+
+    tasks = []
+    for kind, entities in (('parlamentar', nomes), ('cidade', municipios)):
+        for name, anos in entities.items():
+            tasks.append((kind, name, None))
+            tasks.extend((kind, name, ano) for ano in sorted(anos))
+    print(f"Rendering {len(tasks)} dashboards...")
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_export_task, api_dir, *task) for task in tasks]
+        for future in as_completed(futures):
+            kind, key, rel_path = future.result()
+            if rel_path:
+                manifest[kind][key] = rel_path
+            done += 1
+            if done % 200 == 0 or done == len(tasks):
+                print(f"  {done}/{len(tasks)} dashboards")
+
+    for src, dest in PAGES.items():
+        dest_path = os.path.join(out_dir, dest)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        with open(os.path.join(ROOT_DIR, src), 'r', encoding='utf-8') as f:
+            html = mark_static_page(f.read())
+        with open(dest_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+    shutil.copytree(os.path.join(ROOT_DIR, 'static'), os.path.join(out_dir, 'static'), dirs_exist_ok=True)
+
+    # The manifest is written last so a half-finished export is never picked up
+    tmp = os.path.join(api_dir, 'manifest.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, os.path.join(api_dir, 'manifest.json'))
+
+    elapsed = time.perf_counter() - start
+    print(f"Done. Exported {len(manifest['parlamentar']) + len(manifest['cidade'])} dashboards "
+          f"to '{out_dir}' in {elapsed:.1f}s.")
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the read API as static JSON files')
+    parser.add_argument('--out', default=os.path.join(ROOT_DIR, 'dist'), help='Output directory')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+    export(args.out, workers=args.workers)
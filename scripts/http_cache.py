@@ -0,0 +1,161 @@
+"""
+On-disk HTTP cache for the PMSP XML API.
+
+Responses are stored under ``HTTP_CACHE_DIR`` (default ``.cache/http``) as
+``<key>.body`` plus ``<key>.json`` metadata, where the key is the endpoint name
+and exercise year (e.g. ``Emendas-2024``). Modes:
+
+- ``default``: revalidate with If-None-Match / If-Modified-Since when the server
+  sent an ETag / Last-Modified, otherwise download again and compare the
+  content hash to report whether the data changed;
+- ``refresh``: always download, ignoring stored validators;
+- ``replay``: never touch the network, serve what was recorded (offline runs and
+  benchmarks). A missing entry is an error.
+
+One pooled ``requests.Session`` is shared by every request, so concurrent
+fetches reuse connections. ``responses`` maps each key served by this instance
+to the sha256 of its body, which callers use to tell whether a source changed.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CACHE_DIR = os.environ.get(
+    'HTTP_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'http'),
+)
+MODES = ('default', 'refresh', 'replay')
+
+
+class CachedResponse:
+    """Body of a cached request and how it was obtained."""
+
+    def __init__(self, content: bytes, source: str, sha256: str, changed: bool):
+        self.content = content
+        self.source = source      # 'fetched', 'revalidated' (304) or 'replay'
+        self.sha256 = sha256
+        self.changed = changed    # False when the body equals the previous recording
+
+    def __repr__(self):
+        return f"<CachedResponse {self.source} {self.sha256[:12]} changed={self.changed}>"
+
+
+class HttpCache:
+    def __init__(self, cache_dir: str = CACHE_DIR, mode: str = 'default', pool_size: int = 8, log=print):
+        if mode not in MODES:
+            raise ValueError(f"Unknown HTTP cache mode: {mode}")
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.log = log
+        self.responses = {}  # key -> sha256 of the body served
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _paths(self, key: str) -> tuple:
+        base = os.path.join(self.cache_dir, re.sub(r'[^\w.-]+', '_', key))
+        return f"{base}.body", f"{base}.json"
+
+    def _read_meta(self, key: str):
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(body_path) else None
+
+    def _write_meta(self, key: str, meta: dict):
+        _, meta_path = self._paths(key)
+        tmp = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, meta_path)
+
+    def _iter_file(self, key: str, chunk_size: int):
+        with open(self._paths(key)[0], 'rb') as f:
+            yield from iter(lambda: f.read(chunk_size), b'')
+
+    def stream(self, url: str, data: dict, key: str, timeout: float = 120, headers: dict = None,
+               chunk_size: int = 64 * 1024, info: dict = None):
+        """Yield the body of POST ``url`` in chunks, as it downloads.
+
+        A downloaded body is written to the cache while it is being consumed and
+        only recorded once the generator is exhausted. ``info``, when given, is
+        filled with ``source``, ``sha256`` and ``changed`` (see CachedResponse).
+        """
+        info = {} if info is None else info
+        meta = self._read_meta(key)
+        if self.mode == 'replay':
+            if meta is None:
+                raise FileNotFoundError(f"No recorded response for '{key}' in {self.cache_dir}")
+            info.update(source='replay', sha256=meta['sha256'], changed=False)
+            self.responses[key] = meta['sha256']
+            yield from self._iter_file(key, chunk_size)
+            return
+
+        request_headers = dict(headers or {})
+        if self.mode == 'default' and meta is not None:
+            if meta.get('etag'):
+                request_headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request_headers['If-Modified-Since'] = meta['last_modified']
+
+        start = time.perf_counter()
+        with self.session.post(url, data=data, headers=request_headers, timeout=timeout,
+                               stream=True) as response:
+            if response.status_code == 304 and meta is not None:
+                self.log(f"  [http-cache] {key}: not modified ({time.perf_counter() - start:.1f}s)")
+                meta['checked_at'] = time.time()
+                self._write_meta(key, meta)
+                info.update(source='revalidated', sha256=meta['sha256'], changed=False)
+                self.responses[key] = meta['sha256']
+                yield from self._iter_file(key, chunk_size)
+                return
+            response.raise_for_status()
+
+            body_path, _ = self._paths(key)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            digest, size = hashlib.sha256(), 0
+            try:
+                with open(tmp, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                        yield chunk
+                sha = digest.hexdigest()
+                changed = meta is None or meta.get('sha256') != sha
+                # Body first: a reader that sees the new meta always finds its body
+                os.replace(tmp, body_path)
+                self._write_meta(key, {
+                    'url': url,
+                    'data': data,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'sha256': sha,
+                    'bytes': size,
+                    'fetched_at': time.time(),
+                    'checked_at': time.time(),
+                })
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        info.update(source='fetched', sha256=sha, changed=changed)
+        self.responses[key] = sha
+        self.log(f"  [http-cache] {key}: {size / 1024:.0f} KiB in {time.perf_counter() - start:.1f}s"
+                 f"{'' if changed else ' (unchanged)'}")
+
+    def post(self, url: str, data: dict, key: str, timeout: float = 120, headers: dict = None) -> CachedResponse:
+        """POST ``data`` to ``url`` through the cache entry ``key`` and return the whole body."""
+        info = {}
+        content = b''.join(self.stream(url, data, key, timeout=timeout, headers=headers, info=info))
+        return CachedResponse(content, info['source'], info['sha256'], info['changed'])
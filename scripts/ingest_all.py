@@ -0,0 +1,224 @@
+"""
+Batch ingest: every deputado file in a directory plus a range of vereador years.
+
+Files are parsed and vereador years fetched concurrently in a process pool;
+rows are grouped into (tipo, ano) units (several files of the same year form
+one unit, merged in file name order so the rows always arrive in the same
+order) and written one unit at a time through the bounded BulkWriter / COPY
+path. Finished units are recorded in a manifest together with the hashes of
+their sources (file SHA-256s; for vereador years the SHA-256 of each PMSP API
+response, revalidated through the HTTP cache), so a rerun skips units whose
+sources haven't changed and retries the ones that failed.
+
+Usage:
+    python scripts/ingest_all.py --dir xlsx --vereadores 2021-2024
+    python scripts/ingest_all.py --dir xlsx --workers 4 --copy
+    python scripts/ingest_all.py --vereadores 2024 --force
+"""
+import sys
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from scripts.db_utils import CHECKPOINT_DIR, write_rows
+from scripts.parse_cache import file_hash
+
+MANIFEST_PATH = os.path.join(CHECKPOINT_DIR, 'ingest-all.json')
+DEPUTADO_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.pdf')
+
+
+def parse_years(spec: str) -> list:
+    """'2021-2024' or '2021,2023' (or a mix) → sorted list of years."""
+    years = set()
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        if '-' in part:
+            start, end = (int(x) for x in part.split('-', 1))
+            years.update(range(start, end + 1))
+        else:
+            years.add(int(part))
+    return sorted(years)
+
+
+def list_deputado_files(directory: str) -> list:
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(DEPUTADO_EXTENSIONS) and not name.startswith('~$'))
+
+
+def load_manifest(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'units': {}}
+
+
+def save_manifest(path: str, manifest: dict):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def unit_key(tipo: str, ano: int) -> str:
+    return f"{tipo}:{ano}"
+
+
+def is_done(manifest: dict, key: str, sources: dict) -> bool:
+    entry = manifest['units'].get(key)
+    return bool(entry) and entry.get('status') == 'done' and entry.get('sources') == sources
+
+
+# ── Workers (run in the process pool) ────────────────────────────────────────
+# Each returns (tipo, ano, {source: hash}, rows, seconds)
+def _parse_task(file_path: str, pdf_workers: int, use_cache: bool):
+    from scripts.ingest_deputados import parse_file
+    start = time.perf_counter()
+    ano, rows = parse_file(file_path, workers=pdf_workers, use_cache=use_cache)
+    return 'deputado', ano, {file_path: file_hash(file_path)}, rows, time.perf_counter() - start
+
+
+def _fetch_task(ano: int, http_mode: str):
+    from scripts.ingest_vereadores import fetch_rows
+    from scripts.http_cache import HttpCache
+    start = time.perf_counter()
+    http = HttpCache(mode=http_mode)
+    rows = fetch_rows(ano, http=http)
+    # Hash of each endpoint's response: a year is redone only when the PMSP data changed
+    sources = {f"api:{key}": sha for key, sha in sorted(http.responses.items())}
+    return 'vereador', ano, sources, rows, time.perf_counter() - start
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+def _entry(key: str, files: int, rows, parse_s: float = 0.0, status: str = 'pending') -> dict:
+    return {'unit': key, 'files': files, 'rows': rows, 'parse_s': round(parse_s, 2),
+            'write_s': 0.0, 'status': status}
+
+
+def run(directory: str = None, years: list = (), workers: int = None, pdf_workers: int = 1,
+        use_cache: bool = True, dry_run: bool = False, force: bool = False,
+        manifest_path: str = MANIFEST_PATH, write_options: dict = None,
+        http_mode: str = 'default') -> list:
+    """Ingest everything and return one summary dict per (tipo, ano) unit."""
+    write_options = write_options or {}
+    manifest = load_manifest(manifest_path)
+    files = list_deputado_files(directory) if directory else []
+    summary = []
+    # Vereador years are always fetched: the HTTP cache revalidates unchanged
+    # responses cheaply, and their hashes decide whether the year is redone
+    print(f"{len(files)} deputado files, {len(years)} vereador years to fetch")
+
+    def write_unit(key, unit):
+        tipo, ano = key.split(':')
+        # Rows in source order (file name), not in the order the workers finished
+        unit['rows'] = [row for source in sorted(unit['parts']) for row in unit['parts'][source]]
+        entry = _entry(key, len(unit['parts']), len(unit['rows']), unit['parse_s'])
+        if not force and is_done(manifest, key, unit['sources']):
+            entry['status'] = 'skipped'
+        elif dry_run:
+            entry['status'] = 'dry-run'
+        else:
+            start = time.perf_counter()
+            try:
+                entry['mode'] = write_rows(tipo, int(ano), unit['rows'], **write_options)['mode']
+                entry['status'] = 'done'
+            except Exception as e:
+                entry['status'] = 'failed'
+                entry['error'] = f"{type(e).__name__}: {e}"
+            entry['write_s'] = round(time.perf_counter() - start, 2)
+            manifest['units'][key] = dict(entry, sources=unit['sources'], finished_at=time.time())
+            save_manifest(manifest_path, manifest)
+        print(f"[{key}] {entry['status']} ({entry['rows']} rows)")
+        summary.append(entry)
+
+    units = {}
+    parse_errors = []
+    tasks = [(_parse_task, (path, pdf_workers, use_cache)) for path in files]
+    tasks += [(_fetch_task, (ano, http_mode)) for ano in years]
+    # Keep at most 2x workers tasks submitted at a time
+    limit = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while tasks or running:
+            while tasks and len(running) < limit:
+                fn, args = tasks.pop(0)
+                running[pool.submit(fn, *args)] = (fn, args)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                fn, args = running.pop(future)
+                try:
+                    tipo, ano, sources, rows, seconds = future.result()
+                except Exception as e:
+                    print(f"[erro] {args[0]}: {e}")
+                    if fn is _parse_task:
+                        parse_errors.append(args[0])
+                        summary.append(dict(_entry(os.path.basename(args[0]), 1, None), status='failed',
+                                            error=f"{type(e).__name__}: {e}"))
+                    else:
+                        summary.append(dict(_entry(unit_key('vereador', args[0]), 1, None),
+                                            status='failed', error=f"{type(e).__name__}: {e}"))
+                    continue
+                key = unit_key(tipo, ano)
+                unit = units.setdefault(key, {'parts': {}, 'sources': {}, 'parse_s': 0.0})
+                unit['parts'][args[0]] = rows  # file path, or the vereador year
+                unit['sources'].update(sources)
+                unit['parse_s'] += seconds
+                if tipo == 'vereador':
+                    write_unit(key, units.pop(key))
+
+    # Deputado units are written once every file is parsed, since a year may span
+    # several files; if any file failed its year is unknown, so nothing is written
+    for key in sorted(units):
+        if parse_errors:
+            unit = units[key]
+            summary.append(dict(_entry(key, len(unit['parts']), sum(len(p) for p in unit['parts'].values()),
+                                       unit['parse_s']),
+                                status='blocked', error=f"{len(parse_errors)} file(s) failed to parse"))
+        else:
+            write_unit(key, units[key])
+    return summary
+
+
+def print_summary(summary: list):
+    print()
+    print(f"{'unit':<22} {'files':>5} {'rows':>8} {'parse s':>8} {'write s':>8}  status")
+    for entry in summary:
+        rows = '-' if entry.get('rows') is None else entry['rows']
+        print(f"{entry['unit'][:22]:<22} {entry['files']:>5} {rows:>8} {entry['parse_s']:>8.1f} "
+              f"{entry['write_s']:>8.1f}  {entry['status']}"
+              + (f" ({entry['error']})" if entry.get('error') else ''))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ingest every deputado file and vereador year')
+    parser.add_argument('--dir', help='Directory with deputado XLSX/XLS/CSV/PDF files')
+    parser.add_argument('--vereadores', default='', help="Vereador years, e.g. '2021-2024' or '2022,2024'")
+    parser.add_argument('--workers', type=int, default=None, help='Parse/fetch processes (default: CPU count)')
+    parser.add_argument('--pdf-workers', type=int, default=1, help='Page-extraction processes per PDF')
+    parser.add_argument('--write-workers', type=int, default=4, help='Batches written to Supabase in parallel')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the parse cache')
+    parser.add_argument('--full-reload', action='store_true', help='Rebuild every year through the staging table')
+    parser.add_argument('--copy', nargs='?', const='binary', choices=['binary', 'csv'], default=None,
+                        help='Load straight into Postgres ($DATABASE_URL) with COPY instead of the API')
+    parser.add_argument('--dry-run', action='store_true', help='Parse/fetch only, do not write to DB')
+    parser.add_argument('--replay', action='store_const', const='replay', default='default', dest='http_mode',
+                        help='Serve recorded PMSP API responses only (offline)')
+    parser.add_argument('--force', action='store_true', help='Ignore the manifest and redo every unit')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help='Manifest of finished units')
+    args = parser.parse_args()
+    if not args.dir and not args.vereadores:
+        parser.error('nothing to do: pass --dir and/or --vereadores')
+
+    summary = run(args.dir, parse_years(args.vereadores), workers=args.workers,
+                  pdf_workers=args.pdf_workers, use_cache=not args.no_cache, dry_run=args.dry_run,
+                  force=args.force, manifest_path=args.manifest,
+                  write_options={'copy_format': args.copy, 'full_reload': args.full_reload,
+                                 'write_workers': args.write_workers},
+                  http_mode=args.http_mode)
+    print_summary(summary)
+    sys.exit(1 if any(entry['status'] == 'failed' for entry in summary) else 0)
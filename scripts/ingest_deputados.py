@@ -4,79 +4,44 @@ Ingestion script for Deputados Estaduais SP (XLSX 2023+ and PDF pre-2022).
 Usage:
     python scripts/ingest_deputados.py path/to/2024.xlsx
     python scripts/ingest_deputados.py path/to/2021.pdf
+    python scripts/ingest_deputados.py path/to/2021.pdf --no-cache
+    python scripts/ingest_deputados.py path/to/2024.xlsx --stream --copy
+    python scripts/ingest_deputados.py path/to/2024.xlsx --dry-run --summary
 """
 import sys
 import os
+import codecs
+import hashlib
 import argparse
+from collections import Counter
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pandas as pd
 import numpy as np
 import pdfplumber
+from pdfplumber import utils as pdf_utils
 
-from scripts.db_utils import get_supabase_client, normalize_deputado_row, parse_moeda
+from scripts.db_utils import (get_supabase_client, swap_year, add_fingerprints, copy_load, write_rows,
+                              normalize_deputado_frame, parse_moeda_series, count_invalid_moeda)
+from scripts.xlsx_stream import iter_xlsx_frames, read_xlsx
+from scripts.column_mapping import resolve_columns, rename_columns
+from scripts.run_report import RunReport, add_report_arguments
+from scripts import parse_cache
 
+# Bump whenever load_file's output changes so stale parse-cache entries are ignored
+PARSER_VERSION = 2
 
-def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    """Normalize column names and parse values from XLSX/CSV."""
-    colunas_ignoradas = set()
-    columns_list = list(df.columns)
-    for col in columns_list:
-        lower_col = str(col).lower().strip()
-        if any(k in lower_col for k in ['órgão processador', 'orgao processador',
-                                         'primeira fase', 'substituída', 'substituida',
-                                         'valor remanejado']):
-            colunas_ignoradas.add(col)
-
-    col_mapper = {}
-    mapped_values = set()
-
-    for col in columns_list:
-        if col in colunas_ignoradas:
-            continue
-        lower_col = str(col).lower().strip()
-        if 'nome' not in mapped_values and any(k in lower_col for k in ['parlamentar', 'deputad', 'autor']):
-            col_mapper[col] = 'nome'; mapped_values.add('nome')
-        elif 'valor' not in mapped_values and ('valor decisão' in lower_col or 'valor decisao' in lower_col):
-            col_mapper[col] = 'valor'; mapped_values.add('valor')
-        elif 'municipio' not in mapped_values and ('município' in lower_col or 'municipio' in lower_col):
-            col_mapper[col] = 'municipio'; mapped_values.add('municipio')
-        elif 'funcao' not in mapped_values and ('função de governo' in lower_col or 'função' in lower_col or 'funcao' in lower_col):
-            col_mapper[col] = 'funcao'; mapped_values.add('funcao')
-        elif 'data' not in mapped_values and 'data pagamento' in lower_col:
-            col_mapper[col] = 'data'; mapped_values.add('data')
-        elif 'orgao' not in mapped_values and ('beneficiário' in lower_col or 'beneficiario' in lower_col):
-            col_mapper[col] = 'orgao'; mapped_values.add('orgao')
-        elif 'status' not in mapped_values and ('estágio' in lower_col or 'estagio' in lower_col):
-            col_mapper[col] = 'status'; mapped_values.add('status')
-        elif 'partido' not in mapped_values and 'partido' in lower_col:
-            col_mapper[col] = 'partido'; mapped_values.add('partido')
-        elif 'codigo' not in mapped_values and ('código' in lower_col or 'codigo' in lower_col):
-            col_mapper[col] = 'codigo'; mapped_values.add('codigo')
-        elif 'objeto' not in mapped_values and 'objeto' in lower_col:
-            col_mapper[col] = 'objeto'; mapped_values.add('objeto')
-        elif 'natureza' not in mapped_values and 'natureza' in lower_col:
-            col_mapper[col] = 'natureza'; mapped_values.add('natureza')
-
-    for col in columns_list:
-        if col in col_mapper or col in colunas_ignoradas:
-            continue
-        lower_col = str(col).lower().strip()
-        if 'nome' not in mapped_values and 'nome' in lower_col and 'município' not in lower_col:
-            col_mapper[col] = 'nome'; mapped_values.add('nome')
-        elif 'valor' not in mapped_values and 'valor' in lower_col:
-            col_mapper[col] = 'valor'; mapped_values.add('valor')
-        elif 'orgao' not in mapped_values and ('órgão' in lower_col or 'orgao' in lower_col):
-            col_mapper[col] = 'orgao'; mapped_values.add('orgao')
-        elif 'data' not in mapped_values and 'data' in lower_col:
-            col_mapper[col] = 'data'; mapped_values.add('data')
 
+def apply_column_map(df: pd.DataFrame, col_mapper: dict) -> pd.DataFrame:
+    """Rename with ``col_mapper`` (see scripts.column_mapping) and parse values."""
     df = df.rename(columns=col_mapper)
     if 'nome' in df.columns:
         df['nome'] = df['nome'].astype(str).str.strip()
     if 'valor' in df.columns:
-        df['valor_num'] = df['valor'].apply(parse_moeda)
+        df['valor_num'] = parse_moeda_series(df['valor'])
     if 'status' in df.columns:
         df['pago_flag'] = df['status'].astype(str).str.lower().str.contains('pago')
     else:
@@ -84,22 +49,187 @@ def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def extract_pdf_dataframe(file_path: str) -> pd.DataFrame:
-    """Extract table from PDF (pre-2022 format)."""
-    all_rows = []
+def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize column names and parse values from XLSX/CSV."""
+    return apply_column_map(df, resolve_columns(df.columns, 'portal_xlsx'))
+
+
+def _is_header_row(row) -> bool:
+    row_str = ' '.join(str(c).upper() for c in row if c)
+    return 'PARLAMENTAR' in row_str and any(k in row_str for k in ['VALOR', 'MUNICÍPIO', 'BENEFICI'])
+
+
+def _clean_table_rows(tables) -> list:
+    return [row for table in tables for row in table if row and any(c and c.strip() for c in row)]
+
+
+def detect_table_template(page):
+    """Detect the ALESP table layout from the page holding the header row.
+
+    Returns the column boundaries, the table's horizontal extent and the header
+    row box/text, or None when the page has no header row.
+    """
+    for table in page.find_tables():
+        for row, row_obj in zip(table.extract(), table.rows):
+            if not _is_header_row(row):
+                continue
+            x0, top, x1, bottom = row_obj.bbox
+            return {
+                'vertical_lines': sorted({c[0] for c in table.cells} | {c[2] for c in table.cells}),
+                'x0': table.bbox[0],
+                'x1': table.bbox[2],
+                'header_top': top,
+                'header_bottom': bottom,
+                'header_text': page.crop(row_obj.bbox).extract_text(),
+            }
+    return None
+
+
+def _row_boundaries(page, template, tolerance: float = 3) -> list:
+    """Return the y positions of the horizontal rules below the header.
+
+    Edges within ``tolerance`` of each other are merged (like pdfplumber's
+    snapping); every rule must span the whole table width, otherwise the page
+    doesn't fit the template and an empty list is returned.
+    """
+    x0, x1 = template['x0'], template['x1']
+    edges = sorted((e for e in page.horizontal_edges
+                    if e['top'] >= template['header_bottom'] - tolerance
+                    and e['x1'] > x0 and e['x0'] < x1),
+                   key=lambda e: e['top'])
+    groups = []
+    for edge in edges:
+        if groups and edge['top'] - groups[-1][0]['top'] <= tolerance:
+            groups[-1].append(edge)
+        else:
+            groups.append([edge])
+
+    ys = []
+    for group in groups:
+        covered, reach = 0.0, x0
+        for e in sorted(group, key=lambda e: e['x0']):
+            start, end = max(e['x0'], reach), min(e['x1'], x1)
+            if end > start:
+                covered += end - start
+                reach = end
+        if covered < (x1 - x0) - 2 * tolerance:
+            return []
+        ys.append(sum(e['top'] for e in group) / len(group))
+    return ys
+
+
+def _extract_page_with_template(page, template):
+    """Extract the body rows below the repeated header using cached columns.
+
+    Skips pdfplumber's table finder: rows come from the page's horizontal
+    rules, columns from the template, and each cell's text is extracted the
+    same way Table.extract does. Returns None when the page doesn't fit the
+    template, so the caller can fall back to auto-detection.
+    """
+    header_box = (template['x0'], template['header_top'], template['x1'], template['header_bottom'])
+    if header_box[2] > page.width or header_box[3] > page.height:
+        return None
+    if page.crop(header_box).extract_text() != template['header_text']:
+        return None
+    ys = _row_boundaries(page, template)
+    if len(ys) < 2:
+        return None
+
+    columns = template['vertical_lines']
+    n_cols = len(columns) - 1
+    # Chars ordered by vertical midpoint, keeping their page order for ties
+    chars = sorted(enumerate(page.chars), key=lambda ic: ((ic[1]['top'] + ic[1]['bottom']) / 2, ic[0]))
+    v_mids = [(c['top'] + c['bottom']) / 2 for _, c in chars]
+
+    rows = []
+    for top, bottom in zip(ys, ys[1:]):
+        cells = [[] for _ in range(n_cols)]
+        for idx, char in chars[bisect_left(v_mids, top):bisect_left(v_mids, bottom)]:
+            col = bisect_right(columns, (char['x0'] + char['x1']) / 2) - 1
+            if 0 <= col < n_cols:
+                cells[col].append((idx, char))
+        row = [pdf_utils.extract_text([c for _, c in sorted(cell, key=lambda ic: ic[0])]) if cell else ''
+               for cell in cells]
+        if any(c.strip() for c in row):
+            rows.append(row)
+    return rows or None
+
+
+def _extract_page_range(file_path: str, start: int, end: int, template=None) -> tuple:
+    """Extract non-empty table rows from pages [start, end). Runs in a worker."""
+    rows = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages[start:end]:
+            page_rows = _extract_page_with_template(page, template) if template else None
+            if page_rows is None:
+                page_rows = _clean_table_rows(page.extract_tables())
+            rows.extend(page_rows)
+            # Drop pdfplumber's per-page object cache so long ranges stay small
+            page.close()
+    return start, rows
+
+
+def extract_pdf_rows(file_path: str, workers: int = None, chunk_size: int = 8,
+                     max_tasks_per_worker: int = 4) -> list:
+    """Extract table rows from every page, in page order, using a process pool.
+
+    The table layout is detected once from the header page; later pages are
+    extracted with its explicit column positions (see detect_table_template)
+    and only fall back to auto-detection when they don't fit. The repeated
+    title/header rows are skipped on templated pages.
+
+    Pages are split in ``chunk_size`` ranges; each worker process is replaced
+    after ``max_tasks_per_worker`` ranges to bound its memory on long PDFs.
+    ``workers=1`` extracts in-process.
+    """
+    results = {}
+    template = None
+    first = 0
     with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            for table in page.extract_tables():
-                cleaned = [row for row in table if row and any(c and c.strip() for c in row)]
-                all_rows.extend(cleaned)
+        n_pages = len(pdf.pages)
+        # Pages up to (and including) the header page use auto-detection
+        while first < min(n_pages, 3) and template is None:
+            page = pdf.pages[first]
+            template = detect_table_template(page)
+            results[first] = _clean_table_rows(page.extract_tables())
+            page.close()
+            first += 1
+    if template is None:
+        print("  Table template not found; using auto-detection on every page")
+
+    ranges = [(start, min(start + chunk_size, n_pages)) for start in range(first, n_pages, chunk_size)]
+    workers = workers or min(os.cpu_count() or 1, len(ranges)) or 1
+
+    pages_done = first
+    if workers == 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            results[start] = _extract_page_range(file_path, start, end, template)[1]
+            pages_done += end - start
+            print(f"  Extracted pages {pages_done}/{n_pages}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 max_tasks_per_child=max_tasks_per_worker) as pool:
+            futures = {pool.submit(_extract_page_range, file_path, start, end, template): end - start
+                       for start, end in ranges}
+            for future in as_completed(futures):
+                start, rows = future.result()
+                results[start] = rows
+                pages_done += futures[future]
+                print(f"  Extracted pages {pages_done}/{n_pages}")
+
+    return [row for start in sorted(results) for row in results[start]]
+
+
+def extract_pdf_dataframe(file_path: str, workers: int = None) -> pd.DataFrame:
+    """Extract table from PDF (pre-2022 format)."""
+    all_rows = extract_pdf_rows(file_path, workers=workers)
 
     if not all_rows:
         raise ValueError("No table found in PDF.")
 
     header_idx = 0
     for i, row in enumerate(all_rows[:20]):
-        row_str = ' '.join(str(c).upper() for c in row if c)
-        if 'PARLAMENTAR' in row_str and any(k in row_str for k in ['VALOR', 'MUNICÍPIO', 'BENEFICI']):
+        if _is_header_row(row):
             header_idx = i
             break
 
@@ -109,34 +239,56 @@ def extract_pdf_dataframe(file_path: str) -> pd.DataFrame:
             if not any(k in ' '.join(str(c).upper() for c in r if c)
                        for k in ['PARLAMENTAR', 'EMENDAS IMPOSITIVAS'])]
 
-    df = pd.DataFrame(data, columns=header)
-    pdf_mapper = {}
-    for col in df.columns:
-        if 'PARLAMENTAR' in col: pdf_mapper[col] = 'nome'
-        elif 'BENEFICIÁRIO' in col or 'BENEFICIARIO' in col: pdf_mapper[col] = 'orgao'
-        elif 'MUNICÍPIO' in col or 'MUNICIPIO' in col: pdf_mapper[col] = 'municipio'
-        elif 'OBJETO' in col: pdf_mapper[col] = 'objeto'
-        elif 'VALOR' in col: pdf_mapper[col] = 'valor'
-        elif 'STATUS' in col: pdf_mapper[col] = 'status'
-    df = df.rename(columns=pdf_mapper)
+    df = rename_columns(pd.DataFrame(data, columns=header), 'alesp_pdf')
     for col in ['partido', 'codigo', 'data', 'funcao']:
         if col not in df.columns:
             df[col] = None
-    if 'nome' in df.columns:
-        df['nome'] = df['nome'].astype(str).str.strip()
-    if 'valor' in df.columns:
-        df['valor_num'] = df['valor'].apply(parse_moeda)
-    if 'status' in df.columns:
-        df['pago_flag'] = df['status'].astype(str).str.lower().str.contains('pago')
+    return apply_column_map(df, {})
+
+
+def _csv_encoding(file_path: str) -> str:
+    """'utf-8' if the whole file decodes as UTF-8, else 'latin-1' (read in blocks)."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                decoder.decode(block)
+            decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return 'latin-1'
+    return 'utf-8'
+
+
+def iter_file_chunks(file_path: str, chunk_rows: int = 5000):
+    """Yield normalized DataFrame chunks of an XLSX or CSV file.
+
+    The file is streamed (openpyxl read-only / read_csv chunks) and the column
+    mapping is computed once from the header, so memory depends on
+    ``chunk_rows`` rather than on the file size. .xls files can't be streamed
+    and come out as a single chunk.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.xlsx':
+        frames = iter_xlsx_frames(file_path, chunk_rows=chunk_rows)
+    elif ext == '.xls':
+        frames = iter([pd.read_excel(file_path)])
+    elif ext == '.csv':
+        frames = pd.read_csv(file_path, encoding=_csv_encoding(file_path), chunksize=chunk_rows)
     else:
-        df['pago_flag'] = False
-    return df
+        raise ValueError(f"Unsupported file type for streaming: {ext}")
+    col_mapper = None
+    for frame in frames:
+        if col_mapper is None:
+            col_mapper = resolve_columns(frame.columns, 'portal_xlsx')
+        yield apply_column_map(frame, col_mapper)
 
 
-def load_file(file_path: str) -> pd.DataFrame:
+def load_file(file_path: str, workers: int = None) -> pd.DataFrame:
     """Load XLSX, XLS, CSV, or PDF and return a normalized DataFrame."""
     ext = os.path.splitext(file_path)[1].lower()
-    if ext in ('.xlsx', '.xls'):
+    if ext == '.xlsx':
+        return process_dataframe(read_xlsx(file_path))
+    elif ext == '.xls':
         df = pd.read_excel(file_path)
         return process_dataframe(df)
     elif ext == '.csv':
@@ -146,7 +298,7 @@ def load_file(file_path: str) -> pd.DataFrame:
             df = pd.read_csv(file_path, encoding='latin-1')
         return process_dataframe(df)
     elif ext == '.pdf':
-        return extract_pdf_dataframe(file_path)
+        return extract_pdf_dataframe(file_path, workers=workers)
     else:
         raise ValueError(f"Unsupported file type: {ext}")
 
@@ -154,9 +306,16 @@ def load_file(file_path: str) -> pd.DataFrame:
 def detect_ano(df: pd.DataFrame, filename: str) -> int:
     """Detect year from DataFrame ANO column or filename."""
     ano_cols = [c for c in df.columns if str(c).upper() == 'ANO']
-    if ano_cols:
+    counts = Counter(df[ano_cols[0]].dropna().tolist()) if ano_cols else Counter()
+    return detect_ano_from_counts(counts, filename)
+
+
+def detect_ano_from_counts(counts: Counter, filename: str) -> int:
+    """Most common ANO value (smallest on ties, like Series.mode) or the filename."""
+    if counts:
+        top = max(counts.values())
         try:
-            return int(df[ano_cols[0]].mode().iloc[0])
+            return int(sorted(v for v, n in counts.items() if n == top)[0])
         except Exception:
             pass
     base = os.path.splitext(os.path.basename(filename))[0]
@@ -169,42 +328,151 @@ def detect_ano(df: pd.DataFrame, filename: str) -> int:
 
 def build_rows(df: pd.DataFrame, ano: int) -> list:
     """Convert DataFrame to list of dicts ready for Supabase insert."""
-    rows = []
-    for _, row in df.iterrows():
-        nome = str(row.get('nome', '')).strip()
-        if not nome:
-            continue
-        rows.append(normalize_deputado_row(row.to_dict(), ano=ano))
-    return rows
+    return normalize_deputado_frame(df, ano)
 
 
-def ingest(file_path: str, dry_run: bool = False):
-    df = load_file(file_path)
-    ano = detect_ano(df, file_path)
-    rows = build_rows(df, ano)
+def count_rejects(df: pd.DataFrame) -> Counter:
+    """Rows build_rows drops (empty nome) or degrades (unreadable valor → 0), by reason."""
+    rejects = Counter()
+    if 'nome' not in df.columns:
+        rejects['missing_nome_column'] = len(df)
+    else:
+        rejects['empty_nome'] = int((df['nome'].astype(str).str.strip() == '').sum())
+    if 'valor' in df.columns:
+        rejects['invalid_valor'] = count_invalid_moeda(df['valor'])
+    return rejects
 
-    print(f"Loaded {len(rows)} rows for ano={ano} from '{file_path}'")
+
+def scan_file(file_path: str, chunk_rows: int = 5000, rejects: Counter = None) -> tuple:
+    """First streaming pass: (row count, ANO value counts, codigo counts).
+
+    Reject counts (see count_rejects) are added to ``rejects`` when given.
+    """
+    total, anos, codigos = 0, Counter(), Counter()
+    for chunk in iter_file_chunks(file_path, chunk_rows):
+        if rejects is not None:
+            rejects.update(count_rejects(chunk))
+        ano_cols = [c for c in chunk.columns if str(c).upper() == 'ANO']
+        if ano_cols:
+            anos.update(chunk[ano_cols[0]].dropna().tolist())
+        rows = normalize_deputado_frame(chunk, ano=0)
+        codigos.update(r['codigo'] for r in rows if r.get('codigo'))
+        total += len(rows)
+    return total, anos, codigos
+
+
+def iter_streamed_rows(file_path: str, ano: int, codigos: Counter, chunk_rows: int = 5000):
+    """Second streaming pass: fingerprinted emendas rows, one chunk at a time."""
+    codigos = Counter({('deputado', ano, codigo): n for codigo, n in codigos.items()})
+    seen = Counter()
+    for chunk in iter_file_chunks(file_path, chunk_rows):
+        yield from add_fingerprints(normalize_deputado_frame(chunk, ano), codigos=codigos, seen=seen)
+
+
+def ingest_stream(file_path: str, dry_run: bool = False, chunk_rows: int = 5000,
+                  write_workers: int = 4, copy_format: str = None, report: RunReport = None):
+    """Memory-bounded ingest of a large XLSX/CSV: the file is read twice in chunks.
+
+    The first pass finds the year and the codigo counts the fingerprints need;
+    the second streams rows straight into COPY or the staging-table swap, so
+    reading, normalizing and writing are profiled as one 'load' stage. Rows
+    keep the file's order, so the staging checkpoint is keyed by the file's
+    hash (plus ano and parser version) instead of a digest of every row.
+    """
+    report = report or RunReport('ingest_deputados', file=file_path)
+    with report.stage('scan') as stage:
+        total, anos, codigos = scan_file(file_path, chunk_rows, rejects=report.rejects)
+        source_hash = parse_cache.file_hash(file_path)
+        stage['rows_out'] = total
+    ano = detect_ano_from_counts(anos, file_path)
+    report.context['ano'] = ano
+    print(f"Streaming {total} rows for ano={ano} from '{file_path}' in chunks of {chunk_rows}")
 
     if dry_run:
         print("[dry-run] Skipping database write.")
         return
 
+    rows = iter_streamed_rows(file_path, ano, codigos, chunk_rows)
+    if copy_format:
+        with report.stage('load', rows_in=total) as stage:
+            stage['rows_out'] = copy_load('deputado', ano, rows, fmt=copy_format)
+        print(f"Done. Replaced deputado rows for ano={ano} via COPY.")
+        return
+
     client = get_supabase_client()
-    client.table('emendas').delete().eq('tipo', 'deputado').eq('ano', ano).execute()
-    print(f"Deleted existing deputado rows for ano={ano}")
+    with report.stage('load', rows_in=total) as stage:
+        run_id = hashlib.sha256(f"{source_hash}:{ano}:{PARSER_VERSION}".encode('utf-8')).hexdigest()
+        stage['rows_out'] = swap_year(client, 'deputado', ano, rows, run_id=run_id, max_workers=write_workers)
+    print(f"Done (swap). Replaced deputado rows for ano={ano}.")
 
-    batch_size = 500
-    for i in range(0, len(rows), batch_size):
-        batch = rows[i:i + batch_size]
-        client.table('emendas').insert(batch).execute()
-        print(f"  Inserted batch {i // batch_size + 1} ({len(batch)} rows)")
 
-    print(f"Done. Total inserted: {len(rows)} rows.")
+def parse_file(file_path: str, workers: int = None, use_cache: bool = True,
+               report: RunReport = None) -> tuple:
+    """Parse one file (through the parse cache) and return (ano, rows)."""
+    report = report or RunReport('ingest_deputados', file=file_path)
+    with report.stage('parse') as stage:
+        df = parse_cache.cached(file_path, PARSER_VERSION, lambda p: load_file(p, workers=workers),
+                                use_cache=use_cache)
+        stage['rows_out'] = len(df)
+    ano = detect_ano(df, file_path)
+    report.context['ano'] = ano
+    with report.stage('normalize', rows_in=len(df)) as stage:
+        report.add_rejects(count_rejects(df))
+        rows = build_rows(df, ano)
+        stage['rows_out'] = len(rows)
+    return ano, rows
+
+
+def ingest(file_path: str, dry_run: bool = False, workers: int = None, use_cache: bool = True,
+           full_reload: bool = False, write_workers: int = 4,
+           copy_format: str = None, report: RunReport = None):
+    report = report or RunReport('ingest_deputados', file=file_path)
+    ano, rows = parse_file(file_path, workers=workers, use_cache=use_cache, report=report)
+
+    print(f"Loaded {len(rows)} rows for ano={ano} from '{file_path}'")
+
+    if dry_run:
+        print("[dry-run] Skipping database write.")
+        return
+
+    with report.stage('write', rows_in=len(rows)) as stage:
+        stats = write_rows('deputado', ano, rows, copy_format=copy_format, full_reload=full_reload,
+                           write_workers=write_workers)
+        stage.update(stats)
+        stage['rows_out'] = stats['inserted'] + stats['updated'] + stats['unchanged']
+    if stats['mode'] == 'copy':
+        print(f"Done. Replaced deputado rows for ano={ano} via COPY.")
+    else:
+        print(f"Done ({stats['mode']}). Inserted {stats['inserted']}, updated {stats['updated']}, "
+              f"deleted {stats['deleted']}, unchanged {stats['unchanged']} rows.")
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Ingest deputados data into Supabase')
     parser.add_argument('file', help='Path to XLSX, XLS, CSV, or PDF file')
     parser.add_argument('--dry-run', action='store_true', help='Parse only, do not write to DB')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes for PDF page extraction (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Re-parse the file even if it is in the parse cache')
+    parser.add_argument('--full-reload', action='store_true',
+                        help='Rebuild the whole year through the staging table')
+    parser.add_argument('--write-workers', type=int, default=4,
+                        help='Batches written to Supabase in parallel')
+    parser.add_argument('--copy', nargs='?', const='binary', choices=['binary', 'csv'], default=None,
+                        help='Load straight into Postgres ($DATABASE_URL) with COPY instead of the API')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read XLSX/CSV in chunks with bounded memory (replaces the year; no parse cache)')
+    parser.add_argument('--chunk-rows', type=int, default=5000, help='Rows per chunk with --stream')
+    add_report_arguments(parser)
     args = parser.parse_args()
-    ingest(args.file, dry_run=args.dry_run)
+    report = RunReport('ingest_deputados', file=args.file, stream=args.stream, dry_run=args.dry_run,
+                       copy=args.copy)
+    with report.run(args.report, summary=args.summary, metrics_path=args.metrics):
+        if args.stream:
+            ingest_stream(args.file, dry_run=args.dry_run, chunk_rows=args.chunk_rows,
+                          write_workers=args.write_workers, copy_format=args.copy, report=report)
+        else:
+            ingest(args.file, dry_run=args.dry_run, workers=args.workers, use_cache=not args.no_cache,
+                   full_reload=args.full_reload, write_workers=args.write_workers,
+                   copy_format=args.copy, report=report)
@@ -4,17 +4,23 @@ Ingestion script for Vereadores de SP (XML API).
 Usage:
     python scripts/ingest_vereadores.py --ano 2024
     python scripts/ingest_vereadores.py --ano 2024 --dry-run
+    python scripts/ingest_vereadores.py --ano 2024 --dry-run --replay
+    python scripts/ingest_vereadores.py --ano 2024 --dry-run --summary
 """
 import sys
 import os
 import argparse
+from collections import Counter
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import requests
 from dotenv import load_dotenv
-from scripts.db_utils import get_supabase_client, normalize_vereador_row
+from scripts.db_utils import normalize_vereador_row, write_rows
+from scripts.column_mapping import map_record
+from scripts.http_cache import HttpCache
+from scripts.run_report import RunReport, add_report_arguments
 
 load_dotenv()
 
@@ -22,110 +28,197 @@ load_dotenv()
 _NS = {'ns': 'http://saeows.saopaulo.sp.leg.br/'}
 
 
+def _slices(chunks, size: int):
+    for chunk in chunks:
+        for i in range(0, len(chunk), size):
+            yield chunk[i:i + size]
+
+
+def iter_xml_rows(chunks, feed_size: int = 64 * 1024):
+    """Yield each ns:Linha of a PMSP XML response as a dict, parsing incrementally.
+
+    ``chunks`` is any iterable of bytes (e.g. a response being downloaded); it
+    is fed to the parser ``feed_size`` bytes at a time. Every Linha is dropped
+    from the tree as soon as it is yielded, so memory stays constant whatever
+    the size of the response.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    linha_tag = f'{{{_NS["ns"]}}}Linha'
+    prefix = f'{{{_NS["ns"]}}}'
+    root, depth = None, 0
+    for piece in _slices(chunks, feed_size):
+        parser.feed(piece)
+        for event, elem in parser.read_events():
+            if event == 'start':
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+            depth -= 1
+            # Only direct children of the root, like root.findall('ns:Linha')
+            if depth == 1 and elem.tag == linha_tag:
+                yield {child.tag.replace(prefix, ''): child.text for child in elem}
+            if depth == 1:
+                # Drop every finished child of the root in one go: root.remove(elem)
+                # searches the child list, which is quadratic when a large body
+                # arrives in few chunks and many Linhas pile up between reads
+                root.clear()
+    parser.close()
+
+
 def _parse_xml_rows(content: bytes) -> list:
     """Parse PMSP XML response into a list of dicts."""
-    root = ET.fromstring(content)
-    rows = []
-    for linha in root.findall('ns:Linha', _NS):
-        row = {}
-        for child in linha:
-            tag = child.tag.replace(f'{{{_NS["ns"]}}}', '')
-            row[tag] = child.text
-        rows.append(row)
-    return rows
+    return list(iter_xml_rows([content]))
 
 
-def fetch_vereadores(ano: int) -> dict:
-    """Fetch vereador ID→{nome, partido} mapping for the given year."""
-    base_url = os.environ["VEREADORES_API_URL"]
-    # The Vereadores endpoint is at the same base, replacing the last path segment
-    url = base_url.rsplit('/', 1)[0] + '/Vereadores'
-    response = requests.post(
-        url,
-        data={"exercicio": str(ano)},
-        headers={"Content-Type": "application/x-www-form-urlencoded"},
-        timeout=60,
-    )
-    response.raise_for_status()
-    rows = _parse_xml_rows(response.content)
-    # Map: ID (Numero) → {nome, partido}
-    return {
-        row['Numero']: {
-            'nome': row.get('Nome') or row.get('Apelido') or '',
-            'partido': row.get('Partido') or '',
-        }
-        for row in rows if row.get('Numero')
-    }
-
-
-def fetch_emendas_valores(ano: int) -> dict:
-    """Fetch amendment values from the Emendas API. Returns NUM_EMENDA → {valor, funcao}."""
+def _post(endpoint: str, ano: int, timeout: float, http=None):
+    """Stream the response of a PMSP endpoint for the exercise year through the HTTP cache."""
     base_url = os.environ["VEREADORES_API_URL"]
-    url = base_url.rsplit('/', 1)[0] + '/Emendas'
-    response = requests.post(
+    # The other endpoints are at the same base, replacing the last path segment
+    url = base_url if endpoint is None else base_url.rsplit('/', 1)[0] + '/' + endpoint
+    key = f"{url.rsplit('/', 1)[-1]}-{ano}"
+    return (http or HttpCache()).stream(
         url,
         data={"exercicio": str(ano)},
+        key=key,
         headers={"Content-Type": "application/x-www-form-urlencoded"},
-        timeout=120,
+        timeout=timeout,
     )
-    response.raise_for_status()
-    rows = _parse_xml_rows(response.content)
+
+
+def vereadores_map(rows) -> dict:
+    """Vereador ID (Numero) → {nome, partido} from Vereadores rows, as they arrive."""
+    vereadores = {}
+    for row in rows:
+        row = map_record(row, 'pmsp_vereadores')
+        if row.get('id'):
+            vereadores[row['id']] = {
+                'nome': row.get('nome') or row.get('apelido') or '',
+                'partido': row.get('partido') or '',
+            }
+    return vereadores
+
+
+def valores_map(rows) -> dict:
+    """NUM_EMENDA → {valor, funcao} from Emendas rows, as they arrive."""
     # Sum values per NUM_EMENDA (same emenda can have multiple dotações)
     valor_map = {}
     for row in rows:
-        num = row.get('NUM_EMENDA', '')
-        val = float(row.get('VAL_DOTA_EMD', 0) or 0)
-        funcao = row.get('COD_FCAO_GOVR', '')
+        row = map_record(row, 'pmsp_emendas')
+        num = row.get('codigo', '')
+        val = float(row.get('valor', 0) or 0)
+        funcao = row.get('funcao', '')
         if num not in valor_map:
             valor_map[num] = {'valor': 0.0, 'funcao': funcao}
         valor_map[num]['valor'] += val
     return valor_map
 
 
-def fetch_data(ano: int) -> list:
+def fetch_vereadores(ano: int, http=None) -> dict:
+    """Fetch vereador ID→{nome, partido} mapping for the given year."""
+    return vereadores_map(iter_xml_rows(_post('Vereadores', ano, timeout=60, http=http)))
+
+
+def fetch_emendas_valores(ano: int, http=None) -> dict:
+    """Fetch amendment values from the Emendas API. Returns NUM_EMENDA → {valor, funcao}."""
+    return valores_map(iter_xml_rows(_post('Emendas', ano, timeout=120, http=http)))
+
+
+def fetch_data(ano: int, http=None) -> list:
     """Fetch vereadores amendment data from the PMSP XML API."""
-    base_url = os.environ["VEREADORES_API_URL"]
-    response = requests.post(
-        base_url,
-        data={"exercicio": str(ano)},
-        headers={"Content-Type": "application/x-www-form-urlencoded"},
-        timeout=120,
-    )
-    response.raise_for_status()
-    return _parse_xml_rows(response.content)
+    return list(iter_xml_rows(_post(None, ano, timeout=120, http=http)))
+
+
+def enrich_row(item: dict, ano: int, vereadores: dict, valores: dict):
+    """Emendas row for one raw XML Linha, or None when it has no Numero."""
+    if not item.get('Numero'):
+        return None
+    # Enrich with vereador name and partido
+    vid = item.get('Vereador', '')
+    info = vereadores.get(vid, {})
+    item['_nome'] = info.get('nome', f'Vereador {vid}')
+    item['_partido'] = info.get('partido')
+    # Enrich with valor and funcao from Emendas API
+    num = item.get('Numero', '')
+    val_info = valores.get(num, {})
+    item['_valor'] = val_info.get('valor', 0.0)
+    item['_funcao'] = val_info.get('funcao')
+    return normalize_vereador_row(item, ano=ano)
 
 
 def build_rows(raw: list, ano: int, vereadores: dict, valores: dict) -> list:
     """Convert raw XML rows to list of dicts for Supabase insert."""
     rows = []
     for item in raw:
-        if not item.get('Numero'):
-            continue
-        # Enrich with vereador name and partido
-        vid = item.get('Vereador', '')
-        info = vereadores.get(vid, {})
-        item['_nome'] = info.get('nome', f'Vereador {vid}')
-        item['_partido'] = info.get('partido')
-        # Enrich with valor and funcao from Emendas API
-        num = item.get('Numero', '')
-        val_info = valores.get(num, {})
-        item['_valor'] = val_info.get('valor', 0.0)
-        item['_funcao'] = val_info.get('funcao')
-        rows.append(normalize_vereador_row(item, ano=ano))
+        row = enrich_row(item, ano, vereadores, valores)
+        if row is not None:
+            rows.append(row)
     return rows
 
 
-def ingest(ano: int, dry_run: bool = False):
-    print(f"Fetching vereadores list for ano={ano}...")
-    vereadores = fetch_vereadores(ano)
-    print(f"Found {len(vereadores)} vereadores")
+def reject_reasons(item: dict, vereadores: dict, valores: dict) -> list:
+    """Why enrich_row drops (no Numero) or only partly enriches ``item``."""
+    if not item.get('Numero'):
+        return ['missing_numero']
+    reasons = []
+    if item.get('Vereador', '') not in vereadores:
+        reasons.append('unknown_vereador')
+    if item['Numero'] not in valores:
+        reasons.append('missing_valor')
+    return reasons
 
-    print(f"Fetching emendas values for ano={ano}...")
-    valores = fetch_emendas_valores(ano)
-    print(f"Found values for {len(valores)} emendas")
 
-    raw = fetch_data(ano)
-    rows = build_rows(raw, ano, vereadores, valores)
+def count_rejects(raw: list, vereadores: dict, valores: dict) -> Counter:
+    """Rows build_rows drops (no Numero) or only partly enriches, by reason."""
+    rejects = Counter()
+    for item in raw:
+        rejects.update(reject_reasons(item, vereadores, valores))
+    return rejects
+
+
+def iter_rows(ano: int, vereadores: dict, valores: dict, http=None, rejects: Counter = None):
+    """Stream EmendasVereadores and yield each enriched row as it comes off the response.
+
+    Raw Linhas are never collected: each is enriched from the lookup maps and
+    dropped, so memory holds the output rows only. Reject reasons are added to
+    ``rejects`` when given.
+    """
+    for item in iter_xml_rows(_post(None, ano, timeout=120, http=http)):
+        if rejects is not None:
+            rejects.update(reject_reasons(item, vereadores, valores))
+        row = enrich_row(item, ano, vereadores, valores)
+        if row is not None:
+            yield row
+
+
+def fetch_rows(ano: int, http=None, report: RunReport = None) -> list:
+    """Fetch and enrich every vereador emenda of ``ano``.
+
+    The two lookup endpoints (Vereadores, Emendas) are requested concurrently
+    over one pooled session and reduced to their maps; then EmendasVereadores
+    is streamed and enriched row by row. Download, XML parsing and enrichment
+    of that stream overlap, so they are profiled as one 'fetch' stage.
+    """
+    http = http or HttpCache()
+    report = report or RunReport('ingest_vereadores', ano=ano)
+    print(f"Fetching vereadores and emendas values for ano={ano}...")
+    with report.stage('lookups') as stage:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            vereadores = pool.submit(fetch_vereadores, ano, http)
+            valores = pool.submit(fetch_emendas_valores, ano, http)
+            vereadores, valores = vereadores.result(), valores.result()
+        stage.update(vereadores=len(vereadores), emendas_valores=len(valores))
+    print(f"Found {len(vereadores)} vereadores and values for {len(valores)} emendas; streaming emendas...")
+    with report.stage('fetch') as stage:
+        rows = list(iter_rows(ano, vereadores, valores, http, rejects=report.rejects))
+        stage['rows_out'] = len(rows)
+    return rows
+
+
+def ingest(ano: int, dry_run: bool = False, full_reload: bool = False, write_workers: int = 4,
+           copy_format: str = None, http_mode: str = 'default', report: RunReport = None):
+    report = report or RunReport('ingest_vereadores', ano=ano)
+    rows = fetch_rows(ano, http=HttpCache(mode=http_mode), report=report)
 
     print(f"Fetched {len(rows)} rows for ano={ano}")
 
@@ -136,22 +229,38 @@ def ingest(ano: int, dry_run: bool = False):
         print("[dry-run] Skipping database write.")
         return
 
-    client = get_supabase_client()
-    client.table('emendas').delete().eq('tipo', 'vereador').eq('ano', ano).execute()
-    print(f"Deleted existing vereador rows for ano={ano}")
-
-    batch_size = 500
-    for i in range(0, len(rows), batch_size):
-        batch = rows[i:i + batch_size]
-        client.table('emendas').insert(batch).execute()
-        print(f"  Inserted batch {i // batch_size + 1} ({len(batch)} rows)")
-
-    print(f"Done. Total inserted: {len(rows)} rows.")
+    with report.stage('write', rows_in=len(rows)) as stage:
+        stats = write_rows('vereador', ano, rows, copy_format=copy_format, full_reload=full_reload,
+                           write_workers=write_workers)
+        stage.update(stats)
+        stage['rows_out'] = stats['inserted'] + stats['updated'] + stats['unchanged']
+    if stats['mode'] == 'copy':
+        print(f"Done. Replaced vereador rows for ano={ano} via COPY.")
+    else:
+        print(f"Done ({stats['mode']}). Inserted {stats['inserted']}, updated {stats['updated']}, "
+              f"deleted {stats['deleted']}, unchanged {stats['unchanged']} rows.")
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Ingest vereadores data into Supabase')
     parser.add_argument('--ano', type=int, required=True, help='Year to fetch (e.g. 2024)')
     parser.add_argument('--dry-run', action='store_true', help='Fetch only, do not write to DB')
+    parser.add_argument('--full-reload', action='store_true',
+                        help='Rebuild the whole year through the staging table')
+    parser.add_argument('--write-workers', type=int, default=4,
+                        help='Batches written to Supabase in parallel')
+    parser.add_argument('--copy', nargs='?', const='binary', choices=['binary', 'csv'], default=None,
+                        help='Load straight into Postgres ($DATABASE_URL) with COPY instead of the API')
+    cache_mode = parser.add_mutually_exclusive_group()
+    cache_mode.add_argument('--replay', action='store_const', const='replay', dest='http_mode',
+                            help='Serve the recorded API responses only (offline)')
+    cache_mode.add_argument('--refresh', action='store_const', const='refresh', dest='http_mode',
+                            help='Download again, ignoring ETag/Last-Modified validators')
+    parser.set_defaults(http_mode='default')
+    add_report_arguments(parser)
     args = parser.parse_args()
-    ingest(args.ano, dry_run=args.dry_run)
+    report = RunReport('ingest_vereadores', ano=args.ano, dry_run=args.dry_run, copy=args.copy,
+                       http_mode=args.http_mode)
+    with report.run(args.report, summary=args.summary, metrics_path=args.metrics):
+        ingest(args.ano, dry_run=args.dry_run, full_reload=args.full_reload, write_workers=args.write_workers,
+               copy_format=args.copy, http_mode=args.http_mode, report=report)
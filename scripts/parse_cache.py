@@ -0,0 +1,161 @@
+"""
+Content-hash parse cache for the ingest scripts.
+
+Normalized DataFrames are stored as Parquet under ``PARSE_CACHE_DIR``
+(default ``.cache/parse``), keyed by the SHA-256 of the source file and the
+parser version, so re-running an ingest on an unchanged file skips
+pdfplumber/openpyxl entirely. Bump the parser's version constant whenever the
+parsing output changes.
+
+Usage:
+    python scripts/parse_cache.py list
+    python scripts/parse_cache.py purge --all
+    python scripts/parse_cache.py purge --older-than 30
+    python scripts/parse_cache.py purge --keep-version 3
+"""
+import sys
+import os
+import json
+import time
+import hashlib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+CACHE_DIR = os.environ.get(
+    'PARSE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'parse'),
+)
+
+
+def file_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of the file contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_paths(digest: str, version: int, cache_dir: str) -> tuple:
+    base = os.path.join(cache_dir, f"{digest}-v{version}")
+    return f"{base}.parquet", f"{base}.json"
+
+
+def load(file_path: str, version: int, cache_dir: str = CACHE_DIR, digest: str = None):
+    """Return the cached DataFrame for ``file_path`` or None."""
+    digest = digest or file_hash(file_path)
+    parquet_path, _ = _entry_paths(digest, version, cache_dir)
+    if not os.path.exists(parquet_path):
+        return None
+    try:
+        return pd.read_parquet(parquet_path)
+    except Exception as e:
+        print(f"[parse-cache] Ignorando entrada corrompida {parquet_path}: {e}")
+        return None
+
+
+def store(file_path: str, version: int, df: pd.DataFrame, cache_dir: str = CACHE_DIR,
+          digest: str = None) -> bool:
+    """Write ``df`` to the cache. Returns False when it can't be stored as Parquet."""
+    digest = digest or file_hash(file_path)
+    parquet_path, meta_path = _entry_paths(digest, version, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp, index=False)
+    except Exception as e:
+        # e.g. mixed-type object columns or non-string headers
+        print(f"[parse-cache] Não foi possível guardar '{file_path}' em Parquet: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    os.replace(tmp, parquet_path)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'source': os.path.abspath(file_path),
+            'sha256': digest,
+            'version': version,
+            'rows': len(df),
+            'created_at': time.time(),
+        }, f, ensure_ascii=False)
+    return True
+
+
+def cached(file_path: str, version: int, loader, cache_dir: str = CACHE_DIR, use_cache: bool = True):
+    """Return ``loader(file_path)``, served from / saved to the parse cache."""
+    if not use_cache:
+        return loader(file_path)
+    digest = file_hash(file_path)
+    df = load(file_path, version, cache_dir, digest=digest)
+    if df is not None:
+        print(f"[parse-cache] Hit for '{os.path.basename(file_path)}' ({digest[:12]}, v{version})")
+        return df
+    df = loader(file_path)
+    store(file_path, version, df, cache_dir, digest=digest)
+    return df
+
+
+def list_entries(cache_dir: str = CACHE_DIR) -> list:
+    """Return metadata dicts for every cached entry, newest first."""
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.json'):
+            continue
+        meta_path = os.path.join(cache_dir, name)
+        parquet_path = meta_path[:-len('.json')] + '.parquet'
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta['path'] = parquet_path
+        meta['bytes'] = os.path.getsize(parquet_path) if os.path.exists(parquet_path) else 0
+        entries.append(meta)
+    return sorted(entries, key=lambda m: m.get('created_at', 0), reverse=True)
+
+
+def purge(cache_dir: str = CACHE_DIR, older_than_days: float = None, keep_version: int = None,
+          purge_all: bool = False) -> int:
+    """Delete matching entries and return how many were removed."""
+    removed = 0
+    now = time.time()
+    for meta in list_entries(cache_dir):
+        too_old = older_than_days is not None and now - meta.get('created_at', 0) > older_than_days * 86400
+        stale = keep_version is not None and meta.get('version') != keep_version
+        if purge_all or too_old or stale:
+            for path in (meta['path'], meta['path'][:-len('.parquet')] + '.json'):
+                if os.path.exists(path):
+                    os.remove(path)
+            removed += 1
+    return removed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Inspect or purge the ingest parse cache')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Cache directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='List cached entries')
+    purge_parser = sub.add_parser('purge', help='Delete cached entries')
+    purge_parser.add_argument('--all', action='store_true', help='Delete every entry')
+    purge_parser.add_argument('--older-than', type=float, help='Delete entries older than N days')
+    purge_parser.add_argument('--keep-version', type=int, help='Delete entries from other parser versions')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        entries = list_entries(args.cache_dir)
+        for meta in entries:
+            created = time.strftime('%Y-%m-%d %H:%M', time.localtime(meta.get('created_at', 0)))
+            print(f"{meta['sha256'][:12]}  v{meta['version']}  {meta['rows']:>8} rows  "
+                  f"{meta['bytes'] / 1024:>8.1f} KiB  {created}  {meta['source']}")
+        print(f"{len(entries)} entries in '{args.cache_dir}'")
+    else:
+        if not (args.all or args.older_than is not None or args.keep_version is not None):
+            parser.error('purge needs --all, --older-than or --keep-version')
+        n = purge(args.cache_dir, older_than_days=args.older_than,
+                  keep_version=args.keep_version, purge_all=args.all)
+        print(f"Removed {n} entries.")
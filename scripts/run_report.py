@@ -0,0 +1,166 @@
+"""
+Per-stage profiling of an ingest run.
+
+Each stage (download, parse, normalize, write...) records its wall time, CPU
+time (this process plus finished child processes, e.g. the PDF page workers),
+rows in/out and the peak RSS of the process when it ended. Rows dropped or
+degraded along the way are counted by reason in ``rejects``.
+
+The report is written as JSON under ``INGEST_REPORT_DIR`` (default
+``.cache/ingest/reports``) and can also be appended as one line to a JSON Lines
+metrics file, to follow ingest performance across data years:
+
+    python scripts/ingest_deputados.py xlsx/2024.xlsx --summary --metrics .cache/ingest/metrics.jsonl
+"""
+import os
+import sys
+import json
+import time
+import socket
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Windows: sem getrusage, o pico de RSS não é medido
+    resource = None
+
+REPORT_DIR = os.environ.get(
+    'INGEST_REPORT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'ingest', 'reports'),
+)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def _cpu_seconds() -> float:
+    cpu = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu += children.ru_utime + children.ru_stime
+    return cpu
+
+
+class RunReport:
+    """Stages, reject counts and context of one ingest run."""
+
+    def __init__(self, script: str, **context):
+        self.script = script
+        self.context = dict(context)
+        self.stages = []
+        self.rejects = Counter()
+        self.status = 'running'
+        self.error = None
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._cpu_start = _cpu_seconds()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None):
+        """Time the block as stage ``name``.
+
+        Yields the stage dict: set ``rows_out`` (and any extra counters) on it
+        inside the block. A stage that raises is recorded as failed.
+        """
+        stage = {'name': name, 'rows_in': rows_in, 'rows_out': None}
+        start, cpu_start = time.perf_counter(), _cpu_seconds()
+        try:
+            yield stage
+        except BaseException:
+            stage['failed'] = True
+            raise
+        finally:
+            stage['wall_s'] = round(time.perf_counter() - start, 3)
+            stage['cpu_s'] = round(_cpu_seconds() - cpu_start, 3)
+            stage['peak_rss_mb'] = peak_rss_mb()
+            self.stages.append(stage)
+
+    def reject(self, reason: str, count: int = 1):
+        """Count ``count`` rows dropped or degraded for ``reason``."""
+        if count:
+            self.rejects[reason] += count
+
+    def add_rejects(self, counts: dict):
+        for reason, count in counts.items():
+            self.reject(reason, count)
+
+    def to_dict(self) -> dict:
+        return {
+            'script': self.script,
+            'host': socket.gethostname(),
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'status': self.status,
+            'error': self.error,
+            'context': self.context,
+            'wall_s': round(time.perf_counter() - self._start, 3),
+            'cpu_s': round(_cpu_seconds() - self._cpu_start, 3),
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': self.stages,
+            'rejects': dict(+self.rejects),
+        }
+
+    def write(self, path: str = None) -> str:
+        """Write the report as JSON (atomically) and return its path."""
+        if path is None:
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+            ano = self.context.get('ano')
+            path = os.path.join(REPORT_DIR, f"{self.script}{f'-{ano}' if ano else ''}-{stamp}.json")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp, path)
+        return path
+
+    def append_metrics(self, path: str):
+        """Append the report as one JSON line to the metrics file ``path``."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict(), ensure_ascii=False, default=str) + '\n')
+
+    def print_summary(self):
+        report = self.to_dict()
+        print()
+        print(f"{'stage':<14} {'wall s':>8} {'cpu s':>8} {'rows in':>9} {'rows out':>9} {'peak MiB':>9}")
+        for stage in self.stages:
+            cells = ['-' if stage.get(k) is None else stage[k] for k in ('rows_in', 'rows_out', 'peak_rss_mb')]
+            print(f"{stage['name'][:14]:<14} {stage['wall_s']:>8.2f} {stage['cpu_s']:>8.2f} "
+                  f"{cells[0]:>9} {cells[1]:>9} {cells[2]:>9}" + ('  FAILED' if stage.get('failed') else ''))
+        print(f"{'total':<14} {report['wall_s']:>8.2f} {report['cpu_s']:>8.2f}")
+        for reason, count in sorted((+self.rejects).items()):
+            print(f"  rejected {count} row(s): {reason}")
+
+    @contextmanager
+    def run(self, path: str = None, summary: bool = False, metrics_path: str = None):
+        """Wrap a whole run: the report is written (and summarized) even if it fails."""
+        try:
+            yield self
+            self.status = 'ok'
+        except BaseException as e:
+            self.status = 'failed'
+            self.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            written = self.write(path)
+            if metrics_path:
+                self.append_metrics(metrics_path)
+            if summary:
+                self.print_summary()
+            print(f"Run report: {written}")
+
+
+def add_report_arguments(parser):
+    """--report / --summary / --metrics options shared by the ingest CLIs."""
+    parser.add_argument('--report', default=None,
+                        help=f'Path of the JSON run report (default: under {REPORT_DIR})')
+    parser.add_argument('--summary', action='store_true', help='Print the per-stage profile at the end')
+    parser.add_argument('--metrics', default=os.environ.get('INGEST_METRICS_FILE'),
+                        help='Append the run report to this JSON Lines file ($INGEST_METRICS_FILE)')
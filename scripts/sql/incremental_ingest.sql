@@ -0,0 +1,42 @@
+-- Run this in Supabase Dashboard → SQL Editor, after create_table.sql
+-- Row fingerprints for diff-based ingest + staging table for atomic reloads
+
+alter table emendas add column if not exists natureza text;
+alter table emendas add column if not exists row_key  text;   -- natural key hash
+alter table emendas add column if not exists row_hash text;   -- content hash
+
+-- Constraints have no "if not exists"; guard it so the script can be rerun
+do $$
+begin
+  if not exists (select 1 from pg_constraint where conname = 'emendas_row_key_key') then
+    alter table emendas add constraint emendas_row_key_key unique (row_key);
+  end if;
+end;
+$$;
+
+-- Same shape as emendas; large reloads are written here first
+create table if not exists emendas_staging (like emendas including all);
+
+-- Replace every (tipo, ano) row with the staged ones in a single transaction,
+-- so readers never see an empty or half-loaded year.
+create or replace function swap_emendas_year(p_tipo text, p_ano integer)
+returns integer
+language plpgsql
+as $$
+declare
+  n integer;
+begin
+  delete from emendas where tipo = p_tipo and ano = p_ano;
+
+  insert into emendas (tipo, nome, partido, ano, municipio, funcao, beneficiario, objeto,
+                       codigo, status, natureza, data_pago, valor, pago, row_key, row_hash)
+  select tipo, nome, partido, ano, municipio, funcao, beneficiario, objeto,
+         codigo, status, natureza, data_pago, valor, pago, row_key, row_hash
+  from emendas_staging
+  where tipo = p_tipo and ano = p_ano;
+  get diagnostics n = row_count;
+
+  delete from emendas_staging where tipo = p_tipo and ano = p_ano;
+  return n;
+end;
+$$;
@@ -0,0 +1,240 @@
+"""
+Synthetic emendas sources for benchmarks and tests.
+
+Generates data shaped like the real inputs, at any size and reproducibly
+(``seed``):
+
+- ``make_portal_xlsx``: Portal da Transparência spreadsheet (XLSX 2023+ layout);
+- ``make_alesp_pdf``: ALESP-style tabular PDF (title and header rows repeated on
+  every page, ruled cells), written directly as PDF operators so no PDF library
+  is needed;
+- ``make_pmsp_xml``: PMSP XML API payloads (EmendasVereadores, Vereadores and
+  Emendas endpoints).
+
+Usage:
+    python scripts/synthetic_data.py xlsx /tmp/2024.xlsx --rows 50000
+    python scripts/synthetic_data.py pdf /tmp/2021.pdf --rows 5000
+    python scripts/synthetic_data.py xml /tmp/EmendasVereadores-2024.xml --rows 20000
+"""
+import os
+import argparse
+import random
+import textwrap
+from xml.sax.saxutils import escape
+
+from openpyxl import Workbook
+
+MUNICIPIOS = ['SÃO PAULO', 'CAMPINAS', 'SANTOS', 'SOROCABA', 'RIBEIRÃO PRETO', 'SÃO JOSÉ DOS CAMPOS',
+              'PIRACICABA', 'BAURU', 'MARÍLIA', 'FRANCA', 'APIAÍ', 'ARAPEÍ', 'NARANDIBA', 'CARAGUATATUBA',
+              'LUIZIÂNIA', 'MACEDÔNIA', 'ITAPEVA', 'REGISTRO', 'PRESIDENTE PRUDENTE', 'ARAÇATUBA']
+PARLAMENTARES = [('Ana Souza', 'PT'), ('Carlos Lima', 'PL'), ('Marina Alves', 'PSDB'),
+                 ('Roberto Dias', 'MDB'), ('Fernanda Rocha', 'PSOL'), ('João Pereira', 'UNIÃO'),
+                 ('Delegada Paula', 'PL'), ('Professor Hélio', 'PSB'), ('Tânia Costa', 'REPUBLICANOS'),
+                 ('Luiz Martins', 'PSD'), ('Beatriz Nunes', 'PODE'), ('Sérgio Ramos', 'PP')]
+FUNCOES = ['10 - SAUDE', '12 - EDUCACAO', '15 - URBANISMO', '08 - ASSISTENCIA SOCIAL',
+           '27 - DESPORTO E LAZER', '26 - TRANSPORTE', '28 - ENCARGOS ESPECIAIS', '04 - ADMINISTRACAO']
+OBJETOS = ['Custeio em saúde', 'Aquisição de ambulância para o Município', 'Transferência Especial',
+           'Recursos para melhorias nas instalações prediais', 'Aquisição de equipamentos e material '
+           'permanente', 'Pavimentação de vias urbanas', 'Reforma de unidade básica de saúde',
+           'Construção de quadra poliesportiva']
+ORGAOS = ['SAÚDE', 'SGRI', 'CULTURA', 'EDUCAÇÃO', 'DESENVOLVIMENTO SOCIAL', 'ESPORTES']
+ESTAGIOS = ['Pagas', 'Pagas', 'Pagas', 'Empenhadas', 'Aprovadas', 'Em análise']
+
+PORTAL_COLUMNS = ['MUNICÍPIO', 'ÓRGÃO PROCESSADOR', 'OBJETO', 'PARLAMENTAR', 'PARTIDO', 'ANO', 'CÓDIGO',
+                  'Primeira Fase Substituídas', 'NATUREZA', 'FUNÇÃO DE GOVERNO', 'BENEFICIÁRIO', 'ESTÁGIO',
+                  'DATA PAGAMENTO', 'VALOR DECISÃO', 'VALOR REMANEJADO']
+
+
+def _valor(rnd) -> float:
+    return float(rnd.choice([50_000, 100_000, 150_000, 200_000, 250_000, 300_000, 500_000])
+                 if rnd.random() < 0.7 else round(rnd.uniform(10_000, 2_000_000), 2))
+
+
+def portal_rows(n_rows: int, ano: int = 2024, seed: int = 42):
+    """Yield Portal da Transparência rows (lists in PORTAL_COLUMNS order)."""
+    rnd = random.Random(seed)
+    for i in range(n_rows):
+        nome, partido = rnd.choice(PARLAMENTARES)
+        municipio = rnd.choice(MUNICIPIOS)
+        estagio = rnd.choice(ESTAGIOS)
+        pago = estagio == 'Pagas'
+        yield [
+            municipio, rnd.choice(ORGAOS), rnd.choice(OBJETOS), nome, partido, str(ano),
+            f"{ano}.{rnd.randint(1, 200):03d}.{i:05d}", 'Não', 'Emenda LOA', rnd.choice(FUNCOES),
+            'PREF. MUNICIPAL' if rnd.random() < 0.6 else f"PREFEITURA MUNICIPAL DE {municipio}",
+            estagio, f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{ano % 100:02d}" if pago else None,
+            _valor(rnd), None,
+        ]
+
+
+def make_portal_xlsx(path: str, n_rows: int, ano: int = 2024, seed: int = 42) -> str:
+    """Write a Portal da Transparência XLSX with ``n_rows`` emendas."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(PORTAL_COLUMNS)
+    for row in portal_rows(n_rows, ano=ano, seed=seed):
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+# ── ALESP PDF ────────────────────────────────────────────────────────────────
+PDF_COLUMNS = [('PARLAMENTAR', 70), ('BENEFICIÁRIO', 110), ('MUNICÍPIO', 75), ('OBJETO', 105),
+               ('ÓRGÃO PROCESSADOR', 75), ('VALOR', 70), ('STATUS', 50)]
+_PAGE_W, _PAGE_H, _MARGIN, _FONT, _LEADING = 595, 842, 20, 6, 7
+
+
+def _brl(valor: float) -> str:
+    text = f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+    return f"R$ {text}"
+
+
+def alesp_rows(n_rows: int, seed: int = 42):
+    """Yield ALESP PDF body rows (lists in PDF_COLUMNS order)."""
+    rnd = random.Random(seed)
+    for _ in range(n_rows):
+        municipio = rnd.choice(MUNICIPIOS)
+        yield [rnd.choice(PARLAMENTARES)[0], f"PREFEITURA MUNICIPAL DE {municipio}", municipio,
+               rnd.choice(OBJETOS), 'Secretaria da Saúde', _brl(_valor(rnd)),
+               rnd.choice(['PAGA', 'PAGA', 'PAGA', 'EMPENHADA', 'EM ANÁLISE'])]
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode('cp1252', 'replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _wrap(text: str, width: float) -> list:
+    """Lines of ``text`` that fit ``width``, like the real PDFs' wrapped cells."""
+    # Upper-case Helvetica is up to ~0.7 em per character
+    return textwrap.wrap(text, max(int((width - 4) / (_FONT * 0.7)), 1)) or ['']
+
+
+def _row_height(cells: list) -> int:
+    return 5 + _LEADING * max(len(c) for c in cells)
+
+
+def _page_content(lines: list) -> bytes:
+    """Ruled table with one row per item of ``lines`` (each a list of wrapped cells)."""
+    xs = [_MARGIN]
+    for _, width in PDF_COLUMNS:
+        xs.append(xs[-1] + width)
+    ys = [_PAGE_H - _MARGIN]
+    for cells in lines:
+        ys.append(ys[-1] - _row_height(cells))
+
+    ops = [b'0.5 w']
+    # Rules: every row boundary spans the table; columns start below the title row
+    for y in ys:
+        ops.append(b'%d %d m %d %d l S' % (xs[0], y, xs[-1], y))
+    for i, x in enumerate(xs):
+        ops.append(b'%d %d m %d %d l S' % (x, ys[0] if i in (0, len(xs) - 1) else ys[1], x, ys[-1]))
+    for top, cells in zip(ys, lines):
+        for x, cell in zip(xs, cells):
+            for n, text in enumerate(cell, start=1):
+                if text:
+                    ops.append(b'BT /F1 %d Tf %d %d Td ' % (_FONT, x + 2, top - 1 - _LEADING * n)
+                               + _pdf_string(text) + b' Tj ET')
+    return b'\n'.join(ops)
+
+
+def make_alesp_pdf(path: str, n_rows: int, ano: int = 2021, seed: int = 42) -> str:
+    """Write an ALESP-style PDF table with ``n_rows`` emendas."""
+    # Every page repeats the title and header rows, then as many rows as fit
+    header = [[[f"EMENDAS IMPOSITIVAS {ano} - SAÚDE"]] + [[''] for _ in PDF_COLUMNS[1:]],
+              [[name] for name, _ in PDF_COLUMNS]]
+    room = _PAGE_H - 2 * _MARGIN - sum(_row_height(cells) for cells in header)
+    pages, page, used = [], [], 0
+    for row in alesp_rows(n_rows, seed=seed):
+        cells = [_wrap(cell, width) for cell, (_, width) in zip(row, PDF_COLUMNS)]
+        if page and used + _row_height(cells) > room:
+            pages.append(page)
+            page, used = [], 0
+        page.append(cells)
+        used += _row_height(cells)
+    pages.append(page)
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then (page, content) per page
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>']
+    kids = []
+    for page in pages:
+        content = _page_content(header + page)
+        page_id, content_id = len(objects) + 1, len(objects) + 2
+        kids.append(b'%d 0 R' % page_id)
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>'
+                       % (_PAGE_W, _PAGE_H, content_id))
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+    objects[1] = b'<< /Type /Pages /Kids [' + b' '.join(kids) + b'] /Count %d >>' % len(kids)
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % i + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % off for off in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+    return path
+
+
+# ── PMSP XML ─────────────────────────────────────────────────────────────────
+PMSP_NAMESPACE = 'http://saeows.saopaulo.sp.leg.br/'
+PMSP_ENDPOINTS = ('EmendasVereadores', 'Vereadores', 'Emendas')
+N_VEREADORES = 55
+
+
+def pmsp_rows(endpoint: str, n_rows: int, ano: int = 2024, seed: int = 42) -> list:
+    """Rows of a PMSP endpoint as dicts of text, consistent across endpoints for the same seed.
+
+    ``n_rows`` is the number of emendas; Vereadores always has N_VEREADORES rows
+    and Emendas has one to three dotações per emenda.
+    """
+    rnd = random.Random(f"{seed}-{endpoint}")
+    if endpoint == 'Vereadores':
+        return [{'Numero': str(v), 'Nome': f"{rnd.choice(PARLAMENTARES)[0]} {v}",
+                 'Apelido': f"Vereador {v}", 'Partido': rnd.choice(PARLAMENTARES)[1]}
+                for v in range(1, N_VEREADORES + 1)]
+    if endpoint == 'Emendas':
+        return [{'NUM_EMENDA': str(i), 'VAL_DOTA_EMD': f"{_valor(rnd) / 2:.2f}",
+                 'COD_FCAO_GOVR': rnd.choice(['10', '12', '15', '08', '27'])}
+                for i in range(1, n_rows + 1) for _ in range(rnd.randint(1, 3))]
+    if endpoint == 'EmendasVereadores':
+        return [{'Numero': str(i), 'Vereador': str(rnd.randint(1, N_VEREADORES)),
+                 'DataEmenda': f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{ano}",
+                 'IdExercEmp': str(ano), 'Motivo': rnd.choice(OBJETOS)}
+                for i in range(1, n_rows + 1)]
+    raise ValueError(f"Unknown PMSP endpoint: {endpoint}")
+
+
+def make_pmsp_xml(endpoint: str, n_rows: int, ano: int = 2024, seed: int = 42) -> bytes:
+    """XML payload of a PMSP endpoint (ns:Linha rows under the API namespace)."""
+    parts = [f'<?xml version="1.0" encoding="utf-8"?>\n<ArrayOfLinha xmlns="{PMSP_NAMESPACE}">']
+    for row in pmsp_rows(endpoint, n_rows, ano=ano, seed=seed):
+        parts.append('<Linha>' + ''.join(f'<{k}>{escape(v)}</{k}>' for k, v in row.items()) + '</Linha>')
+    parts.append('</ArrayOfLinha>')
+    return '\n'.join(parts).encode('utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic emendas sources')
+    parser.add_argument('kind', choices=['xlsx', 'pdf', 'xml'])
+    parser.add_argument('path', help='Output file')
+    parser.add_argument('--rows', type=int, default=10000, help='Number of emendas')
+    parser.add_argument('--ano', type=int, default=None, help='Exercise year')
+    parser.add_argument('--endpoint', choices=PMSP_ENDPOINTS, default='EmendasVereadores',
+                        help='PMSP endpoint (xml only)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    if args.kind == 'xlsx':
+        make_portal_xlsx(args.path, args.rows, ano=args.ano or 2024, seed=args.seed)
+    elif args.kind == 'pdf':
+        make_alesp_pdf(args.path, args.rows, ano=args.ano or 2021, seed=args.seed)
+    else:
+        with open(args.path, 'wb') as f:
+            f.write(make_pmsp_xml(args.endpoint, args.rows, ano=args.ano or 2024, seed=args.seed))
+    print(f"Wrote {args.rows} rows to {args.path} ({os.path.getsize(args.path) / 1024:.0f} KiB)")
@@ -0,0 +1,37 @@
+"""
+Rebuild the most viewed parlamentar/cidade dashboards in the shared cache.
+
+Run after ingest_deputados.py / ingest_vereadores.py so the first visitors of
+popular pages don't pay the Supabase + aggregation cost.
+
+Usage:
+    python scripts/warm_cache.py
+    python scripts/warm_cache.py --top 50
+    python scripts/warm_cache.py --only-expiring
+"""
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import dashboard_cache
+
+
+def warm(top_n: int = 20, only_expiring: bool = False):
+    dashboard_cache.flush_counts()
+    keys = dashboard_cache.top(top_n)
+    print(f"Warming up to {len(keys)} dashboards (top {top_n} per tipo/ano)...")
+    refreshed = dashboard_cache.warm(top_n, force=not only_expiring)
+    print(f"Done. Refreshed {refreshed} dashboards "
+          f"({dashboard_cache.stats['refresh_errors']} errors).")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Warm the dashboard cache for the most viewed pages')
+    parser.add_argument('--top', type=int, default=20, help='Entries to refresh per (tipo, ano)')
+    parser.add_argument('--only-expiring', action='store_true',
+                        help='Skip entries that are still far from expiring (default: rebuild all, '
+                             'since data usually just changed)')
+    args = parser.parse_args()
+    warm(args.top, only_expiring=args.only_expiring)
@@ -0,0 +1,108 @@
+"""
+Streaming XLSX reader.
+
+``pd.read_excel`` converts every cell of the sheet into Python lists before
+building the DataFrame, so peak memory grows with the file. ``iter_xlsx_frames``
+walks the worksheet with openpyxl's read-only iterator instead and yields
+DataFrames of at most ``chunk_rows`` rows, so only one chunk is alive at a time.
+
+Cell values follow read_excel's conventions (empty cells and the default NA
+strings become None, integral floats become ints, duplicate headers get a
+``.1`` suffix, trailing empty rows are dropped), except that text cells are
+kept as text instead of being re-parsed as numbers and cells to the right of
+the last named header column are ignored.
+"""
+import io
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# pandas' default na_values for read_excel/read_csv
+NA_STRINGS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+
+def _convert(val):
+    if val is None:
+        return None
+    if isinstance(val, str):
+        return None if val in NA_STRINGS else val
+    if isinstance(val, float) and val.is_integer():
+        return int(val)
+    return val
+
+
+def _header(cells) -> list:
+    """Column names as read_excel builds them (Unnamed: i, X.1 for duplicates)."""
+    names, seen = [], {}
+    for i, cell in enumerate(cells):
+        name = f"Unnamed: {i}" if cell is None or cell == '' else cell
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def iter_xlsx_frames(source, chunk_rows: int = 5000, sheet=0):
+    """Yield DataFrames of up to ``chunk_rows`` rows from an XLSX file.
+
+    ``source`` is a path, bytes or a binary file object; ``sheet`` is the sheet
+    index or name. The first row is the header; every chunk has the same
+    columns, so callers can map them once.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    wb = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+        rows = ws.iter_rows(values_only=True)
+        header_cells = next(rows, None)
+        if header_cells is None:
+            return
+        while header_cells and header_cells[-1] is None:
+            header_cells = header_cells[:-1]
+        columns = _header(header_cells)
+        width = len(columns)
+
+        chunk, blank = [], []
+        for cells in rows:
+            values = [_convert(v) for v in cells[:width]]
+            values.extend([None] * (width - len(values)))
+            if all(v is None for v in values):
+                # Only kept if a non-empty row follows (read_excel drops trailing ones)
+                blank.append(values)
+                continue
+            if blank:
+                chunk.extend(blank)
+                blank = []
+            chunk.append(values)
+            while len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk[:chunk_rows], columns=columns)
+                chunk = chunk[chunk_rows:]
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        wb.close()
+
+
+def xlsx_row_count(source, sheet=0):
+    """Data rows (header excluded) declared by the sheet's dimension; None when it isn't declared."""
+    wb = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+        return max(ws.max_row - 1, 0) if ws.max_row is not None else None
+    finally:
+        wb.close()
+
+
+def read_xlsx(source, chunk_rows: int = 5000, sheet=0) -> pd.DataFrame:
+    """Whole-sheet DataFrame assembled from streamed chunks."""
+    frames = list(iter_xlsx_frames(source, chunk_rows=chunk_rows, sheet=sheet))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
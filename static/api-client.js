@@ -0,0 +1,70 @@
+// Cliente da API da Lupa Cidadã.
+// Quando o site é publicado com o export estático (scripts/export_static.py),
+// as páginas exportadas definem window.LUPA_STATIC_API e as respostas vêm dos
+// JSONs pré-gerados em /static-api/ (via manifest.json); servido pelo Flask, o
+// manifesto nem é buscado. Os painéis exportados são os de cada nome/município
+// exato (o que o autocomplete oferece): são exatamente a resposta da API para
+// essa consulta. Consultas parciais vão para o Flask, que agrega todos os
+// nomes que contêm o termo.
+const LupaApi = (() => {
+    const base = window.location.origin;
+    let manifestPromise = null;
+    const indexCache = {};
+
+    function manifest() {
+        if (!window.LUPA_STATIC_API) return Promise.resolve(null);
+        if (!manifestPromise) {
+            manifestPromise = fetch(`${base}/static-api/manifest.json`, { cache: 'no-cache' })
+                .then(resp => resp.ok ? resp.json() : null)
+                .catch(() => null);
+        }
+        return manifestPromise;
+    }
+
+    function jsonResponse(data, status = 200) {
+        return new Response(JSON.stringify(data), {
+            status,
+            headers: { 'Content-Type': 'application/json' },
+        });
+    }
+
+    async function loadIndex(m, name) {
+        if (!indexCache[name]) {
+            indexCache[name] = fetch(`${base}/static-api/${m[name]}`).then(resp => resp.json());
+        }
+        return indexCache[name];
+    }
+
+    async function searchIndex(m, name, query) {
+        const q = (query || '').trim().toLowerCase();
+        if (!q) return jsonResponse([]);
+        const names = await loadIndex(m, name);
+        return jsonResponse(names.filter(n => n.toLowerCase().includes(q)));
+    }
+
+    function dashboard(m, kind, query, ano, path) {
+        // Só a chave exata: a resposta de uma consulta parcial depende de todos os nomes que casam
+        const file = m[kind][`${query.trim().toLowerCase()}|${ano || ''}`];
+        return file ? fetch(`${base}/static-api/${file}`) : fetch(`${base}${path}`);
+    }
+
+    // Mesma interface do fetch(): recebe o caminho da API (ex.: '/api/anos')
+    async function apiFetch(path) {
+        const m = await manifest();
+        if (!m) return fetch(`${base}${path}`);
+
+        const url = new URL(path, base);
+        const params = url.searchParams;
+        const parts = url.pathname.split('/').filter(Boolean);
+        const rest = decodeURIComponent(parts.slice(2).join('/'));
+
+        if (url.pathname === '/api/anos') return fetch(`${base}/static-api/${m.anos}`);
+        if (url.pathname === '/api/search_nomes') return searchIndex(m, 'nomes', params.get('q'));
+        if (url.pathname === '/api/search_municipios') return searchIndex(m, 'municipios', params.get('q'));
+        if (parts[1] === 'parlamentar') return dashboard(m, 'parlamentar', rest, params.get('ano'), path);
+        if (parts[1] === 'cidade') return dashboard(m, 'cidade', rest, params.get('ano'), path);
+        return fetch(`${base}${path}`);
+    }
+
+    return { fetch: apiFetch };
+})();
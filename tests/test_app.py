@@ -6,7 +6,9 @@ from unittest.mock import patch, MagicMock
 
 
 @pytest.fixture
-def client():
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv('DASHBOARD_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('PHOTO_CACHE_DIR', str(tmp_path / 'photos'))
     # Mock Supabase before importing app to avoid needing real credentials
     with patch('supabase.create_client') as mock_create:
         mock_sb = MagicMock()
@@ -60,3 +62,75 @@ def test_anos_endpoint_returns_list(client):
     data = resp.get_json()
     assert 'anos' in data
     assert 2024 in data['anos']
+
+
+def test_home_served_gzip_with_etag(client):
+    c, _ = client
+    resp = c.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert resp.status_code == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in resp.headers['Vary']
+    assert resp.headers['ETag']
+    import gzip
+    assert b'<html' in gzip.decompress(resp.data).lower()
+
+
+def test_home_returns_304_when_etag_matches(client):
+    c, _ = client
+    first = c.get('/parlamentar')
+    assert 'Content-Encoding' not in first.headers
+    resp = c.get('/parlamentar', headers={'If-None-Match': first.headers['ETag']})
+    assert resp.status_code == 304
+
+
+def test_json_provider_handles_numpy_and_pandas_scalars(client):
+    import numpy as np
+    import pandas as pd
+    import app as flask_app
+    out = flask_app.app.json.loads(flask_app.app.json.dumps({
+        'i': np.int64(3), 'f': np.float64(1.5), 'nan': np.float64('nan'),
+        'b': np.bool_(True), 'ts': pd.Timestamp('2024-03-15'), 'nat': pd.NaT,
+    }))
+    assert out == {'i': 3, 'f': 1.5, 'nan': None, 'b': True,
+                   'ts': '2024-03-15T00:00:00', 'nat': None}
+
+
+def test_large_json_response_is_gzipped(client):
+    c, mock_sb = client
+    fake_rows = [
+        {'tipo': 'deputado', 'nome': 'João Silva', 'partido': 'PT', 'ano': 2024,
+         'municipio': f'Cidade {i}', 'funcao': 'Saúde', 'beneficiario': 'Hospital X',
+         'objeto': 'Equipamentos', 'codigo': f'EMD-{i}', 'status': 'Pago',
+         'data_pago': '2024-03-15', 'valor': 1000.0 + i, 'pago': True}
+        for i in range(50)
+    ]
+    mock_sb.table.return_value.select.return_value.ilike.return_value.limit.return_value.execute.return_value.data = fake_rows
+    resp = c.get('/api/parlamentar/Jo%C3%A3o', headers={'Accept-Encoding': 'gzip'})
+    assert resp.status_code == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    import gzip, json
+    data = json.loads(gzip.decompress(resp.data))
+    assert data['indicadores']['count'] == 50
+
+
+def test_foto_serves_placeholder_when_no_photo(client):
+    c, _ = client
+    import app as flask_app
+    with patch.object(flask_app.photo_cache, 'resolve', return_value=None):
+        resp = c.get('/api/foto/Fulano')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'image/svg+xml'
+    assert resp.headers['ETag']
+
+
+def test_foto_of_vereador_does_not_query_camara(client):
+    c, mock_sb = client
+    import app as flask_app
+    mock_sb.table.return_value.select.return_value.eq.return_value.limit.return_value.execute.return_value.data = [
+        {'tipo': 'vereador'}]
+    with patch.object(flask_app, 'get_camara_info') as camara, \
+            patch.object(flask_app, 'get_wikipedia_foto', return_value=None) as wiki:
+        resp = c.get('/api/foto/Fulano')
+    assert resp.mimetype == 'image/svg+xml'
+    camara.assert_not_called()
+    wiki.assert_called_once_with('Fulano')
@@ -0,0 +1,45 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from scripts.column_mapping import resolve_columns, map_record, _resolve
+
+PORTAL_HEADER = ['MUNICÍPIO', 'ÓRGÃO PROCESSADOR', 'OBJETO', 'PARLAMENTAR', 'PARTIDO', 'ANO', 'CÓDIGO',
+                 'Primeira Fase Substituídas', 'NATUREZA', 'FUNÇÃO DE GOVERNO', 'BENEFICIÁRIO',
+                 'ESTÁGIO', 'DATA PAGAMENTO', 'VALOR DECISÃO', 'VALOR REMANEJADO']
+
+
+def test_portal_profile_maps_transparencia_header():
+    assert resolve_columns(PORTAL_HEADER, 'portal_xlsx') == {
+        'MUNICÍPIO': 'municipio', 'OBJETO': 'objeto', 'PARLAMENTAR': 'nome', 'PARTIDO': 'partido',
+        'CÓDIGO': 'codigo', 'NATUREZA': 'natureza', 'FUNÇÃO DE GOVERNO': 'funcao',
+        'BENEFICIÁRIO': 'orgao', 'ESTÁGIO': 'status', 'DATA PAGAMENTO': 'data',
+        'VALOR DECISÃO': 'valor',
+    }
+
+
+def test_portal_profile_generic_pass_fills_remaining_targets():
+    mapping = resolve_columns(['Nome do Município', 'Nome', 'Valor', 'Órgão', 'Data'], 'portal_xlsx')
+    assert mapping == {'Nome do Município': 'municipio', 'Nome': 'nome', 'Valor': 'valor',
+                       'Órgão': 'orgao', 'Data': 'data'}
+
+
+def test_alesp_pdf_profile():
+    header = ['PARLAMENTAR', 'BENEFICIÁRIO', 'MUNICÍPIO', 'OBJETO', 'ÓRGÃO PROCESSADOR', 'VALOR', 'STATUS']
+    assert resolve_columns(header, 'alesp_pdf') == {
+        'PARLAMENTAR': 'nome', 'BENEFICIÁRIO': 'orgao', 'MUNICÍPIO': 'municipio',
+        'OBJETO': 'objeto', 'VALOR': 'valor', 'STATUS': 'status'}
+
+
+def test_map_record_exact_profile_keeps_unknown_keys():
+    record = {'NUM_EMENDA': '12', 'VAL_DOTA_EMD': '10.5', 'OUTRO': 'x'}
+    assert map_record(record, 'pmsp_emendas') == {'codigo': '12', 'valor': '10.5', 'OUTRO': 'x'}
+
+
+def test_resolved_mappings_are_cached_by_header():
+    _resolve.cache_clear()
+    resolve_columns(PORTAL_HEADER, 'portal_xlsx')
+    resolve_columns(list(PORTAL_HEADER), 'portal_xlsx')
+    assert _resolve.cache_info().hits == 1
+    with pytest.raises(ValueError):
+        resolve_columns(PORTAL_HEADER, 'desconhecido')
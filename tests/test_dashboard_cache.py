@@ -0,0 +1,115 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+from dashboard_cache import DashboardCache
+
+
+def _make_cache(tmp_path, **kwargs):
+    calls = []
+
+    def builder(query, ano):
+        calls.append((query, ano))
+        if query == 'ninguem':
+            return {"error": "Nenhum parlamentar encontrado"}, 404
+        return {"nome": query, "ano": ano, "n": len(calls)}, 200
+
+    cache = DashboardCache(dumps=json.dumps, cache_dir=str(tmp_path), **kwargs)
+    cache.register('parlamentar', builder)
+    return cache, calls
+
+
+def test_get_caches_successful_payloads(tmp_path):
+    cache, calls = _make_cache(tmp_path)
+    first, status = cache.get('parlamentar', 'maria', '2024')
+    second, _ = cache.get('parlamentar', 'maria', '2024')
+    assert status == 200
+    assert first == second
+    assert len(calls) == 1
+    assert cache.stats['hits'] == 1
+
+
+def test_errors_are_not_cached(tmp_path):
+    cache, calls = _make_cache(tmp_path)
+    assert cache.get('parlamentar', 'ninguem')[1] == 404
+    assert cache.get('parlamentar', 'ninguem')[1] == 404
+    assert len(calls) == 2
+
+
+def test_stale_entry_is_served_while_refreshing(tmp_path):
+    cache, calls = _make_cache(tmp_path, ttl=0, stale_ttl=3600)
+    first, _ = cache.get('parlamentar', 'maria')
+    stale, status = cache.get('parlamentar', 'maria')
+    assert status == 200
+    assert stale == first
+    assert cache.stats['stale'] == 1
+    for _ in range(50):
+        if len(calls) == 2:
+            break
+        time.sleep(0.01)
+    assert len(calls) == 2
+
+
+def test_warm_refreshes_top_entries_shared_on_disk(tmp_path):
+    cache, _ = _make_cache(tmp_path)
+    for _ in range(3):
+        cache.get('parlamentar', 'maria', '2024')
+    cache.get('parlamentar', 'joao', '2024')
+    cache.flush_counts()
+
+    # A second process (e.g. the warm_cache CLI) sees the counts and entries
+    other, calls = _make_cache(tmp_path)
+    assert other.top(1) == [('parlamentar', 'maria', '2024')]
+    assert other.warm(top_n=1, force=True) == 1
+    assert calls == [('maria', '2024')]
+    assert json.loads(cache.get('parlamentar', 'maria', '2024')[0])['n'] == 1
+
+
+def test_only_normalized_queries_with_results_are_stored_and_counted(tmp_path):
+    cache, calls = _make_cache(tmp_path)
+    cache.get('parlamentar', 'ninguem')
+    cache.get('parlamentar', '  Maria ')
+    cache.get('parlamentar', 'maria')
+    cache.flush_counts()
+    assert len(calls) == 2
+    assert cache.top(5) == [('parlamentar', 'maria', '')]
+    assert sorted(os.listdir(tmp_path)) == sorted(['access_counts.json', 'access_counts.json.lock',
+                                                   os.path.basename(cache._path(('parlamentar', 'maria', '')))])
+
+
+def test_disk_entries_and_counts_are_capped(tmp_path):
+    cache, _ = _make_cache(tmp_path, max_disk_entries=3, max_counts=2)
+    for i in range(6):
+        cache.get('parlamentar', f'nome {i}')
+    cache.get('parlamentar', 'nome 5')
+    cache.flush_counts()
+    bodies = [name for name in os.listdir(tmp_path) if name.endswith('.json') and name != 'access_counts.json']
+    assert len(bodies) == 3
+    with open(tmp_path / 'access_counts.json', encoding='utf-8') as f:
+        counts = json.load(f)
+    assert len(counts) == 2
+    assert json.dumps(['parlamentar', 'nome 5', '']) in counts
+
+
+def test_compressed_variants_are_built_once_per_stored_body(tmp_path):
+    import gzip
+    compressed = []
+
+    def compress(body, encoding):
+        compressed.append(encoding)
+        return gzip.compress(body)
+
+    cache, calls = _make_cache(tmp_path, compress=compress)
+    first = cache.get_encoded('parlamentar', 'maria', None, 'gzip')
+    second = cache.get_encoded('parlamentar', 'maria', None, 'gzip')
+    assert first == second and first[2] == 'gzip'
+    assert json.loads(gzip.decompress(first[0]))['nome'] == 'maria'
+    assert compressed == ['gzip']
+
+    # A refreshed body gets a fresh variant; errors and small bodies stay uncompressed
+    cache.refresh(('parlamentar', 'maria', ''))
+    assert json.loads(gzip.decompress(cache.get_encoded('parlamentar', 'maria', None, 'gzip')[0]))['n'] == 2
+    assert compressed == ['gzip', 'gzip']
+    assert cache.get_encoded('parlamentar', 'ninguem', None, 'gzip')[1:] == (404, 'identity')
+    assert cache.get_encoded('parlamentar', 'maria', None, 'gzip', min_bytes=10 ** 6)[2] == 'identity'
@@ -1,6 +1,7 @@
 import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import pandas as pd
 from scripts.db_utils import parse_moeda, normalize_deputado_row, normalize_vereador_row
 
 
@@ -67,3 +68,203 @@ def test_normalize_vereador_row_basic():
     assert result['tipo'] == 'vereador'
     assert result['nome'] == 'Carlos Souza'
     assert result['pago'] == True
+
+
+def _rows():
+    base = {'tipo': 'deputado', 'ano': 2024, 'nome': 'Maria', 'valor': 10.0}
+    return [dict(base, codigo='A'), dict(base, codigo='B'),
+            dict(base, codigo=None), dict(base, codigo=None)]
+
+
+def test_add_fingerprints_keys_are_stable_and_unique():
+    from scripts.db_utils import add_fingerprints
+    first = add_fingerprints(_rows())
+    second = add_fingerprints(_rows())
+    assert [r['row_key'] for r in first] == [r['row_key'] for r in second]
+    assert len({r['row_key'] for r in first}) == 4
+
+
+def test_diff_rows_detects_inserts_updates_and_deletes():
+    from scripts.db_utils import add_fingerprints, diff_rows
+    old = add_fingerprints(_rows())
+    existing = [{'id': i, 'row_key': r['row_key'], 'row_hash': r['row_hash']} for i, r in enumerate(old)]
+    existing.append({'id': 99, 'row_key': None, 'row_hash': None})
+
+    new = _rows()[:3]
+    new[0]['valor'] = 20.0
+    new.append({'tipo': 'deputado', 'ano': 2024, 'nome': 'Ana', 'valor': 5.0, 'codigo': 'C'})
+    inserts, updates, delete_ids = diff_rows(existing, add_fingerprints(new))
+    assert [r['codigo'] for r in inserts] == ['C']
+    assert [r['codigo'] for r in updates] == ['A']
+    assert sorted(delete_ids) == [3, 99]
+
+
+def test_sync_rows_without_changes_writes_nothing():
+    from unittest.mock import MagicMock
+    from scripts.db_utils import add_fingerprints, sync_rows
+    stored = add_fingerprints(_rows())
+    client = MagicMock()
+    select = client.table.return_value.select.return_value.eq.return_value.eq.return_value
+    select.order.return_value.limit.return_value.execute.return_value.data = [
+        {'id': i, 'row_key': r['row_key'], 'row_hash': r['row_hash']} for i, r in enumerate(stored)]
+
+    stats = sync_rows(client, 'deputado', 2024, _rows())
+    assert stats['mode'] == 'noop'
+    client.table.return_value.insert.assert_not_called()
+    client.table.return_value.delete.assert_not_called()
+    client.rpc.assert_not_called()
+
+
+def test_fetch_fingerprints_pages_by_id():
+    from unittest.mock import MagicMock
+    from scripts.db_utils import fetch_fingerprints
+    client = MagicMock()
+    select = client.table.return_value.select.return_value.eq.return_value.eq.return_value
+    select.order.return_value.limit.return_value.execute.return_value.data = [{'id': i} for i in range(1000)]
+    select.gt.return_value.order.return_value.limit.return_value.execute.return_value.data = [{'id': 1000}]
+    assert [r['id'] for r in fetch_fingerprints(client, 'deputado', 2024)] == list(range(1001))
+    select.order.assert_called_with('id')
+    select.gt.assert_called_once_with('id', 999)
+
+
+def test_bulk_writer_cuts_batches_by_bytes():
+    from unittest.mock import MagicMock
+    from scripts.db_utils import BulkWriter
+    rows = [{'nome': 'x' * 100, 'i': i} for i in range(10)]
+    writer = BulkWriter(MagicMock(), max_batch_bytes=300, log=lambda msg: None)
+    sizes = [len(batch) for _, batch in writer.batches(rows)]
+    assert sum(sizes) == 10
+    assert max(sizes) == 2
+
+
+def test_bulk_writer_retries_and_resumes_from_checkpoint(tmp_path):
+    from unittest.mock import MagicMock
+    import pytest
+    from scripts.db_utils import BulkWriter
+    rows = [{'nome': f'n{i}'} for i in range(6)]
+    checkpoint = str(tmp_path / 'load.checkpoint')
+
+    client = MagicMock()
+    execute = client.table.return_value.insert.return_value.execute
+    # First batch succeeds after one transient error, second batch always fails
+    execute.side_effect = [Exception('timeout'), None] + [Exception('down')] * 10
+    writer = BulkWriter(client, max_batch_rows=3, max_workers=1, retries=2, backoff=0,
+                        checkpoint_path=checkpoint, log=lambda msg: None)
+    with pytest.raises(Exception, match='down'):
+        writer.write(rows)
+
+    execute.side_effect = None
+    execute.reset_mock()
+    stats = writer.write(rows)
+    assert stats['rows'] == 3 and stats['skipped'] == 3
+    assert execute.call_count == 1
+    assert not os.path.exists(checkpoint)
+
+
+def test_swap_year_discards_checkpoint_of_other_rows(tmp_path, monkeypatch):
+    from unittest.mock import MagicMock
+    from scripts import db_utils
+    from scripts.db_utils import add_fingerprints, rows_digest, checkpoint_run, swap_year
+    monkeypatch.setattr(db_utils, 'CHECKPOINT_DIR', str(tmp_path))
+    rows = add_fingerprints(_rows())
+    assert rows_digest(rows) == rows_digest(list(reversed(rows)))
+
+    checkpoint = db_utils.checkpoint_path_for('emendas_staging', 'deputado', 2024)
+    with open(checkpoint, 'w', encoding='utf-8') as f:
+        f.write('run:stale\nabc\n')
+    client = MagicMock()
+    execute = client.table.return_value.upsert.return_value.execute
+    execute.side_effect = Exception('down')
+    try:
+        swap_year(client, 'deputado', 2024, list(reversed(rows)), retries=1, backoff=0, log=lambda msg: None)
+    except Exception:
+        pass
+    # Stale checkpoint dropped and staging cleared; the new one belongs to this row set
+    client.table.return_value.delete.assert_called_once()
+    assert checkpoint_run(checkpoint) == rows_digest(rows)
+    written = client.table.return_value.upsert.call_args[0][0]
+    assert [r['row_key'] for r in written] == sorted(r['row_key'] for r in rows)
+    # A batch resent after committing server-side is a no-op, not a duplicate-key error
+    assert client.table.return_value.upsert.call_args[1] == {'on_conflict': 'row_key', 'ignore_duplicates': True}
+
+    # Same rows again: resumes, staging is kept
+    execute.side_effect = None
+    client.table.return_value.delete.reset_mock()
+    swap_year(client, 'deputado', 2024, rows, log=lambda msg: None)
+    client.table.return_value.delete.assert_not_called()
+    client.rpc.assert_called_once()
+    assert not os.path.exists(checkpoint)
+
+
+def test_swap_year_streams_rows_under_a_run_id(tmp_path, monkeypatch):
+    from unittest.mock import MagicMock
+    from scripts import db_utils
+    from scripts.db_utils import add_fingerprints, swap_year
+    monkeypatch.setattr(db_utils, 'CHECKPOINT_DIR', str(tmp_path))
+    rows = list(reversed(add_fingerprints(_rows())))
+    client = MagicMock()
+    swap_year(client, 'deputado', 2024, iter(rows), run_id='file-sha', max_batch_rows=2, log=lambda msg: None)
+    # Written as they came (no sort, no materialized list), in batches
+    written = [r for call in client.table.return_value.upsert.call_args_list for r in call[0][0]]
+    assert [r['row_key'] for r in written] == [r['row_key'] for r in rows]
+    client.rpc.assert_called_once()
+
+
+def _copy_row():
+    from scripts.db_utils import add_fingerprints
+    row = normalize_deputado_row({'nome': 'João "Jota" Silva', 'municipio': '', 'data': '2024-03-15',
+                                  'valor_num': 1234.5, 'pago_flag': True}, ano=2024)
+    return add_fingerprints([row])[0]
+
+
+def test_copy_values_types_row_for_binary_copy():
+    import datetime
+    from decimal import Decimal
+    from scripts.db_utils import copy_values, EMENDAS_COLUMNS
+    values = dict(zip(EMENDAS_COLUMNS, copy_values(_copy_row())))
+    assert values['data_pago'] == datetime.date(2024, 3, 15)
+    assert values['valor'] == Decimal('1234.5')
+    assert values['ano'] == 2024 and values['pago'] is True
+    assert values['partido'] is None
+
+
+def test_iter_csv_chunks_distinguishes_null_from_empty():
+    from scripts.db_utils import iter_csv_chunks
+    [(chunk, n)] = list(iter_csv_chunks([_copy_row()]))
+    line = chunk.decode('utf-8')
+    assert n == 1
+    assert line.startswith('"deputado","João ""Jota"" Silva",,2024,"",')
+    assert ',1234.5,t,' in line
+
+
+def test_copy_load_roundtrip_on_local_postgres():
+    import pytest
+    dsn = os.environ.get('TEST_DATABASE_URL')
+    if not dsn:
+        pytest.skip('TEST_DATABASE_URL not set')
+    import psycopg
+    from scripts.db_utils import copy_load
+    sql_dir = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'sql')
+    with psycopg.connect(dsn) as conn:
+        conn.execute('drop table if exists emendas cascade')
+        for name in ('create_table.sql', 'incremental_ingest.sql'):
+            with open(os.path.join(sql_dir, name), encoding='utf-8') as f:
+                conn.execute(f.read())
+    for fmt in ('binary', 'csv'):
+        assert copy_load('deputado', 2024, [_copy_row()], dsn=dsn, fmt=fmt) == 1
+    with psycopg.connect(dsn) as conn:
+        assert conn.execute('select count(*) from emendas').fetchone()[0] == 1
+
+
+def test_parse_moeda_series_matches_scalar():
+    from scripts.db_utils import parse_moeda_series
+    values = ['R$ 1.234,56', '1,234.56', '12,5', 'abc', '', None, float('nan'), 3, 2.5, '1.000.000', ' 7 ']
+    assert parse_moeda_series(pd.Series(values, dtype=object)).tolist() == [parse_moeda(v) for v in values]
+    assert parse_moeda_series(pd.Series([1.5, None])).tolist() == [1.5, 0.0]
+
+
+def test_count_invalid_moeda_ignores_blanks_and_numbers():
+    from scripts.db_utils import count_invalid_moeda
+    values = pd.Series(['R$ 1.500,00', 'abc', None, '', 'abc', 12.5, '-'], dtype=object)
+    assert count_invalid_moeda(values) == 3
+    assert count_invalid_moeda(pd.Series([1.0, float('nan')])) == 0
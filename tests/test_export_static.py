@@ -0,0 +1,27 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.export_static import manifest_key, write_hashed
+
+
+def test_manifest_key_normalizes_query_and_ano():
+    assert manifest_key('  João Silva ', 2024) == 'joão silva|2024'
+    assert manifest_key('Osasco') == 'osasco|'
+
+
+def test_write_hashed_is_content_addressed(tmp_path):
+    first = write_hashed(str(tmp_path), 'parlamentar', b'{"a":1}')
+    same = write_hashed(str(tmp_path), 'parlamentar', b'{"a":1}')
+    other = write_hashed(str(tmp_path), 'parlamentar', b'{"a":2}')
+    assert first == same != other
+    assert first.startswith('parlamentar/') and first.endswith('.json')
+    assert (tmp_path / first).read_bytes() == b'{"a":1}'
+
+
+def test_exported_pages_flag_static_mode_before_the_client():
+    from scripts.export_static import mark_static_page, PAGES, CLIENT_TAG, STATIC_FLAG
+    for page in PAGES:
+        with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), page),
+                  encoding='utf-8') as f:
+            html = mark_static_page(f.read())
+        assert f"{STATIC_FLAG}\n{CLIENT_TAG}" in html
@@ -0,0 +1,49 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from frame_dtypes import CategoryPools, compact_frame, memory_report
+
+
+def _df(nomes, municipios):
+    return pd.DataFrame({'nome': nomes, 'municipio': municipios, 'objeto': ['x'] * len(nomes),
+                         'valor_num': [1.0] * len(nomes), 'pago_flag': [True, None, False][:len(nomes)]})
+
+
+def test_compact_frame_converts_repeated_columns():
+    df = compact_frame(_df(['Beto', 'Ana', 'Beto'], ['Santos', None, 'Campinas']))
+
+    assert isinstance(df['nome'].dtype, pd.CategoricalDtype)
+    assert list(df['nome'].cat.categories) == ['Ana', 'Beto']
+    assert df['municipio'].isna().tolist() == [False, True, False]
+    assert df['objeto'].dtype == object
+    assert df['pago_flag'].dtype == bool and df['pago_flag'].tolist() == [True, False, False]
+
+
+def test_mixed_type_columns_are_left_alone():
+    df = compact_frame(pd.DataFrame({'nome': ['Ana', 3], 'status': ['Pago', 'Pago']}))
+    assert df['nome'].dtype == object
+    assert isinstance(df['status'].dtype, pd.CategoricalDtype)
+
+
+def test_pools_share_a_sorted_vocabulary_across_frames():
+    pools = CategoryPools()
+    first = compact_frame(_df(['Beto', 'Ana'], ['Santos', 'Santos']), pools)
+    same = compact_frame(_df(['Ana'], ['Santos']), pools)
+    grown = compact_frame(_df(['Carla', 'Ana'], ['Campinas', 'Santos']), pools)
+
+    assert same['nome'].cat.categories is first['nome'].cat.categories
+    assert list(grown['nome'].cat.categories) == ['Ana', 'Beto', 'Carla']
+    assert pools.sizes() == {'nome': 3, 'municipio': 2}
+    # groupby nos códigos, só com as categorias presentes
+    sums = same.groupby('nome', observed=True)['valor_num'].sum()
+    assert sums.to_dict() == {'Ana': 1.0}
+
+
+def test_memory_report_counts_codes_only():
+    df = _df(['Fulano de Tal'] * 3, ['São Paulo'] * 3)
+    report = memory_report(df, compact_frame(df.copy(), CategoryPools()))
+
+    assert report['rows'] == 3
+    assert report['columns']['nome']['after_bytes'] == 3  # um código int8 por linha
+    assert report['after_bytes'] < report['before_bytes']
@@ -0,0 +1,61 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from scripts.http_cache import HttpCache
+
+URL = "https://fake-api.example.com/Servico/Emendas"
+
+
+def test_revalidates_with_etag_and_serves_body_on_304(tmp_path, requests_mock):
+    cache = HttpCache(str(tmp_path), log=lambda *a: None)
+    requests_mock.post(URL, content=b'<xml/>', headers={'ETag': '"v1"'})
+    first = cache.post(URL, {'exercicio': '2024'}, key='Emendas-2024')
+    assert first.source == 'fetched' and first.changed
+
+    requests_mock.post(URL, status_code=304)
+    second = cache.post(URL, {'exercicio': '2024'}, key='Emendas-2024')
+    assert requests_mock.last_request.headers['If-None-Match'] == '"v1"'
+    assert second.source == 'revalidated' and second.content == b'<xml/>' and not second.changed
+
+
+def test_content_hash_reports_unchanged_without_validators(tmp_path, requests_mock):
+    cache = HttpCache(str(tmp_path), log=lambda *a: None)
+    requests_mock.post(URL, content=b'<a/>')
+    cache.post(URL, {}, key='k')
+    again = cache.post(URL, {}, key='k')
+    assert 'If-None-Match' not in requests_mock.last_request.headers
+    assert again.source == 'fetched' and not again.changed
+
+    requests_mock.post(URL, content=b'<b/>')
+    assert cache.post(URL, {}, key='k').changed
+
+
+def test_replay_serves_recordings_offline(tmp_path, requests_mock):
+    requests_mock.post(URL, content=b'<a/>')
+    HttpCache(str(tmp_path), log=lambda *a: None).post(URL, {}, key='k')
+
+    replay = HttpCache(str(tmp_path), mode='replay')
+    assert replay.post(URL, {}, key='k').content == b'<a/>'
+    assert requests_mock.call_count == 1
+    with pytest.raises(FileNotFoundError):
+        replay.post(URL, {}, key='missing')
+
+
+def test_stream_records_body_once_consumed(tmp_path, requests_mock):
+    cache = HttpCache(str(tmp_path), log=lambda *a: None)
+    requests_mock.post(URL, content=b'0123456789')
+    info = {}
+    chunks = list(cache.stream(URL, {}, key='k', chunk_size=4, info=info))
+    assert b''.join(chunks) == b'0123456789' and len(chunks) == 3
+    assert info['source'] == 'fetched'
+    assert HttpCache(str(tmp_path), mode='replay').post(URL, {}, key='k').content == b'0123456789'
+
+
+def test_responses_records_body_hash_per_key(tmp_path, requests_mock):
+    cache = HttpCache(str(tmp_path), log=lambda *a: None)
+    requests_mock.post(URL, content=b'<a/>', headers={'ETag': '"v1"'})
+    first = cache.post(URL, {}, key='k')
+    requests_mock.post(URL, status_code=304)
+    cache.post(URL, {}, key='k')
+    assert cache.responses == {'k': first.sha256}
@@ -0,0 +1,73 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from scripts import ingest_all
+from scripts.ingest_all import parse_years, run
+
+
+def test_parse_years_ranges_and_lists():
+    assert parse_years('2021-2023,2025') == [2021, 2022, 2023, 2025]
+    assert parse_years('') == []
+
+
+def test_run_groups_files_by_year_and_resumes_from_manifest(tmp_path, monkeypatch):
+    data_dir = tmp_path / 'files'
+    data_dir.mkdir()
+    for name, nomes in (('impositivas.csv', ['Ana', 'Bia']), ('tv.csv', ['Caio'])):
+        pd.DataFrame({'PARLAMENTAR': nomes, 'ANO': [2024] * len(nomes),
+                      'VALOR DECISÃO': [100] * len(nomes)}).to_csv(data_dir / name, index=False)
+
+    calls = []
+    monkeypatch.setattr(ingest_all, 'write_rows',
+                        lambda tipo, ano, rows, **kw: calls.append((tipo, ano, len(rows))) or {'mode': 'noop'})
+    manifest = str(tmp_path / 'manifest.json')
+
+    summary = run(str(data_dir), workers=1, use_cache=False, manifest_path=manifest)
+    assert calls == [('deputado', 2024, 3)]
+    assert [(e['unit'], e['files'], e['rows'], e['status']) for e in summary] == [('deputado:2024', 2, 3, 'done')]
+
+    summary = run(str(data_dir), workers=1, use_cache=False, manifest_path=manifest)
+    assert len(calls) == 1
+    assert summary[0]['status'] == 'skipped'
+
+    with open(data_dir / 'tv.csv', 'a', encoding='utf-8') as f:
+        f.write('Duda,2024,50\n')
+    run(str(data_dir), workers=1, use_cache=False, manifest_path=manifest)
+    assert calls[-1] == ('deputado', 2024, 4)
+
+
+def test_vereador_years_are_redone_only_when_the_api_data_changes(tmp_path, monkeypatch):
+    from scripts import ingest_vereadores
+    version = tmp_path / 'version.txt'
+    version.write_text('v1')
+
+    def fake_fetch_rows(ano, http=None, report=None):
+        # Same as the HTTP cache would record: one sha256 per endpoint response
+        http.responses[f'Emendas-{ano}'] = version.read_text()
+        return [{'tipo': 'vereador', 'ano': ano, 'nome': 'Ana'}]
+
+    monkeypatch.setattr(ingest_vereadores, 'fetch_rows', fake_fetch_rows)
+    calls = []
+    monkeypatch.setattr(ingest_all, 'write_rows',
+                        lambda tipo, ano, rows, **kw: calls.append((tipo, ano)) or {'mode': 'noop'})
+    manifest = str(tmp_path / 'manifest.json')
+
+    run(years=[2024], workers=1, manifest_path=manifest)
+    assert run(years=[2024], workers=1, manifest_path=manifest)[0]['status'] == 'skipped'
+    version.write_text('v2')
+    assert run(years=[2024], workers=1, manifest_path=manifest)[0]['status'] == 'done'
+    assert calls == [('vereador', 2024), ('vereador', 2024)]
+
+
+def test_deputado_rows_are_merged_in_file_order(tmp_path, monkeypatch):
+    data_dir = tmp_path / 'files'
+    data_dir.mkdir()
+    for name, nomes in (('b.csv', ['Caio', 'Duda']), ('a.csv', ['Ana', 'Bia']), ('c.csv', ['Eva'])):
+        pd.DataFrame({'PARLAMENTAR': nomes, 'ANO': [2024] * len(nomes),
+                      'VALOR DECISÃO': [100] * len(nomes)}).to_csv(data_dir / name, index=False)
+    written = []
+    monkeypatch.setattr(ingest_all, 'write_rows',
+                        lambda tipo, ano, rows, **kw: written.append([r['nome'] for r in rows]) or {'mode': 'noop'})
+    run(str(data_dir), workers=3, use_cache=False, manifest_path=str(tmp_path / 'manifest.json'))
+    assert written == [['Ana', 'Bia', 'Caio', 'Duda', 'Eva']]
@@ -51,3 +51,79 @@ def test_build_rows_skips_empty_names():
     rows = build_rows(df, ano=2024)
     assert len(rows) == 1
     assert rows[0]['nome'] == 'Maria'
+
+
+def test_extract_pdf_rows_merges_chunks_in_page_order(monkeypatch):
+    import scripts.ingest_deputados as ingest_deputados
+
+    pages = [MagicMock() for _ in range(5)]
+    for i, page in enumerate(pages):
+        page.extract_tables.return_value = [[[f'p{i}']]]
+    fake_pdf = MagicMock()
+    fake_pdf.__enter__.return_value.pages = pages
+    monkeypatch.setattr(ingest_deputados.pdfplumber, 'open', lambda path: fake_pdf)
+    monkeypatch.setattr(ingest_deputados, 'detect_table_template', lambda page: None)
+    monkeypatch.setattr(ingest_deputados, '_extract_page_range',
+                        lambda path, start, end, template: (start, [[f'p{i}'] for i in range(start, end)]))
+
+    rows = ingest_deputados.extract_pdf_rows('fake.pdf', workers=1, chunk_size=2)
+    assert rows == [['p0'], ['p1'], ['p2'], ['p3'], ['p4']]
+
+
+def test_row_boundaries_merges_rules_and_rejects_partial_ones():
+    from types import SimpleNamespace
+    from scripts.ingest_deputados import _row_boundaries
+
+    template = {'x0': 0, 'x1': 100, 'header_bottom': 10}
+    full = lambda top, x0=0, x1=100: {'top': top, 'x0': x0, 'x1': x1}
+    page = SimpleNamespace(horizontal_edges=[full(10), full(30, 0, 60), full(31, 60, 100), full(50)])
+    assert _row_boundaries(page, template) == [10, 30.5, 50]
+
+    page = SimpleNamespace(horizontal_edges=[full(10), full(30, 0, 40), full(50)])
+    assert _row_boundaries(page, template) == []
+
+
+def test_build_rows_matches_per_row_normalization(tmp_path):
+    from scripts.db_utils import normalize_deputado_row
+
+    df = pd.DataFrame({
+        'PARLAMENTAR': ['João Silva ', '', 'Maria', None, 'Ana'],
+        'PARTIDO': ['PT', 'PL', None, 'PSOL', 'MDB'],
+        'MUNICÍPIO': ['São Paulo', 'Campinas', 'Santos', None, 'Sorocaba'],
+        'CÓDIGO': [101, 102, 103, 104, 105],
+        'DATA PAGAMENTO': ['2024-03-15', '-', None, '15/03/2024', 'sem data'],
+        'VALOR DECISÃO': ['R$ 10.000,00', '1,234.56', None, 'abc', 2500],
+        'ESTÁGIO': ['Pago', 'Empenhado', None, 'Pago', 'Liquidado'],
+    })
+    xlsx_path = tmp_path / "2024.xlsx"
+    df.to_excel(xlsx_path, index=False)
+    processed = [load_file(str(xlsx_path)), load_file(str(xlsx_path)).assign(
+        data=pd.to_datetime(['2024-03-15', None, None, '2024-03-16', None]))]
+
+    for frame in processed:
+        expected = [normalize_deputado_row(row.to_dict(), ano=2024) for _, row in frame.iterrows()
+                    if str(row.get('nome', '')).strip()]
+        assert build_rows(frame, ano=2024) == expected
+
+
+def test_streamed_rows_match_whole_file_rows(tmp_path):
+    from scripts.db_utils import add_fingerprints
+    from scripts.ingest_deputados import scan_file, iter_streamed_rows, detect_ano_from_counts, detect_ano
+
+    df = pd.DataFrame({
+        'PARLAMENTAR': ['Ana', 'Bia', '', 'Caio', 'Ana', 'Bia'],
+        'ANO': ['2024'] * 6,
+        'CÓDIGO': ['2024.1', '2024.2', '2024.3', '2024.2', None, None],
+        'VALOR DECISÃO': [100, 200, 300, 400, 500, 500],
+        'ESTÁGIO': ['Pagas', 'Empenhado', 'Pagas', 'Pagas', 'Pagas', 'Pagas'],
+    })
+    path = str(tmp_path / "2024.xlsx")
+    df.to_excel(path, index=False)
+
+    whole = load_file(path)
+    expected = add_fingerprints(build_rows(whole, detect_ano(whole, path)))
+    total, anos, codigos = scan_file(path, chunk_rows=2)
+    assert total == len(expected)
+    ano = detect_ano_from_counts(anos, path)
+    assert ano == 2024
+    assert list(iter_streamed_rows(path, ano, codigos, chunk_rows=2)) == expected
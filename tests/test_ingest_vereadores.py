@@ -3,7 +3,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pytest
 from unittest.mock import patch, MagicMock
-from scripts.ingest_vereadores import fetch_data, build_rows
+from scripts.ingest_vereadores import (fetch_data, build_rows, iter_xml_rows, _parse_xml_rows,
+                                       valores_map)
 
 
 def test_fetch_data_returns_list(requests_mock):
@@ -27,3 +28,45 @@ def test_build_rows_skips_empty_names():
     raw = [{"nome": "", "valor": 1000}, {"nome": "Carlos", "valor": 2000}]
     rows = build_rows(raw, ano=2024)
     assert len(rows) == 1
+
+
+SAMPLE_XML = (
+    b'<?xml version="1.0" encoding="utf-8"?>'
+    b'<ArrayOfLinha xmlns="http://saeows.saopaulo.sp.leg.br/">'
+    b'<Linha><Numero>1</Numero><Vereador>10</Vereador></Linha>'
+    b'<Linha><Numero>2</Numero><Vereador>11</Vereador><Objeto>Pra\xc3\xa7a</Objeto></Linha>'
+    b'</ArrayOfLinha>'
+)
+
+
+def test_iter_xml_rows_parses_chunked_stream():
+    chunks = [SAMPLE_XML[i:i + 7] for i in range(0, len(SAMPLE_XML), 7)]
+    rows = list(iter_xml_rows(chunks))
+    assert rows == [{'Numero': '1', 'Vereador': '10'},
+                    {'Numero': '2', 'Vereador': '11', 'Objeto': 'Praça'}]
+    assert rows == _parse_xml_rows(SAMPLE_XML)
+
+
+def test_valores_map_sums_dotacoes_per_emenda():
+    rows = [{'NUM_EMENDA': '7', 'VAL_DOTA_EMD': '100.5', 'COD_FCAO_GOVR': '10'},
+            {'NUM_EMENDA': '7', 'VAL_DOTA_EMD': '50', 'COD_FCAO_GOVR': '12'},
+            {'NUM_EMENDA': '8', 'VAL_DOTA_EMD': None, 'COD_FCAO_GOVR': '15'}]
+    assert valores_map(iter(rows)) == {'7': {'valor': 150.5, 'funcao': '10'},
+                                       '8': {'valor': 0.0, 'funcao': '15'}}
+
+
+def test_iter_rows_enriches_each_streamed_linha(tmp_path, requests_mock):
+    from collections import Counter
+    from scripts.http_cache import HttpCache
+    from scripts.ingest_vereadores import iter_rows
+    url = "https://fake-api.example.com/Servico/EmendasVereadores"
+    requests_mock.post(url, content=SAMPLE_XML)
+    rejects = Counter()
+    with patch.dict(os.environ, {"VEREADORES_API_URL": url}):
+        rows = iter_rows(2024, {'10': {'nome': 'Ana Lima', 'partido': 'PT'}}, {'1': {'valor': 10.0, 'funcao': '10'}},
+                         http=HttpCache(str(tmp_path), log=lambda *a: None), rejects=rejects)
+        first = next(rows)
+        assert first['nome'] == 'Ana Lima' and first['tipo'] == 'vereador'
+        rest = list(rows)
+    assert len(rest) == 1
+    assert rejects == Counter({'unknown_vereador': 1, 'missing_valor': 1})
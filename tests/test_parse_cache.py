@@ -0,0 +1,44 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from scripts import parse_cache
+
+
+def _loader_counting(calls):
+    def loader(path):
+        calls.append(path)
+        return pd.DataFrame({'nome': ['João Silva'], 'valor_num': [10.0], 'pago_flag': [True]})
+    return loader
+
+
+def test_cached_skips_loader_when_file_unchanged(tmp_path):
+    src = tmp_path / "2024.csv"
+    src.write_text("PARLAMENTAR,VALOR\nJoão Silva,10\n", encoding='utf-8')
+    cache_dir = str(tmp_path / 'cache')
+    calls = []
+
+    first = parse_cache.cached(str(src), 1, _loader_counting(calls), cache_dir=cache_dir)
+    second = parse_cache.cached(str(src), 1, _loader_counting(calls), cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(first, second)
+    assert len(calls) == 1
+
+    # A new parser version or changed contents invalidate the entry
+    parse_cache.cached(str(src), 2, _loader_counting(calls), cache_dir=cache_dir)
+    src.write_text("PARLAMENTAR,VALOR\nMaria,20\n", encoding='utf-8')
+    parse_cache.cached(str(src), 2, _loader_counting(calls), cache_dir=cache_dir)
+    assert len(calls) == 3
+
+
+def test_list_and_purge_entries(tmp_path):
+    src = tmp_path / "2024.csv"
+    src.write_text("x\n1\n", encoding='utf-8')
+    cache_dir = str(tmp_path / 'cache')
+    parse_cache.cached(str(src), 1, _loader_counting([]), cache_dir=cache_dir)
+    parse_cache.cached(str(src), 2, _loader_counting([]), cache_dir=cache_dir)
+
+    assert len(parse_cache.list_entries(cache_dir)) == 2
+    assert parse_cache.purge(cache_dir, keep_version=2) == 1
+    assert [m['version'] for m in parse_cache.list_entries(cache_dir)] == [2]
+    assert parse_cache.purge(cache_dir, purge_all=True) == 1
+    assert parse_cache.list_entries(cache_dir) == []
@@ -0,0 +1,67 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+from PIL import Image
+from photo_cache import PhotoCache
+
+
+def _jpeg_bytes(size=(600, 800)):
+    buf = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buf, 'JPEG')
+    return buf.getvalue()
+
+
+def test_photo_is_downloaded_once_and_resized(tmp_path, requests_mock):
+    requests_mock.get('https://img.example.com/foto.jpg', content=_jpeg_bytes())
+    resolved = []
+
+    def resolve(nome):
+        resolved.append(nome)
+        return 'https://img.example.com/foto.jpg'
+
+    cache = PhotoCache(resolve, str(tmp_path))
+    data, etag, mimetype = cache.get('Maria Silva', size=96, fmt='jpg')
+    assert mimetype == 'image/jpeg'
+    assert max(Image.open(io.BytesIO(data)).size) == 96
+
+    again = cache.get('maria silva', size=96, fmt='jpg')
+    assert again[1] == etag
+    assert resolved == ['Maria Silva']
+    assert requests_mock.call_count == 1
+
+
+def test_missing_photo_returns_none(tmp_path):
+    cache = PhotoCache(lambda nome: None, str(tmp_path))
+    assert cache.get('Ninguém') is None
+
+
+def test_unknown_entity_is_not_resolved_nor_stored(tmp_path):
+    resolved = []
+    cache = PhotoCache(lambda nome: resolved.append(nome), str(tmp_path), known=lambda nome: False)
+    assert cache.get('../../qualquer coisa') is None
+    assert resolved == []
+    assert os.listdir(tmp_path) == []
+
+
+def test_cache_keeps_at_most_max_entries(tmp_path, requests_mock):
+    requests_mock.get('https://img.example.com/foto.jpg', content=_jpeg_bytes((50, 50)))
+    cache = PhotoCache(lambda nome: 'https://img.example.com/foto.jpg', str(tmp_path), max_entries=2)
+    for i in range(4):
+        cache.get(f'Nome {i}', size=96, fmt='jpg')
+        os.utime(cache._dir(f'Nome {i}'), (i, i))
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(cache._dir(f'Nome {i}')) for i in (2, 3))
+
+
+def test_refresh_keeps_files_readable_and_version_changes(tmp_path, requests_mock):
+    requests_mock.get('https://img.example.com/a.jpg', content=_jpeg_bytes((300, 300)))
+    requests_mock.get('https://img.example.com/b.jpg', content=_jpeg_bytes((300, 200)))
+    url = ['https://img.example.com/a.jpg']
+    cache = PhotoCache(lambda nome: url[0], str(tmp_path), ttl=0)
+    cache.get('Maria', size=96, fmt='jpg')
+    first = cache._read_meta('Maria')['version']
+    url[0] = 'https://img.example.com/b.jpg'
+    data, etag, _ = cache.get('Maria', size=96, fmt='jpg')
+    assert cache._read_meta('Maria')['version'] != first
+    assert Image.open(io.BytesIO(data)).size == (96, 64)
+    assert [name for name in os.listdir(tmp_path) if '.' in name] == []
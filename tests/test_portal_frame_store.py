@@ -0,0 +1,53 @@
+import sys, os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'portal-emendas-dinamico'))
+
+import pytest
+import pandas as pd
+
+pytest.importorskip('pyarrow')
+from frame_store import save_frame, load_frame, frame_path
+
+
+def _df():
+    # codigo as read_xlsx builds it: ints and None in an object column
+    return pd.DataFrame({'nome': ['Ana', 'Beto'], 'codigo': pd.Series([123, None], dtype=object),
+                         'valor_num': [1.5, 0.0], 'pago_flag': [True, False]})
+
+
+def test_frame_round_trips_next_to_the_original(tmp_path):
+    source = tmp_path / '2024.csv'
+    source.write_text('nome\nAna\nBeto\n', encoding='utf-8')
+    df = _df()
+    assert save_frame(df, str(source), version=1)
+    assert os.path.exists(frame_path(str(source)))
+    pd.testing.assert_frame_equal(load_frame(str(source), version=1), df)
+
+
+def test_stale_frames_are_ignored(tmp_path):
+    source = tmp_path / '2024.csv'
+    source.write_text('nome\nAna\n', encoding='utf-8')
+    save_frame(_df(), str(source), version=1)
+    assert load_frame(str(source), version=2) is None
+    source.write_text('nome\nOutro\n', encoding='utf-8')
+    assert load_frame(str(source), version=1) is None
+
+
+def test_zero_copy_frames_keep_strings_in_arrow(tmp_path):
+    source = tmp_path / '2024.csv'
+    source.write_text('nome\nAna\nBeto\n', encoding='utf-8')
+    df = _df()
+    df['nome'] = df['nome'].astype('category')
+    save_frame(df, str(source), version=1)
+
+    mapped = load_frame(str(source), version=1, zero_copy=True)
+    assert isinstance(mapped['nome'].dtype, pd.CategoricalDtype)
+    assert mapped['valor_num'].tolist() == [1.5, 0.0]
+    assert mapped['codigo'].tolist() == [123, None]
+
+    df['objeto'] = ['a', None]
+    save_frame(df, str(source), version=1)
+    mapped = load_frame(str(source), version=1, zero_copy=True)
+    assert isinstance(mapped['objeto'].dtype, pd.ArrowDtype)
+    assert mapped['objeto'][0] == 'a' and pd.isna(mapped['objeto'][1])
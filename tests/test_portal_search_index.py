@@ -0,0 +1,45 @@
+import sys, os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'portal-emendas-dinamico'))
+
+import pandas as pd
+from search_index import YearIndex
+
+
+def _df():
+    return pd.DataFrame({
+        'nome': ['Ana Souza', 'Carlos Lima', ' Ana Souza', 'Mariana Alves', 'Ana Souza'],
+        'municipio': ['Santos', 'Bauru', 'Franca', 'Santos', 'Santos'],
+        'funcao': ['10 - Saúde', '12 - Educação', '10 - Saúde', '12 - Educação', None],
+        'valor_num': [100.0, 50.0, 30.0, 20.0, 10.0],
+        'pago_flag': [True, False, False, True, True],
+    })
+
+
+def test_search_matches_substring_like_str_contains():
+    df = _df()
+    index = YearIndex(df)
+    for query in ['ana', 'ANA SOUZA', 'a', 'lima', 'ri', 'zzz', 'ana s']:
+        expected = list(df.index[df['nome'].astype(str).str.strip().str.lower()
+                                 .str.contains(query.lower(), regex=False)])
+        match = index.search(query)
+        assert (list(match.positions) if match else []) == expected, query
+
+
+def test_search_combines_precomputed_aggregates():
+    match = YearIndex(_df()).search('ana')   # Ana Souza + Mariana Alves
+    assert match.total == 160.0
+    assert match.total_pago == 130.0
+    assert match.municipios == {'Santos': 130.0, 'Franca': 30.0}
+    assert list(match.funcoes) == ['10 - Saúde', '12 - Educação']   # NaN função skipped
+
+
+def test_lookup_memoizes_responses_per_query():
+    index = YearIndex(_df())
+    calls = []
+    build = lambda match: calls.append(1) or len(match.positions)
+    assert index.lookup('Carlos', build) == 1
+    assert index.lookup(' carlos ', build) == 1
+    assert index.lookup('ninguém', build) is None
+    assert len(calls) == 1
@@ -0,0 +1,56 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'portal-emendas-dinamico'))
+
+from shared_store import SharedManifest, file_lock
+
+
+def test_poll_only_returns_changed_manifests(tmp_path):
+    manifest = SharedManifest(str(tmp_path))
+    assert manifest.poll() is None  # ainda não existe
+
+    manifest.select_year('2024')
+    assert manifest.poll()['current'] == '2024'
+    assert manifest.poll() is None
+
+
+def test_workers_see_each_others_publications(tmp_path):
+    worker_a = SharedManifest(str(tmp_path))
+    worker_b = SharedManifest(str(tmp_path))
+    worker_b.poll()
+
+    published = worker_a.publish_year('2025', str(tmp_path / '2025.xlsx'), 'abc', version=2)
+    seen = worker_b.poll()
+    assert seen['current'] == '2025'
+    assert seen['years']['2025'] == {'source': '2025.xlsx', 'sha256': 'abc', 'version': 2,
+                                     'generation': published['generation']}
+
+    # Republicar muda a geração do ano; trocar o ano ativo não
+    worker_a.publish_year('2025', str(tmp_path / '2025.xlsx'), 'def', version=2, current=False)
+    worker_a.select_year('2024')
+    seen = worker_b.poll()
+    assert seen['current'] == '2024'
+    assert seen['years']['2025']['generation'] == published['generation'] + 1
+    assert worker_b.year('2025')['sha256'] == 'def'
+    assert worker_b.year('2023') is None
+
+
+def test_file_lock_creates_the_lock_file(tmp_path):
+    path = str(tmp_path / 'x.lock')
+    with file_lock(path):
+        assert os.path.exists(path)
+
+
+def test_year_digest_only_trusted_while_the_original_is_unchanged(tmp_path):
+    source = tmp_path / '2025.csv'
+    source.write_text('nome\nMaria\n')
+    manifest = SharedManifest(str(tmp_path))
+    manifest.publish_year('2025', str(source), 'abc', version=2)
+    assert manifest.year_digest('2025', str(source), 2) == 'abc'
+    assert manifest.year_digest('2025', str(source), 3) is None
+
+    # Substituído fora de um upload: o hash publicado não vale mais
+    source.write_text('nome\nJoão Silva\n')
+    assert manifest.year_digest('2025', str(source), 2) is None
@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'portal-emendas-dinamico'))
+
+from upload_jobs import UploadJobs
+
+
+def _wait(jobs, job):
+    jobs.shutdown(wait=True)
+    return jobs.get(job.id).to_dict()
+
+
+def test_job_reports_progress_and_result():
+    release = threading.Event()
+    midway = threading.Event()
+
+    def process(job):
+        job.update(rows=100, progress=0.5)
+        midway.set()
+        release.wait(5)
+        return {'ano': job.ano or '2024', 'count': 200}
+
+    jobs = UploadJobs(process, workers=1)
+    job = jobs.submit('2024.xlsx', '/tmp/x.xlsx')
+    assert midway.wait(5)
+    status = job.to_dict()
+    assert status['status'] == 'running'
+    assert status['progress'] == 0.5 and status['rows'] == 100
+
+    release.set()
+    status = _wait(jobs, job)
+    assert status['status'] == 'done' and status['progress'] == 1.0
+    assert status['ano'] == '2024' and status['count'] == 200
+
+
+def test_failed_job_keeps_the_error():
+    def process(job):
+        raise ValueError('arquivo inválido')
+
+    jobs = UploadJobs(process, workers=1)
+    job = jobs.submit('ruim.xlsx', '/tmp/ruim.xlsx')
+    status = _wait(jobs, job)
+    assert status['status'] == 'error'
+    assert 'arquivo inválido' in status['error']
+
+
+def test_only_the_newest_finished_jobs_are_kept():
+    jobs = UploadJobs(lambda job: {}, workers=1, keep=2)
+    first = jobs.submit('a.csv', '/tmp/a.csv')
+    deadline = time.time() + 5
+    while first.to_dict()['status'] != 'done' and time.time() < deadline:
+        time.sleep(0.01)
+    second = jobs.submit('b.csv', '/tmp/b.csv')
+    third = jobs.submit('c.csv', '/tmp/c.csv')
+    jobs.shutdown()
+
+    assert jobs.get(first.id) is None
+    assert jobs.get(second.id) is not None and jobs.get(third.id) is not None
+    assert jobs.get('desconhecido') is None
+
+
+def test_status_is_shared_through_the_status_dir(tmp_path):
+    jobs = UploadJobs(lambda job: {'ano': '2024'}, workers=1, status_dir=str(tmp_path))
+    job = jobs.submit('2024.csv', '/tmp/2024.csv')
+    jobs.shutdown()
+
+    # Outro worker (outro processo) só tem o arquivo de status
+    other = UploadJobs(lambda job: {}, workers=1, status_dir=str(tmp_path))
+    status = other.status(job.id)
+    assert status['status'] == 'done' and status['ano'] == '2024'
+    assert other.status('0' * 32) is None
+    assert other.status('../manifest') is None
+    other.shutdown()
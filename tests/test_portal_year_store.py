@@ -0,0 +1,89 @@
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'portal-emendas-dinamico'))
+
+from year_store import YearStore
+
+
+def _frame(n):
+    return pd.DataFrame({'nome': [f'Dep {i}' for i in range(n)], 'valor_num': [100.0] * n})
+
+
+def _store(tmp_path, anos, budget=1 << 30):
+    for ano in anos:
+        (tmp_path / f'{ano}.csv').write_text('x')
+    loaded = []
+
+    def loader(path):
+        loaded.append(os.path.basename(path))
+        return _frame(50)
+
+    return YearStore(str(tmp_path), loader, budget), loaded
+
+
+def test_available_lists_years_on_disk_without_loading(tmp_path):
+    store, loaded = _store(tmp_path, ['2023', '2024'])
+    (tmp_path / 'notas.txt').write_text('x')
+
+    assert store.available() == ['2024', '2023']
+    assert '2023' in store and '2022' not in store
+    assert loaded == []
+
+
+def test_get_loads_once_then_hits(tmp_path):
+    store, loaded = _store(tmp_path, ['2024'])
+
+    first = store.get('2024')
+    assert store.get('2024') is first
+    assert first.index is not None and len(first.df) == 50
+    assert loaded == ['2024.csv']
+    assert store.metrics()['loads'] == 1 and store.metrics()['hits'] == 1
+    assert store.get('2020') is None
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    store, loaded = _store(tmp_path, ['2022', '2023', '2024'])
+    size = store.get('2022').nbytes
+    store.budget_bytes = 2 * size
+
+    store.get('2023')
+    store.get('2022')  # 2023 passa a ser o menos usado
+    store.get('2024')
+
+    metrics = store.metrics()
+    assert metrics['resident_years'] == ['2022', '2024']
+    assert metrics['evictions'] == 1
+    # Um ano descartado é recarregado no próximo acesso
+    store.get('2023')
+    assert loaded.count('2023.csv') == 2
+
+
+def test_keeps_latest_year_even_over_budget(tmp_path):
+    store, _ = _store(tmp_path, ['2023', '2024'], budget=1)
+    store.get('2023')
+    store.put('2024', _frame(10))
+
+    assert store.metrics()['resident_years'] == ['2024']
+
+
+def test_load_errors_are_counted(tmp_path):
+    (tmp_path / '2024.csv').write_text('x')
+
+    def loader(path):
+        raise ValueError('arquivo inválido')
+
+    store = YearStore(str(tmp_path), loader, 1 << 30)
+    assert store.get('2024') is None
+    assert store.metrics()['load_errors'] == 1
+
+
+def test_unknown_years_get_no_load_lock(tmp_path):
+    store, loaded = _store(tmp_path, ['2024'])
+    for ano in ('../x', 'abc', '1999'):
+        assert store.get(ano) is None
+    assert store._load_locks == {}
+    assert loaded == []
@@ -0,0 +1,37 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import pytest
+from scripts.run_report import RunReport
+
+
+def test_stages_and_rejects_are_reported(tmp_path):
+    report = RunReport('ingest_test', ano=2024)
+    with report.stage('parse') as stage:
+        stage['rows_out'] = 3
+    with report.stage('normalize', rows_in=3) as stage:
+        report.reject('empty_nome')
+        report.add_rejects({'invalid_valor': 0})
+        stage['rows_out'] = 2
+
+    data = json.loads(open(report.write(str(tmp_path / 'r.json')), encoding='utf-8').read())
+    assert [s['name'] for s in data['stages']] == ['parse', 'normalize']
+    assert data['stages'][1]['rows_in'] == 3 and data['stages'][1]['rows_out'] == 2
+    assert all(s['wall_s'] >= 0 and s['cpu_s'] >= 0 for s in data['stages'])
+    assert data['rejects'] == {'empty_nome': 1}
+    assert data['context'] == {'ano': 2024}
+
+
+def test_failed_run_still_writes_report_and_metrics(tmp_path):
+    report = RunReport('ingest_test')
+    path, metrics = tmp_path / 'r.json', tmp_path / 'metrics.jsonl'
+    with pytest.raises(ValueError):
+        with report.run(str(path), metrics_path=str(metrics)):
+            with report.stage('parse'):
+                raise ValueError('boom')
+
+    data = json.loads(path.read_text(encoding='utf-8'))
+    assert data['status'] == 'failed' and data['error'] == 'ValueError: boom'
+    assert data['stages'][0]['failed']
+    assert len(metrics.read_text(encoding='utf-8').splitlines()) == 1
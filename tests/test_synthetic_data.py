@@ -0,0 +1,29 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import synthetic_data
+from scripts.ingest_deputados import load_file, build_rows
+from scripts.ingest_vereadores import _parse_xml_rows
+
+
+def test_portal_xlsx_is_mapped_like_the_real_files(tmp_path):
+    path = synthetic_data.make_portal_xlsx(str(tmp_path / '2024.xlsx'), 50)
+    rows = build_rows(load_file(path), 2024)
+    assert len(rows) == 50
+    assert all(r['nome'] and r['valor'] > 0 and r['codigo'].startswith('2024.') for r in rows)
+
+
+def test_alesp_pdf_round_trips_through_the_extractor(tmp_path):
+    path = synthetic_data.make_alesp_pdf(str(tmp_path / '2021.pdf'), 60)
+    df = load_file(path, workers=1)
+    expected = list(synthetic_data.alesp_rows(60))
+    assert len(df) == 60
+    assert [n for n in df['nome']] == [row[0] for row in expected]
+    assert [m.replace('\n', ' ') for m in df['orgao']] == [row[1] for row in expected]
+
+
+def test_pmsp_xml_endpoints_are_consistent():
+    raw = _parse_xml_rows(synthetic_data.make_pmsp_xml('EmendasVereadores', 30))
+    emendas = _parse_xml_rows(synthetic_data.make_pmsp_xml('Emendas', 30))
+    assert len(raw) == 30
+    assert {r['Numero'] for r in raw} == {r['NUM_EMENDA'] for r in emendas}
@@ -0,0 +1,45 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from openpyxl import Workbook
+from scripts.xlsx_stream import iter_xlsx_frames, read_xlsx, xlsx_row_count
+
+
+def _write(path, rows):
+    wb = Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def test_iter_xlsx_frames_chunks_with_same_columns(tmp_path):
+    path = _write(tmp_path / "a.xlsx", [['PARLAMENTAR', 'VALOR']] + [[f'P{i}', i * 10] for i in range(7)])
+    frames = list(iter_xlsx_frames(path, chunk_rows=3))
+    assert [len(f) for f in frames] == [3, 3, 1]
+    assert all(list(f.columns) == ['PARLAMENTAR', 'VALOR'] for f in frames)
+    assert pd.concat(frames)['PARLAMENTAR'].tolist() == [f'P{i}' for i in range(7)]
+
+
+def test_read_xlsx_follows_read_excel_conventions(tmp_path):
+    path = _write(tmp_path / "b.xlsx", [
+        ['NOME', 'VALOR', 'NOME', None],
+        ['Ana', 1500.0, 'x', None],
+        [None, None, None, None],
+        ['N/A', 2.5, 'y', 'extra'],
+        [None, None, None, None],
+    ])
+    df = read_xlsx(path)
+    expected = pd.read_excel(path)
+    assert list(df.columns) == ['NOME', 'VALOR', 'NOME.1']
+    assert list(expected.columns)[:3] == list(df.columns)
+    assert len(df) == len(expected) == 3
+    assert df['VALOR'].equals(expected['VALOR'])
+    assert df['NOME'].isna().tolist() == [False, True, True]
+
+
+def test_xlsx_row_count_reads_the_declared_dimension(tmp_path):
+    path = _write(tmp_path / "c.xlsx", [['NOME', 'VALOR']] + [[f'P{i}', i] for i in range(4)])
+    assert xlsx_row_count(path) == 4